@@ -0,0 +1,231 @@
+"""
+Lokaler Ersatz für den Ollama-Endpunkt /api/generate.
+
+Latenz, Token-Rate und Fehlerquote sind einstellbar, damit sich der Durchsatz
+der Pipeline ohne echtes Modell messen lässt. Die Tests verwenden denselben
+Server mit den Standardwerten (keine Verzögerung, keine Fehler).
+
+    python benchmarks/fake_ollama.py --port 11434 --latency 0.2 --tokens-per-second 50
+"""
+import argparse
+import contextlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    server: 'FakeOllamaServer'
+
+    def do_GET(self):
+        # Health-Check wie bei Ollama: Liste der installierten Modelle
+        if self.path != '/api/tags':
+            self.send_error(404)
+            return
+        self._send_json(200, {'models': [{'name': 'mistral:latest'}]})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length))
+        self.server.record(payload)
+
+        if self.server.should_fail():
+            self._send_json(500, {'error': 'simulierter Serverfehler'})
+            return
+
+        # Wie OLLAMA_NUM_PARALLEL: nur `parallel` Generierungen gleichzeitig
+        with self.server.slots:
+            self._generate(payload)
+
+    def _generate(self, payload: Dict[str, Any]) -> None:
+        tokens = self.server.response_tokens(payload['prompt'])
+        # Zeit bis zum ersten Token (Prompt-Verarbeitung)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if payload.get('stream'):
+            self._stream(payload, tokens)
+            return
+
+        if self.server.tokens_per_second:
+            time.sleep(len(tokens) / self.server.tokens_per_second)
+        self._send_json(200, {
+            'model': payload['model'],
+            'response': ''.join(tokens),
+            'done': True,
+            **self.server.eval_stats(len(tokens), payload['prompt'])
+        })
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, payload: Dict[str, Any], tokens: List[str]) -> None:
+        """Sendet die Antwort tokenweise als NDJSON wie Ollama mit `stream: true`"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        delay = 1 / self.server.tokens_per_second if self.server.tokens_per_second else 0.0
+        try:
+            for token in tokens:
+                if delay:
+                    time.sleep(delay)
+                line = {'model': payload['model'], 'response': token, 'done': False}
+                self.wfile.write(json.dumps(line).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            final = {'model': payload['model'], 'response': '', 'done': True,
+                     **self.server.eval_stats(len(tokens), payload['prompt'])}
+            self.wfile.write(json.dumps(final).encode('utf-8') + b'\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hat den Stream abgebrochen
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """HTTP-Server, der /api/generate mit konfigurierbarem Verhalten beantwortet"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 tokens_per_second: Optional[float] = None, response_tokens: Optional[int] = None,
+                 failure_rate: float = 0.0, seed: Optional[int] = None,
+                 parallel: Optional[int] = None, prefix_cache: bool = False):
+        """
+        Initialisiert den Server.
+
+        Args:
+            host: Adresse, an die der Server gebunden wird
+            port: Port, 0 wählt einen freien Port
+            latency: Sekunden bis zum ersten Token
+            tokens_per_second: Generierungsrate, None antwortet ohne Verzögerung
+            response_tokens: Länge der Antwort in Tokens, None antwortet mit
+                "Antwort auf: <Prompt-Anfang>"
+            failure_rate: Anteil der Anfragen, die mit HTTP 500 beantwortet werden
+            seed: Startwert für die Auswahl der fehlschlagenden Anfragen
+            parallel: Gleichzeitig bearbeitete Anfragen (wie OLLAMA_NUM_PARALLEL),
+                None für unbegrenzt
+            prefix_cache: Wie Ollamas KV-Cache: der mit dem vorigen Prompt
+                gemeinsame Anfang zählt nicht zu `prompt_eval_count`
+        """
+        super().__init__((host, port), _FakeOllamaHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_token_count = response_tokens
+        self.failure_rate = failure_rate
+        self.slots = threading.BoundedSemaphore(parallel) if parallel else contextlib.nullcontext()
+        self.prefix_cache = prefix_cache
+        self._last_prompt: List[str] = []
+        self.requests: List[Dict[str, Any]] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self.requests.append(payload)
+
+    def should_fail(self) -> bool:
+        if not self.failure_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+    def response_tokens(self, prompt: str) -> List[str]:
+        """Zerlegt die Antwort in Tokens (Wörter samt folgendem Leerzeichen)"""
+        if self.response_token_count is None:
+            words = f"Antwort auf: {prompt[:20]}".split(' ')
+        else:
+            words = [f"wort{i % 50}" for i in range(self.response_token_count)]
+        return [word + ' ' for word in words[:-1]] + words[-1:]
+
+    def eval_stats(self, token_count: int, prompt: str) -> Dict[str, int]:
+        """Token-Zahlen und Dauern (ns) wie in der letzten Ollama-Antwort"""
+        if self.tokens_per_second:
+            duration = token_count / self.tokens_per_second
+        else:
+            duration = token_count * 0.001
+        words = prompt.split()
+        evaluated = len(words)
+        if self.prefix_cache:
+            with self._lock:
+                shared = 0
+                for previous, word in zip(self._last_prompt, words):
+                    if previous != word:
+                        break
+                    shared += 1
+                self._last_prompt = words
+            evaluated = max(1, len(words) - shared)
+        # Prompt-Auswertung anteilig zur Latenz, ohne Latenz 1 ms je Wort
+        if self.latency:
+            prompt_seconds = self.latency * evaluated / max(len(words), 1)
+        else:
+            prompt_seconds = evaluated * 0.001
+        return {
+            'prompt_eval_count': evaluated,
+            'prompt_eval_duration': int(prompt_seconds * 1e9),
+            'eval_count': token_count,
+            'eval_duration': int(duration * 1e9)
+        }
+
+    def start(self) -> 'FakeOllamaServer':
+        """Startet den Server in einem Hintergrund-Thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Beendet den Server und gibt den Port frei"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeOllamaServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--latency', type=float, default=0.0, help="Sekunden bis zum ersten Token")
+    parser.add_argument('--tokens-per-second', type=float, help="Generierungsrate")
+    parser.add_argument('--response-tokens', type=int, help="Länge der Antworten in Tokens")
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help="Anteil fehlschlagender Anfragen (0-1)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--parallel', type=int, help="gleichzeitig bearbeitete Anfragen")
+    parser.add_argument('--prefix-cache', action='store_true',
+                        help="gemeinsamen Prompt-Anfang nicht erneut auswerten (KV-Cache)")
+    args = parser.parse_args(argv)
+
+    server = FakeOllamaServer(args.host, args.port, latency=args.latency,
+                              tokens_per_second=args.tokens_per_second,
+                              response_tokens=args.response_tokens,
+                              failure_rate=args.failure_rate, seed=args.seed,
+                              parallel=args.parallel, prefix_cache=args.prefix_cache)
+    print(f"Fake-Ollama läuft auf {server.url} (Ctrl+C zum Beenden)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
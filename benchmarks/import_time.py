@@ -0,0 +1,99 @@
+"""
+Misst die Importzeit der Projektmodule mit `python -X importtime` und
+vergleicht sie mit den Budgets aus import_budgets.yaml.
+
+Jedes Modul wird in einem frischen Interpreter importiert. Der Exit-Code ist 1,
+wenn ein Budget überschritten oder ein verbotenes Modul geladen wurde.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --only main
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGETS = Path(__file__).resolve().parent / 'import_budgets.yaml'
+
+def measure_import(module: str) -> Tuple[float, Set[str]]:
+    """
+    Importiert ein Modul in einem neuen Prozess.
+
+    Returns:
+        Kumulative Importzeit in Millisekunden und Namen aller geladenen Module
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import von {module} fehlgeschlagen:\n{result.stderr}")
+
+    cumulative_ms, loaded = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        if not cumulative.strip().isdigit():
+            continue
+        loaded.add(name)
+        if name == module:
+            cumulative_ms = int(cumulative) / 1000
+    if cumulative_ms is None:
+        raise RuntimeError(f"Keine Importzeit für {module} gefunden")
+    return cumulative_ms, loaded
+
+def check_module(module: str, budget: Dict[str, Any], repeat: int = 5,
+                 timing: bool = True) -> List[str]:
+    """Prüft ein Modul gegen sein Budget und gibt die Verstöße zurück"""
+    runs = [measure_import(module) for _ in range(repeat if timing else 1)]
+    best_ms = min(ms for ms, _ in runs)
+    loaded = set().union(*(names for _, names in runs))
+
+    problems = []
+    heavy = sorted(
+        name for name in budget.get('forbidden', [])
+        if any(loaded_name == name or loaded_name.startswith(f'{name}.') for loaded_name in loaded)
+    )
+    if heavy:
+        problems.append(f"{module}: lädt beim Import {', '.join(heavy)}")
+    if timing and best_ms > budget['max_ms']:
+        problems.append(f"{module}: {best_ms:.1f} ms > Budget {budget['max_ms']} ms")
+
+    status = 'FEHLER' if problems else 'ok'
+    timing_info = f"{best_ms:8.1f} ms (Budget {budget['max_ms']} ms)" if timing else ''
+    print(f"{module:<22} {timing_info} {status}")
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budgets', type=Path, default=DEFAULT_BUDGETS)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Läufe pro Modul, gewertet wird der schnellste")
+    parser.add_argument('--only', nargs='*', help="nur diese Module prüfen")
+    parser.add_argument('--skip-timing', action='store_true',
+                        help="nur verbotene Importe prüfen (deterministisch)")
+    args = parser.parse_args(argv)
+
+    with open(args.budgets, 'r', encoding='utf-8') as f:
+        budgets = yaml.safe_load(f)['modules']
+
+    problems = []
+    for module, budget in budgets.items():
+        if args.only and module not in args.only:
+            continue
+        problems.extend(check_module(module, budget, args.repeat, timing=not args.skip_timing))
+
+    if problems:
+        print("\nKaltstart-Regression:")
+        for problem in problems:
+            print(f"- {problem}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
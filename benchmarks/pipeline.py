@@ -0,0 +1,356 @@
+"""
+End-to-End-Benchmark der Analyse-Pipeline gegen einen lokalen Fake-Ollama-Server.
+
+Erzeugt synthetische CSV-/Excel-Dateien im Stil von data/astronauts.csv in
+wachsender Größe und misst drei Szenarien, jedes in einem eigenen Prozess:
+
+- agent:     OllamaAgent.analyze_stats direkt (nur LLM-Anteil)
+- processor: FileProcessor.process_file pro Datei
+- watcher:   Dateien landen im überwachten Verzeichnis, main.NewFileHandler
+             verarbeitet sie über die JobQueue
+
+Berichtet werden Dateien/s, p50/p95-Latenz und der maximale RSS.
+
+    python benchmarks/pipeline.py --sizes 1000 10000 --latency 0.05 --tokens-per-second 200
+    python benchmarks/pipeline.py --output neu.json --baseline alt.json
+    python benchmarks/pipeline.py --scenarios agent --backends 2 --workers 8
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+SCENARIOS = ('agent', 'processor', 'watcher')
+
+def make_astronaut_frame(rows: int, seed: int = 0):
+    """Erzeugt einen DataFrame mit den Spalten von data/astronauts.csv"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    birth = pd.Timestamp('1930-01-01') + pd.to_timedelta(rng.integers(0, 20000, rows), unit='D')
+    flights = rng.integers(0, 7, rows)
+    walks = rng.integers(0, 10, rows)
+    return pd.DataFrame({
+        'Name': [f"Astronaut {i}" for i in range(rows)],
+        'Year': rng.integers(1959, 2010, rows).astype(float),
+        'Group': rng.integers(1, 21, rows).astype(float),
+        'Status': rng.choice(['Active', 'Retired', 'Deceased', 'Management'], rows),
+        'Birth Date': birth.strftime('%-m/%-d/%Y'),
+        'Birth Place': rng.choice(['Houston, TX', 'Lewiston, MT', 'Warsaw, NY', 'Cleveland, OH'], rows),
+        'Gender': rng.choice(['Male', 'Female'], rows, p=[0.85, 0.15]),
+        'Alma Mater': rng.choice(['US Naval Academy', 'Purdue University', 'MIT'], rows),
+        'Undergraduate Major': rng.choice(['Physics', 'Engineering', 'Geology'], rows),
+        'Graduate Major': rng.choice(['Aerospace Engineering', 'Physics', None], rows),
+        'Military Rank': rng.choice(['Colonel', 'Captain', None], rows),
+        'Military Branch': rng.choice(['US Air Force', 'US Navy', None], rows),
+        'Space Flights': flights,
+        'Space Flight (hr)': flights * rng.integers(100, 900, rows),
+        'Space Walks': walks,
+        'Space Walks (hr)': walks * rng.integers(1, 8, rows),
+        'Missions': [f"STS-{n}" for n in rng.integers(1, 135, rows)],
+        'Death Date': None,
+        'Death Mission': None
+    })
+
+def generate_files(directory: Path, file_format: str, rows: int, count: int) -> List[Path]:
+    """Schreibt `count` synthetische Dateien eines Formats und einer Größe"""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        df = make_astronaut_frame(rows, seed=i)
+        path = directory / f"astronauts_{rows}_{i}.{file_format}"
+        if file_format == 'csv':
+            df.to_csv(path, index=False)
+        else:
+            df.to_excel(path, index=False)
+        paths.append(path)
+    return paths
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Perzentil nach dem Nearest-Rank-Verfahren"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def peak_rss_mb() -> Optional[float]:
+    """Maximaler RSS des aktuellen Prozesses in MB, None ohne `resource` (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux meldet KB, macOS Bytes
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+def summarize(latencies: List[float], statuses: List[str], wall_seconds: float) -> Dict[str, Any]:
+    """Fasst die Messwerte eines Szenarios zusammen"""
+    return {
+        'files': len(statuses),
+        'failed': sum(1 for status in statuses if status != 'success'),
+        'wall_seconds': round(wall_seconds, 3),
+        'files_per_second': round(len(statuses) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        'latency_seconds': {
+            'p50': round(percentile(latencies, 0.50), 4),
+            'p95': round(percentile(latencies, 0.95), 4),
+            'max': round(max(latencies), 4) if latencies else 0.0
+        },
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def run_agent(files: List[Path], base_url: Union[str, List[str]], workers: int) -> Dict[str, Any]:
+    """Misst nur die LLM-Aufrufe: eine Analyse je Datei auf vorab berechneten Statistiken"""
+    from src.ollama_agent import OllamaAgent
+    from src.readers import get_reader
+
+    agent = OllamaAgent(base_url=base_url, max_connections=workers)
+    stats = [agent.compute_basic_stats(get_reader(path).read(path)) for path in files]
+
+    def analyze(basic_stats):
+        start = time.perf_counter()
+        try:
+            agent.analyze_stats(basic_stats)
+            status = 'success'
+        except Exception:
+            status = 'error'
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(analyze, stats))
+    wall_seconds = time.perf_counter() - start
+    agent.close()
+    return summarize([r[0] for r in results], [r[1] for r in results], wall_seconds)
+
+def run_processor(files: List[Path], base_url: Union[str, List[str]], workers: int) -> Dict[str, Any]:
+    """Misst FileProcessor.process_file (Einlesen, Statistik, LLM, Bericht)"""
+    from src.file_processor import FileProcessor
+    from src.ollama_agent import OllamaAgent
+
+    agent = OllamaAgent(base_url=base_url, max_connections=workers)
+    processor = FileProcessor(agent)
+
+    def process(path):
+        start = time.perf_counter()
+        try:
+            status = processor.process_file(path).get('status', 'error')
+        except Exception:
+            status = 'error'
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(process, files))
+    wall_seconds = time.perf_counter() - start
+    agent.close()
+    return summarize([r[0] for r in results], [r[1] for r in results], wall_seconds)
+
+def run_watcher(files: List[Path], base_url: Union[str, List[str]], workers: int,
+                timeout: float = 600.0) -> Dict[str, Any]:
+    """Misst den Weg vom Erscheinen einer Datei im Watch-Verzeichnis bis zum fertigen Ergebnis"""
+    from watchdog.observers import Observer
+    from main import NewFileHandler
+    from src.file_processor import FileProcessor
+    from src.job_queue import JobQueue
+    from src.ollama_agent import OllamaAgent
+
+    watch_dir = Path.cwd() / 'watch'
+    watch_dir.mkdir(exist_ok=True)
+    agent = OllamaAgent(base_url=base_url, max_connections=workers)
+    handler = NewFileHandler(FileProcessor(agent), Path('output'))
+
+    arrived: Dict[str, float] = {}
+    finished: Dict[str, tuple] = {}
+    all_done = threading.Event()
+    lock = threading.Lock()
+
+    def handle(path: Path):
+        results = handler.handle_file(path)
+        with lock:
+            # Spätere on_modified-Events derselben Datei werden übersprungen
+            if path.name not in finished and (results or {}).get('status') != 'skipped':
+                finished[path.name] = (time.perf_counter(), (results or {}).get('status', 'error'))
+                if len(finished) == len(files):
+                    all_done.set()
+
+    job_queue = JobQueue(handle, num_workers=workers, max_queue_size=len(files) + 1)
+    job_queue.start()
+    handler.attach_queue(job_queue)
+    observer = Observer()
+    observer.schedule(handler, str(watch_dir), recursive=False)
+    observer.start()
+
+    start = time.perf_counter()
+    for path in files:
+        # Umbenennen statt Kopieren: die Datei erscheint vollständig
+        arrived[path.name] = time.perf_counter()
+        os.replace(path, watch_dir / path.name)
+    all_done.wait(timeout)
+    wall_seconds = time.perf_counter() - start
+
+    observer.stop()
+    observer.join()
+    job_queue.shutdown(wait=True, cancel_pending=True)
+    agent.close()
+
+    latencies = [finished[name][0] - arrived[name] for name in finished]
+    statuses = [finished.get(path.name, (None, 'timeout'))[1] for path in files]
+    return summarize(latencies, statuses, wall_seconds)
+
+_RUNNERS = {'agent': run_agent, 'processor': run_processor, 'watcher': run_watcher}
+
+def run_scenario(scenario: str, data_dir: Path, base_url: Union[str, List[str]], workers: int) -> Dict[str, Any]:
+    """Führt ein Szenario im aktuellen Prozess aus; Arbeitsverzeichnis ist `data_dir`"""
+    files = sorted(path for path in data_dir.iterdir() if path.is_file())
+    previous_cwd = Path.cwd()
+    os.chdir(data_dir)
+    (data_dir / 'output').mkdir(exist_ok=True)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            return _RUNNERS[scenario](files, base_url, workers)
+    finally:
+        os.chdir(previous_cwd)
+
+def run_isolated(scenario: str, data_dir: Path, base_url: Union[str, List[str]], workers: int) -> Dict[str, Any]:
+    """Führt ein Szenario in einem frischen Interpreter aus (eigener Peak-RSS)"""
+    urls = [base_url] if isinstance(base_url, str) else base_url
+    result = subprocess.run(
+        [sys.executable, __file__, '--run-scenario', scenario, '--data-dir', str(data_dir),
+         '--base-url', ','.join(urls), '--workers', str(workers)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Szenario {scenario} fehlgeschlagen:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def _git_commit() -> Optional[str]:
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                            capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Gibt die Veränderung von Durchsatz, p95 und RSS gegenüber einem älteren Bericht aus"""
+    def key(entry):
+        return entry['scenario'], entry['format'], entry['rows']
+
+    old = {key(entry): entry for entry in baseline['results']}
+    print(f"\nVergleich mit {baseline.get('git_commit') or 'Baseline'} vom {baseline.get('created')}:")
+    for entry in report['results']:
+        previous = old.get(key(entry))
+        if previous is None:
+            continue
+
+        def change(new, before):
+            if not before or new is None:
+                return '   n/a'
+            return f"{(new - before) / before:+6.1%}"
+
+        print(f"{entry['scenario']:<10} {entry['format']:<5} {entry['rows']:>8} Zeilen: "
+              f"Dateien/s {change(entry['files_per_second'], previous['files_per_second'])}, "
+              f"p95 {change(entry['latency_seconds']['p95'], previous['latency_seconds']['p95'])}, "
+              f"RSS {change(entry['peak_rss_mb'], previous['peak_rss_mb'])}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='*', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--sizes', nargs='*', type=int, default=[1000, 10000, 100000],
+                        help="Zeilen pro Datei")
+    parser.add_argument('--formats', nargs='*', choices=('csv', 'xlsx'), default=['csv', 'xlsx'])
+    parser.add_argument('--max-excel-rows', type=int, default=20000,
+                        help="größere Excel-Dateien werden übersprungen (Erzeugung zu langsam)")
+    parser.add_argument('--files', type=int, default=8, help="Dateien pro Format und Größe")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake-Server: Sekunden bis zum ersten Token")
+    parser.add_argument('--tokens-per-second', type=float, default=200.0)
+    parser.add_argument('--response-tokens', type=int, default=100)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--backends', type=int, default=1, help="Anzahl Fake-Ollama-Hosts")
+    parser.add_argument('--parallel', type=int, default=1,
+                        help="gleichzeitige Generierungen je Host (wie OLLAMA_NUM_PARALLEL)")
+    parser.add_argument('--output', type=Path, help="Bericht als JSON speichern")
+    parser.add_argument('--baseline', type=Path, help="älteren Bericht zum Vergleich")
+    parser.add_argument('--run-scenario', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--data-dir', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scenario:
+        result = run_scenario(args.run_scenario, args.data_dir, args.base_url.split(','), args.workers)
+        print(json.dumps(result))
+        return 0
+
+    servers = [
+        FakeOllamaServer(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                         response_tokens=args.response_tokens, failure_rate=args.failure_rate,
+                         seed=index, parallel=args.parallel).start()
+        for index in range(max(1, args.backends))
+    ]
+    urls = [server.url for server in servers]
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='pipeline_bench_') as tmp:
+            for file_format in args.formats:
+                for rows in sorted(args.sizes):
+                    if file_format == 'xlsx' and rows > args.max_excel_rows:
+                        continue
+                    source_dir = Path(tmp) / f"{file_format}_{rows}"
+                    generate_files(source_dir, file_format, rows, args.files)
+                    for scenario in args.scenarios:
+                        # Jedes Szenario bekommt eine frische Kopie (watcher verschiebt Dateien)
+                        data_dir = Path(tmp) / f"{scenario}_{file_format}_{rows}"
+                        data_dir.mkdir()
+                        for path in source_dir.iterdir():
+                            os.link(path, data_dir / path.name)
+                        entry = run_isolated(scenario, data_dir, urls, args.workers)
+                        entry.update({'scenario': scenario, 'format': file_format, 'rows': rows})
+                        results.append(entry)
+                        print(f"{scenario:<10} {file_format:<5} {rows:>8} Zeilen: "
+                              f"{entry['files_per_second']:7.2f} Dateien/s, "
+                              f"p50 {entry['latency_seconds']['p50']:.3f}s, "
+                              f"p95 {entry['latency_seconds']['p95']:.3f}s, "
+                              f"RSS {entry['peak_rss_mb']} MB, {entry['failed']} Fehler")
+    finally:
+        for server in servers:
+            server.stop()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'settings': {
+            'workers': args.workers, 'files': args.files, 'latency': args.latency,
+            'backends': len(servers), 'parallel': args.parallel,
+            'tokens_per_second': args.tokens_per_second,
+            'response_tokens': args.response_tokens, 'failure_rate': args.failure_rate
+        },
+        'results': results
+    }
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
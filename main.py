@@ -1,50 +1,222 @@
 import os
 import json
+import argparse
 import time
+import threading
 from pathlib import Path
 import yaml
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from src.ollama_agent import OllamaAgent
+from src.dedup import DuplicateIndex
 from src.file_processor import FileProcessor
+from src.job_queue import JobQueue, QueueClosed
+from src.cache import ResponseCache
+from src.batch import BatchRunner
+from src.coalescer import EventCoalescer
+from src.manifest import FileManifest
+from src.metrics import MetricsExporter, MetricsRegistry
+from src.results_store import ResultStore
 
 class NewFileHandler(FileSystemEventHandler):
-    def __init__(self, processor: FileProcessor, output_dir: Path):
+    def __init__(self, processor: FileProcessor, output_dir: Path,
+                 manifest: FileManifest = None, results: ResultStore = None,
+                 write_files: bool = True):
         self.processor = processor
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-        self.processed_files = set()
+        # Verarbeitete Dateien, bleibt mit Pfad über Neustarts erhalten
+        self.manifest = manifest if manifest is not None else FileManifest()
+        # Ergebnisse aller Dateien, abfragbar nach Name, Hash und Zeit
+        self.results = results
+        # Zusätzlich eine empfehlungen_<name>.json pro Datei schreiben
+        self.write_files = write_files
+        self.job_queue = None
+        self.coalescer = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        # Während der Analyse erneut geänderte Dateien
+        self._changed = set()
+
+    def attach_queue(self, job_queue: JobQueue) -> None:
+        """Verarbeitet neue Dateien ab jetzt über die Job-Queue statt im Observer-Thread"""
+        self.job_queue = job_queue
+
+    def attach_coalescer(self, coalescer: EventCoalescer) -> None:
+        """Analysiert Dateien erst, wenn der Coalescer sie als fertig geschrieben freigibt"""
+        self.coalescer = coalescer
         
     def on_created(self, event):
         if event.is_directory:
             return
             
-        file_path = Path(event.src_path)
-        if file_path in self.processed_files:
+        self._schedule(Path(event.src_path), 'created')
+
+    def on_modified(self, event):
+        if event.is_directory:
+            return
+
+        self._schedule(Path(event.src_path), 'modified')
+
+    def on_moved(self, event):
+        if event.is_directory:
             return
+
+        if self.coalescer is not None:
+            self.coalescer.discard(Path(event.src_path))
+        self._schedule(Path(event.dest_path), 'moved')
+
+    def on_deleted(self, event):
+        if not event.is_directory and self.coalescer is not None:
+            self.coalescer.discard(Path(event.src_path))
+
+    def _schedule(self, file_path: Path, event: str) -> None:
+        if self.coalescer is None:
+            self.enqueue(file_path, event)
+        else:
+            # Events sammeln, bis die Datei fertig geschrieben ist
+            self.coalescer.touch(file_path, event)
+
+    _MESSAGES = {
+        'created': "Neue Datei erkannt",
+        'modified': "Geänderte Datei erkannt",
+        'moved': "Verschobene Datei erkannt",
+    }
+
+    def enqueue(self, file_path: Path, event: str) -> None:
+        """Reiht eine fertig geschriebene Datei zur Analyse ein"""
+        with self._lock:
+            if file_path in self._pending:
+                # Wird gerade analysiert: danach erneut prüfen
+                self._changed.add(file_path)
+                return
+            self._pending.add(file_path)
             
-        print(f"Neue Datei erkannt: {file_path}")
-        
+        print(f"{self._MESSAGES.get(event, 'Datei erkannt')}: {file_path}")
+
+        if self.job_queue is None:
+            self.handle_file(file_path)
+        else:
+            # Blockiert bei voller Queue (Backpressure auf den Observer)
+            try:
+                self.job_queue.submit(file_path)
+            except QueueClosed:
+                with self._lock:
+                    self._pending.discard(file_path)
+                print(f"Nicht mehr eingereiht (Programm wird beendet): {file_path}")
+
+    def handle_file(self, file_path: Path) -> dict:
+        """Analysiert eine Datei und speichert die Ergebnisse"""
+        results = None
         try:
+            # Unveränderte Dateien überspringen
+            fingerprint = self.manifest.check(file_path)
+            if fingerprint is None:
+                print(f"Unverändert, übersprungen: {file_path}")
+                return {'file_name': file_path.name, 'status': 'skipped'}
+
             # Datei verarbeiten
-            results = self.processor.process_file(file_path)
-            
-            # Empfehlungen als JSON speichern
-            recommendations_file = self.output_dir / f"empfehlungen_{file_path.stem}.json"
-            with open(recommendations_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
-                
-            # Pfade der erstellten Dateien anzeigen
-            txt_file = self.output_dir / f"analyse_{file_path.stem}.txt"
-            print(f"\nAnalyse gespeichert in:")
-            print(f"- Textanalyse: {txt_file}")
-            print(f"- Empfehlungen: {recommendations_file}")
-            self.processed_files.add(file_path)
-            
+            results = self.processor.process_file(file_path, content_hash=fingerprint['sha256'])
+
+            if results.get('status') == 'success':
+                def record_state():
+                    self.manifest.record(file_path, fingerprint, 'done')
+            else:
+                def record_state():
+                    self.manifest.record(file_path, fingerprint, 'failed', results.get('error'))
+
+            if self.results is not None:
+                # Erst als erledigt markieren, wenn das Ergebnis festgeschrieben ist;
+                # sonst ginge es bei einem Absturz verloren und die Datei gälte als fertig
+                self.results.append(results, file_path, fingerprint['sha256'],
+                                    on_committed=record_state)
+
+            if self.write_files:
+                # Empfehlungen als JSON speichern (Textanalyse steht in der .txt)
+                recommendations_file = self.output_dir / f"empfehlungen_{file_path.stem}.json"
+                with open(recommendations_file, 'w', encoding='utf-8') as f:
+                    json.dump({key: value for key, value in results.items() if key != 'textanalyse'},
+                              f, indent=2, ensure_ascii=False)
+
+                # Pfade der erstellten Dateien anzeigen
+                txt_file = self.output_dir / f"analyse_{file_path.stem}.txt"
+                print(f"\nAnalyse gespeichert in:")
+                print(f"- Textanalyse: {txt_file}")
+                print(f"- Empfehlungen: {recommendations_file}")
+            else:
+                print(f"Analyse von {file_path.name} gespeichert ({results.get('status', 'error')})")
+
+            if self.results is None:
+                record_state()
+
         except Exception as e:
             print(f"Fehler bei der Verarbeitung von {file_path}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(file_path)
+                changed = file_path in self._changed
+                self._changed.discard(file_path)
+            if changed:
+                # Unveränderte Inhalte überspringt das Manifest
+                self._schedule(file_path, 'modified')
+        return results
+
+def run_batch(handler: NewFileHandler, config: dict, directory: Path, num_workers: int) -> None:
+    """Analysiert alle vorhandenen Dateien eines Verzeichnisses und schreibt einen Bericht"""
+    from src.readers import supported_suffixes
+
+    file_types = [
+        suffix for suffix in config['analysis_settings']['file_types']
+        if suffix in supported_suffixes()
+    ]
+    runner = BatchRunner(handler.handle_file, file_types, num_workers=num_workers,
+                         cancel_event=handler.processor.cancel_event)
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
+    report_path = handler.output_dir / f"batch_report_{timestamp}.json"
+    report = runner.run(directory, report_path)
+
+    if report['interrupted']:
+        print(f"\nAbgebrochen, {report['not_started']} Dateien nicht gestartet")
+    print(f"\n{report['succeeded']} von {report['file_count']} Dateien erfolgreich, "
+          f"{report['skipped']} unverändert übersprungen, "
+          f"in {report['wall_seconds']:.1f}s ({report['files_per_minute']} Dateien/min)")
+    print(f"Bericht: {report_path}")
+
+def close_clients(agent: OllamaAgent, cache: ResponseCache) -> None:
+    """Gibt die Cache-Statistik aus und schließt Verbindungen"""
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['memory_hits'] + stats['disk_hits']} Treffer, "
+              f"{stats['misses']} Fehlgriffe (Trefferquote {stats['hit_rate']:.0%})")
+        cache.close()
+    prompt_cache = agent.prompt_cache_stats()
+    if prompt_cache['cached_tokens']:
+        print(f"KV-Cache: ca. {prompt_cache['cached_tokens']} Prompt-Tokens wiederverwendet, "
+              f"{prompt_cache['seconds_saved']:.1f}s Prompt-Auswertung gespart")
+    agent.close()
+
+def warm_up_model(agent: OllamaAgent) -> None:
+    """Lädt das Modell im Hintergrund, damit die erste Datei nicht auf das Laden wartet"""
+    def run():
+        for backend in agent.warm_up():
+            if backend['ok']:
+                print(f"Modell {agent.model} auf {backend['url']} geladen ({backend['seconds']:.1f}s)")
+            else:
+                print(f"Modell konnte auf {backend['url']} nicht geladen werden: {backend['error']}")
+    threading.Thread(target=run, name='warm-up', daemon=True).start()
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Analysiert Dateien mit einem lokalen Ollama-Modell")
+    parser.add_argument('--batch', metavar='DIR', type=Path,
+                        help="vorhandene Dateien in DIR analysieren statt das Verzeichnis zu überwachen")
+    parser.add_argument('--workers', type=int,
+                        help="Anzahl paralleler Analysen (Standard: performance.num_workers)")
+    return parser.parse_args(argv)
 
 def main():
+    args = parse_args()
+    batch_dir = args.batch.resolve() if args.batch else None
+
     # Aktuelles Verzeichnis zum Projektverzeichnis machen
     os.chdir(Path(__file__).parent)
     
@@ -53,11 +225,16 @@ def main():
         config = yaml.safe_load(f)
     
     # Ollama Agent initialisieren
-    agent = OllamaAgent(
-        model=config['model_settings']['model_name'],
-        base_url=config['model_settings']['base_url']
-    )
-    processor = FileProcessor(agent)
+    metrics = MetricsRegistry()
+    cache = ResponseCache.from_config(config)
+    agent = OllamaAgent.from_config(config, cache=cache, metrics=metrics)
+    if config.get('model_settings', {}).get('warm_up', True):
+        warm_up_model(agent)
+    dedup = DuplicateIndex.from_config(config)
+    processor = FileProcessor.from_config(agent, config, metrics=metrics, dedup=dedup)
+    exporter = MetricsExporter.from_config(metrics, config).start()
+    if exporter.url:
+        print(f"Metriken: {exporter.url}")
     
     # Verzeichnisse erstellen
     watch_dir = Path(config['watch_directory'])
@@ -66,13 +243,45 @@ def main():
     output_dir.mkdir(exist_ok=True)
     
     # Dateiwatcher einrichten
-    event_handler = NewFileHandler(processor, output_dir)
+    manifest = FileManifest.from_config(config)
+    result_store = ResultStore.from_config(config)
+    event_handler = NewFileHandler(processor, output_dir, manifest, result_store,
+                                   write_files=processor.write_report)
+    performance = config.get('performance', {})
+    num_workers = args.workers or performance.get('num_workers', 4)
+
+    if batch_dir is not None:
+        run_batch(event_handler, config, batch_dir, num_workers)
+        exporter.stop()
+        close_clients(agent, cache)
+        result_store.close()
+        manifest.close()
+        if dedup is not None:
+            dedup.close()
+        return
+
+    # Worker-Pool für die Analyse einrichten
+    job_queue = JobQueue(
+        event_handler.handle_file,
+        num_workers=num_workers,
+        max_queue_size=performance.get('max_queue_size', 100)
+    )
+    job_queue.start()
+    event_handler.attach_queue(job_queue)
+    metrics.register_gauge('job_queue_depth', job_queue.qsize)
+
+    # Events bündeln, Dateien erst nach abgeschlossenem Schreiben einreihen
+    coalescer = EventCoalescer.from_config(event_handler.enqueue, config, metrics).start()
+    event_handler.attach_coalescer(coalescer)
+    metrics.register_gauge('watch_pending_files', coalescer.pending_count)
+
     observer = Observer()
     observer.schedule(event_handler, watch_dir, recursive=False)
     observer.start()
     
     print(f"Überwache Verzeichnis: {watch_dir}")
     print(f"Ausgabeverzeichnis: {output_dir}")
+    print(f"Worker: {job_queue.num_workers}")
     print(f"Drücken Sie Ctrl+C zum Beenden")
     
     try:
@@ -83,5 +292,22 @@ def main():
         print("\nBeende Überwachung...")
     observer.join()
 
+    # Laufende Streams abbrechen, wartende Jobs verwerfen. Die Queue zuerst
+    # schließen: der Coalescer kann in submit auf einen freien Platz warten
+    print("Breche laufende Analysen ab...")
+    processor.cancel_event.set()
+    job_queue.shutdown(wait=False, cancel_pending=True)
+    coalescer.stop()
+    job_queue.shutdown(wait=True)
+    for worker in job_queue.stats():
+        print(f"- {worker['worker']}: {worker['jobs_done']} Dateien, "
+              f"{worker['jobs_failed']} Fehler, {worker['files_per_minute']} Dateien/min")
+    exporter.stop()
+    close_clients(agent, cache)
+    result_store.close()
+    manifest.close()
+    if dedup is not None:
+        dedup.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
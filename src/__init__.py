@@ -0,0 +1,38 @@
+"""
+AI File Analyzer: Dateianalyse mit lokalen LLMs über Ollama.
+
+Die öffentlichen Klassen werden erst beim ersten Zugriff importiert, damit
+`import src` keine schweren Abhängigkeiten (pandas, spaCy, langchain) lädt.
+"""
+import importlib
+
+_EXPORTS = {
+    'OllamaAgent': '.ollama_agent',
+    'FileProcessor': '.file_processor',
+    'DocumentAnalyzer': '.analyzer',
+    'CodeAnalyzer': '.analyzer',
+    'ResponseCache': '.cache',
+    'ResultStore': '.results_store',
+    'FileManifest': '.manifest',
+    'DuplicateIndex': '.dedup',
+    'JobQueue': '.job_queue',
+    'MetricsRegistry': '.metrics',
+    'BatchRunner': '.batch',
+    'StreamingStats': '.streaming_stats',
+    'RowSampler': '.sampling',
+    'FileUtils': '.utils',
+    'TextPreprocessor': '.utils',
+    'DataFrameAnalyzer': '.utils',
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,62 +1,181 @@
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import yaml
-from langchain.llms import Ollama
-from langchain.prompts import PromptTemplate
-from .prompts import ANALYSIS_PROMPT, CODE_REVIEW_PROMPT
+from .prompts import ANALYSIS_PROMPT, CODE_REVIEW_PROMPT, SUMMARIZATION_PROMPT, UNIT_REVIEW_PROMPT
+from .chunking import DEFAULT_ENCODING, count_tokens, map_reduce_summaries, split_into_chunks
+from .cache import ResponseCache
+
+def _prompt_template(template: str, input_variables: List[str]):
+    """Erstellt ein langchain-PromptTemplate, langchain wird erst hier importiert"""
+    from langchain.prompts import PromptTemplate
+
+    return PromptTemplate(template=template, input_variables=input_variables)
 
 class BaseAnalyzer:
     """Basisklasse für verschiedene Analysetypen"""
     
-    def __init__(self, model: str = "mistral", config_path: Optional[str] = None):
+    def __init__(self, model: str = "mistral", config_path: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None):
         """
         Initialisiert den Analyzer.
         
         Args:
             model: Name des Ollama-Modells
             config_path: Pfad zur Konfigurationsdatei
+            cache: Optionaler Antwort-Cache, sonst aus dem Abschnitt `cache` der Konfiguration
         """
+        from langchain.llms import Ollama
+
         self.model = Ollama(model=model)
         self.config = self._load_config(config_path) if config_path else {}
+        self.cache = cache if cache is not None else ResponseCache.from_config(self.config)
         
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Lädt die Konfigurationsdatei"""
         with open(config_path, 'r', encoding='utf-8') as file:
             return yaml.safe_load(file)
 
+    def _invoke(self, prompt: str) -> str:
+        """Ruft das Modell auf und nutzt dabei den Cache, falls vorhanden"""
+        if self.cache is None:
+            return self.model(prompt)
+        options = {'temperature': getattr(self.model, 'temperature', None)}
+        return self.cache.get_or_compute(
+            self.model.model, prompt, lambda: self.model(prompt), options
+        )
+
 class DocumentAnalyzer(BaseAnalyzer):
     """Analyzer für Textdokumente"""
+
+    def __init__(self, model: str = "mistral", config_path: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None):
+        """
+        Initialisiert den Analyzer.
+
+        Die Map-Reduce-Parameter werden aus dem Abschnitt `document_analysis`
+        der Konfiguration gelesen.
+
+        Args:
+            model: Name des Ollama-Modells
+            config_path: Pfad zur Konfigurationsdatei
+            cache: Optionaler Antwort-Cache
+        """
+        super().__init__(model=model, config_path=config_path, cache=cache)
+        settings = self.config.get('document_analysis', {})
+        self.map_reduce_threshold = settings.get('map_reduce_threshold', 3000)
+        self.chunk_tokens = settings.get('chunk_tokens', 2000)
+        self.chunk_overlap = settings.get('chunk_overlap', 200)
+        self.max_parallel = settings.get('max_parallel', 4)
+        self.max_reduce_levels = settings.get('max_reduce_levels', 4)
+        self.encoding_name = settings.get('encoding', DEFAULT_ENCODING)
     
-    def analyze_file(self, file_path: str) -> Dict[str, str]:
+    def analyze_file(self, file_path: str, map_reduce: Optional[bool] = None) -> Dict[str, Any]:
         """
         Analysiert eine Textdatei mit dem LLM.
         
         Args:
             file_path: Pfad zur Textdatei
+            map_reduce: Map-Reduce erzwingen (True) oder verbieten (False),
+                        None entscheidet anhand von `map_reduce_threshold`
             
         Returns:
             Dict mit Analyseergebnissen
         """
         # Datei einlesen
         content = Path(file_path).read_text(encoding='utf-8')
+
+        if map_reduce is None:
+            map_reduce = count_tokens(content, self.encoding_name) > self.map_reduce_threshold
+
+        chunk_count = 1
+        if map_reduce:
+            # Chunks parallel zusammenfassen und die Zusammenfassungen verdichten
+            chunks = split_into_chunks(content, self.chunk_tokens, self.chunk_overlap,
+                                       self.encoding_name)
+            chunk_count = len(chunks)
+            prompt = _prompt_template(template=SUMMARIZATION_PROMPT, input_variables=["text"])
+            content = map_reduce_summaries(
+                chunks, lambda text: self._invoke(prompt.format(text=text)), self.chunk_tokens,
+                self.max_parallel, self.max_reduce_levels, self.encoding_name
+            )
         
         # Prompt vorbereiten
-        prompt = PromptTemplate(
+        prompt = _prompt_template(
             template=ANALYSIS_PROMPT,
             input_variables=["content"]
         )
         
         # Analyse durchführen
-        result = self.model(prompt.format(content=content))
+        result = self._invoke(prompt.format(content=content))
         
         return {
             "summary": result,
             "file_path": file_path,
-            "model_used": self.model.model
+            "model_used": self.model.model,
+            "mode": "map_reduce" if map_reduce else "single",
+            "chunk_count": chunk_count
         }
 
 class CodeAnalyzer(BaseAnalyzer):
     """Analyzer für Code-Review"""
+
+    def __init__(self, model: str = "mistral", config_path: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None):
+        """
+        Initialisiert den Analyzer.
+
+        Die Parameter des Repository-Reviews werden aus dem Abschnitt
+        `code_review` der Konfiguration gelesen.
+
+        Args:
+            model: Name des Ollama-Modells
+            config_path: Pfad zur Konfigurationsdatei
+            cache: Optionaler Antwort-Cache
+        """
+        super().__init__(model=model, config_path=config_path, cache=cache)
+        settings = self.config.get('code_review', {})
+        self.max_parallel = settings.get('max_parallel', 4)
+        self.index_path = settings.get('index_path', './cache/code_review.sqlite')
+        self.file_patterns = settings.get('file_patterns', ['*.py'])
+        self.exclude_dirs = settings.get('exclude_dirs')
+
+    def review_repository(self, root: str, output_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Reviewt ein Repository inkrementell auf Ebene von Funktionen und Klassen.
+
+        Nur Einheiten, die seit dem letzten Lauf neu sind oder sich geändert
+        haben, gehen (parallel) an das Modell; die übrigen Reviews kommen aus
+        dem Index unter `code_review.index_path`.
+
+        Args:
+            root: Wurzelverzeichnis des Repositories
+            output_dir: Verzeichnis für die Berichte je Datei (`<pfad>.review.md`)
+
+        Returns:
+            Dict mit den Berichten je Datei und Zählern für reviewte und übernommene Einheiten
+        """
+        from .code_review import DEFAULT_EXCLUDE_DIRS, RepositoryReviewer, ReviewIndex
+
+        prompt = _prompt_template(
+            template=UNIT_REVIEW_PROMPT,
+            input_variables=["file_path", "kind", "name", "code"]
+        )
+
+        def review_unit(file_path: str, unit: Dict[str, Any]) -> str:
+            return self._invoke(prompt.format(file_path=file_path, kind=unit['kind'],
+                                              name=unit['name'], code=unit['code']))
+
+        index = ReviewIndex(self.index_path)
+        try:
+            reviewer = RepositoryReviewer(
+                review_unit, index, self.model.model, max_parallel=self.max_parallel,
+                patterns=self.file_patterns, exclude_dirs=self.exclude_dirs or DEFAULT_EXCLUDE_DIRS
+            )
+            result = reviewer.review(root, output_dir)
+        finally:
+            index.close()
+        result['model_used'] = self.model.model
+        return result
     
     def review_code(self, file_path: str) -> Dict[str, Any]:
         """
@@ -72,13 +191,13 @@ class CodeAnalyzer(BaseAnalyzer):
         code = Path(file_path).read_text(encoding='utf-8')
         
         # Prompt vorbereiten
-        prompt = PromptTemplate(
+        prompt = _prompt_template(
             template=CODE_REVIEW_PROMPT,
             input_variables=["code"]
         )
         
         # Review durchführen
-        result = self.model(prompt.format(code=code))
+        result = self._invoke(prompt.format(code=code))
         
         return {
             "suggestions": result,
@@ -110,4 +229,4 @@ class CodeAnalyzer(BaseAnalyzer):
         4. Potenzielle Bugs
         """
         
-        return self.model(prompt.format(code=code_snippet))
\ No newline at end of file
+        return self._invoke(prompt.format(code=code_snippet))
\ No newline at end of file
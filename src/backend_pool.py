@@ -0,0 +1,203 @@
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+    from .metrics import MetricsRegistry
+
+class NoBackendAvailable(RuntimeError):
+    """Kein gesundes Ollama-Backend mit freier Kapazität verfügbar"""
+
+class Backend:
+    """Zustand eines einzelnen Ollama-Hosts"""
+
+    def __init__(self, url: str, max_concurrency: int):
+        self.url = url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests_total = 0
+        self.failures_total = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'max_concurrency': self.max_concurrency,
+            'requests_total': self.requests_total,
+            'failures_total': self.failures_total
+        }
+
+def backoff_delay(attempt: int, base: float = 0.5, maximum: float = 10.0) -> float:
+    """Exponentielles Backoff mit vollem Jitter: gleichverteilt in [0, min(maximum, base * 2^attempt)]"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+class BackendPool:
+    """
+    Verteilt Anfragen auf mehrere Ollama-Hosts.
+
+    Gewählt wird das gesunde Backend mit den wenigsten laufenden Anfragen
+    (least outstanding requests), jedes Backend hat eine eigene Obergrenze.
+    Backends mit wiederholten Fehlern werden aus der Rotation genommen und per
+    Health-Check (GET /api/tags) wieder aufgenommen.
+    """
+
+    def __init__(self, urls: Union[str, Iterable[str]], session: 'requests.Session',
+                 max_concurrency: int = 4, failure_threshold: int = 3,
+                 health_check_interval: Optional[float] = 15.0, health_timeout: float = 2.0,
+                 metrics: Optional['MetricsRegistry'] = None):
+        """
+        Initialisiert den Pool.
+
+        Args:
+            urls: Basis-URL oder Liste von Basis-URLs der Ollama-Hosts
+            session: HTTP-Session für die Health-Checks
+            max_concurrency: Maximale gleichzeitige Anfragen pro Backend
+            failure_threshold: Aufeinanderfolgende Fehler, nach denen ein Backend
+                aus der Rotation genommen wird
+            health_check_interval: Sekunden zwischen zwei Health-Checks im
+                Hintergrund, None prüft nur bei Bedarf
+            health_timeout: Timeout eines Health-Checks in Sekunden
+            metrics: Registry für laufende Anfragen und Zustand je Backend
+        """
+        if isinstance(urls, str):
+            urls = [urls]
+        self.backends: List[Backend] = [Backend(url, max(1, int(max_concurrency))) for url in urls]
+        if not self.backends:
+            raise ValueError("Mindestens eine Backend-URL erforderlich")
+        self.session = session
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.health_check_interval = health_check_interval
+        self.health_timeout = health_timeout
+        self.metrics = metrics
+
+        self._condition = threading.Condition()
+        self._last_check = 0.0
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+
+    @property
+    def urls(self) -> List[str]:
+        return [backend.url for backend in self.backends]
+
+    def _publish(self, backend: Backend) -> None:
+        if self.metrics is not None:
+            labels = {'backend': backend.url}
+            self.metrics.set('backend_outstanding', backend.outstanding, labels)
+            self.metrics.set('backend_healthy', 1 if backend.healthy else 0, labels)
+
+    def _pick(self, exclude: Set[str]) -> Optional[Backend]:
+        # Aufrufer hält self._condition
+        candidates = [b for b in self.backends if b.healthy and b.outstanding < b.max_concurrency]
+        # Bei Wiederholungen zuerst Backends, die diese Anfrage noch nicht hatten
+        untried = [b for b in candidates if b.url not in exclude]
+        candidates = untried or candidates
+        if not candidates:
+            return None
+        fewest = min(b.outstanding for b in candidates)
+        return random.choice([b for b in candidates if b.outstanding == fewest])
+
+    def try_acquire(self, exclude: Optional[Set[str]] = None) -> Optional[Backend]:
+        """Reserviert sofort einen Platz, None wenn alle gesunden Backends ausgelastet sind"""
+        for attempt in range(2):
+            with self._condition:
+                backend = self._pick(exclude or set())
+                if backend is not None:
+                    backend.outstanding += 1
+                    backend.requests_total += 1
+                    self._publish(backend)
+                    return backend
+                if any(b.healthy for b in self.backends):
+                    return None
+            if attempt == 0:
+                # Alle Backends gelten als ausgefallen: sofort (gedrosselt) neu prüfen
+                self.check_health(min_interval=1.0)
+        raise NoBackendAvailable("Kein Ollama-Backend erreichbar: " + ', '.join(self.urls))
+
+    def acquire(self, exclude: Optional[Set[str]] = None,
+                timeout: Optional[float] = None) -> Backend:
+        """
+        Reserviert einen Platz auf dem am wenigsten ausgelasteten gesunden Backend.
+
+        Blockiert, solange alle gesunden Backends ihre Obergrenze erreicht haben.
+
+        Raises:
+            NoBackendAvailable: Kein gesundes Backend oder Timeout abgelaufen
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            backend = self.try_acquire(exclude)
+            if backend is not None:
+                return backend
+            with self._condition:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise NoBackendAvailable("Zeitüberschreitung beim Warten auf ein freies Backend")
+                # Kurz begrenzt, damit wiederbelebte Backends bemerkt werden
+                self._condition.wait(min(remaining, 1.0) if remaining is not None else 1.0)
+
+    def release(self, backend: Backend, failed: bool = False) -> None:
+        """Gibt den Platz frei; `failed` zählt einen Verbindungs- oder Serverfehler"""
+        with self._condition:
+            backend.outstanding -= 1
+            if failed:
+                backend.failures_total += 1
+                backend.consecutive_failures += 1
+                if backend.healthy and backend.consecutive_failures >= self.failure_threshold:
+                    backend.healthy = False
+                    print(f"Ollama-Backend {backend.url} aus der Rotation genommen")
+            else:
+                backend.consecutive_failures = 0
+            self._publish(backend)
+            self._condition.notify_all()
+
+    def check_health(self, min_interval: float = 0.0) -> None:
+        """Prüft alle Backends per GET /api/tags (höchstens alle `min_interval` Sekunden)"""
+        now = time.monotonic()
+        if now - self._last_check < min_interval:
+            return
+        self._last_check = now
+
+        for backend in self.backends:
+            try:
+                response = self.session.get(f"{backend.url}/api/tags", timeout=self.health_timeout)
+                healthy = response.status_code == 200
+            except Exception:
+                healthy = False
+            with self._condition:
+                if healthy and not backend.healthy:
+                    print(f"Ollama-Backend {backend.url} wieder erreichbar")
+                    backend.consecutive_failures = 0
+                elif not healthy and backend.healthy:
+                    print(f"Ollama-Backend {backend.url} nicht erreichbar")
+                backend.healthy = healthy
+                self._publish(backend)
+                self._condition.notify_all()
+
+    def start_health_checks(self) -> None:
+        """Startet die periodischen Health-Checks im Hintergrund"""
+        if self.health_check_interval is None or self._checker is not None:
+            return
+        self._checker = threading.Thread(target=self._check_periodically,
+                                         name='backend-health', daemon=True)
+        self._checker.start()
+
+    def _check_periodically(self) -> None:
+        while not self._stop.wait(self.health_check_interval):
+            self.check_health()
+
+    def stop(self) -> None:
+        """Beendet die Health-Checks"""
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join()
+            self._checker = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Zustand und Zähler aller Backends"""
+        with self._condition:
+            return [backend.to_dict() for backend in self.backends]
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+class BatchRunner:
+    """Verarbeitet einen vorhandenen Dateibestand parallel (Backfill)"""
+
+    def __init__(self, handle_file: Callable[[Path], Optional[Dict[str, Any]]],
+                 file_types: Iterable[str], num_workers: int = 4,
+                 cancel_event: Optional[threading.Event] = None):
+        """
+        Initialisiert den Runner.
+
+        Args:
+            handle_file: Verarbeitet eine Datei und liefert das Ergebnis-Dict
+            file_types: Zu verarbeitende Dateiendungen, z.B. ['.csv', '.xlsx']
+            num_workers: Anzahl paralleler Analysen
+            cancel_event: Wird bei Strg+C gesetzt, um laufende Analysen abzubrechen
+                (z.B. `FileProcessor.cancel_event`)
+        """
+        self.handle_file = handle_file
+        self.file_types = {suffix.lower() for suffix in file_types}
+        self.num_workers = max(1, int(num_workers))
+        self.cancel_event = cancel_event
+
+    def find_files(self, directory: Union[str, Path]) -> List[Path]:
+        """Listet alle unterstützten Dateien des Verzeichnisses, kleinste zuerst"""
+        files = [
+            path for path in Path(directory).iterdir()
+            if path.is_file() and path.suffix.lower() in self.file_types
+        ]
+        return sorted(files, key=lambda path: path.stat().st_size)
+
+    def _run_one(self, file_path: Path) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            results = self.handle_file(file_path) or {}
+            status = results.get('status', 'error')
+            error = results.get('error')
+        except Exception as e:
+            status, error = 'error', str(e)
+        entry = {
+            'file_name': file_path.name,
+            'status': status,
+            'latency_seconds': round(time.perf_counter() - start, 3)
+        }
+        if error:
+            entry['error'] = error
+        return entry
+
+    def run(self, directory: Union[str, Path],
+            report_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+        """
+        Analysiert alle Dateien eines Verzeichnisses.
+
+        Bei Strg+C werden wartende Dateien verworfen und laufende Analysen über
+        `cancel_event` abgebrochen; der Bericht wird trotzdem geschrieben und
+        ist mit `interrupted` markiert.
+
+        Args:
+            directory: Zu verarbeitendes Verzeichnis
+            report_path: Pfad für den JSON-Abschlussbericht (optional)
+
+        Returns:
+            Dict mit Latenz pro Datei und Gesamtdurchsatz
+        """
+        files = self.find_files(directory)
+        total = len(files)
+        print(f"{total} Dateien in {directory} gefunden, {self.num_workers} Worker")
+
+        entries = []
+        futures = {}
+        interrupted = False
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        try:
+            futures = {executor.submit(self._run_one, path): path for path in files}
+            for done, future in enumerate(as_completed(futures), start=1):
+                entry = future.result()
+                entries.append(entry)
+
+                elapsed = time.perf_counter() - start
+                eta = elapsed / done * (total - done)
+                print(f"[{done}/{total}] {entry['file_name']}: {entry['status']} "
+                      f"({entry['latency_seconds']:.1f}s) - verstrichen {_format_duration(elapsed)}, "
+                      f"ETA {_format_duration(eta)}")
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\nAbbruch: wartende Dateien werden verworfen, laufende Analysen beendet")
+            if self.cancel_event is not None:
+                self.cancel_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            # Dateien, die noch fertig wurden, und nicht mehr gestartete nachtragen
+            reported = {entry['file_name'] for entry in entries}
+            for future, path in futures.items():
+                if path.name in reported:
+                    continue
+                if future.cancelled():
+                    entries.append({'file_name': path.name, 'status': 'not_started', 'latency_seconds': 0.0})
+                    continue
+                try:
+                    entries.append(future.result())
+                except BaseException as e:
+                    entries.append({'file_name': path.name, 'status': 'cancelled',
+                                    'latency_seconds': 0.0, 'error': str(e) or type(e).__name__})
+        finally:
+            executor.shutdown(wait=True)
+
+        wall_seconds = time.perf_counter() - start
+        finished = [entry for entry in entries if entry['status'] != 'not_started']
+        latencies = sorted(entry['latency_seconds'] for entry in finished)
+        report = {
+            'directory': str(directory),
+            'interrupted': interrupted,
+            'file_count': total,
+            'succeeded': sum(1 for entry in entries if entry['status'] == 'success'),
+            'skipped': sum(1 for entry in entries if entry['status'] == 'skipped'),
+            'failed': sum(1 for entry in finished if entry['status'] not in ('success', 'skipped')),
+            'not_started': len(entries) - len(finished),
+            'wall_seconds': round(wall_seconds, 3),
+            'files_per_minute': round(len(finished) / wall_seconds * 60, 2) if wall_seconds > 0 else 0.0,
+            'latency_seconds': {
+                'min': latencies[0] if latencies else 0.0,
+                'median': latencies[len(latencies) // 2] if latencies else 0.0,
+                'max': latencies[-1] if latencies else 0.0
+            },
+            'files': sorted(entries, key=lambda entry: entry['file_name'])
+        }
+
+        if report_path is not None:
+            report_path = Path(report_path)
+            report_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+
+        return report
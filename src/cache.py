@@ -0,0 +1,203 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+class ResponseCache:
+    """Zweistufiger Cache für LLM-Antworten (LRU im Speicher, SQLite auf der Platte)"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None,
+                 max_memory_entries: int = 256,
+                 max_disk_entries: int = 10000,
+                 max_disk_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        """
+        Initialisiert den Cache.
+
+        Args:
+            path: Pfad zur SQLite-Datei, ohne Pfad wird nur im Speicher gecacht
+            max_memory_entries: Größe der LRU-Stufe im Speicher
+            max_disk_entries: Maximale Anzahl Einträge auf der Platte
+            max_disk_bytes: Maximale Gesamtgröße der Antworten auf der Platte
+            ttl_seconds: Lebensdauer eines Eintrags, None für unbegrenzt
+        """
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        self._db = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+            self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ResponseCache']:
+        """Erstellt den Cache aus dem Abschnitt `cache`, None wenn deaktiviert"""
+        settings = config.get('cache', {})
+        if not settings.get('enabled', False):
+            return None
+        max_disk_mb = settings.get('max_disk_mb')
+        ttl_hours = settings.get('ttl_hours')
+        return cls(
+            path=settings.get('path'),
+            max_memory_entries=settings.get('max_memory_entries', 256),
+            max_disk_entries=settings.get('max_disk_entries', 10000),
+            max_disk_bytes=int(max_disk_mb * 1024 * 1024) if max_disk_mb else None,
+            ttl_seconds=ttl_hours * 3600 if ttl_hours else None
+        )
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Erzeugt den inhaltsbasierten Schlüssel aus Modell, Optionen und Prompt"""
+        material = json.dumps(
+            {'model': model, 'options': options or {}, 'prompt': prompt},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Liefert die gecachte Antwort oder None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created, now):
+                        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created)
+                        self._counters['disk_hits'] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Speichert eine Antwort in beiden Stufen"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode('utf-8')), now, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        """`get` für Coroutinen: SQLite-Zugriff und Lock im Thread, nicht im Event-Loop"""
+        import asyncio  # nicht beim Import laden, siehe benchmarks/import_budgets.yaml
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str) -> None:
+        """`set` für Coroutinen, der Commit blockiert keine anderen Streams"""
+        import asyncio
+        await asyncio.to_thread(self.set, key, value)
+
+    def get_or_compute(self, model: str, prompt: str, compute: Callable[[], str],
+                       options: Optional[Dict[str, Any]] = None) -> str:
+        """Liefert die gecachte Antwort oder berechnet und speichert sie"""
+        key = self.make_key(model, prompt, options)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def _remember(self, key: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            cursor = self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+            )
+            self._counters['evictions'] += cursor.rowcount
+
+        count, total = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        # Am längsten nicht genutzte Einträge zuerst entfernen
+        while count > self.max_disk_entries or (
+                self.max_disk_bytes is not None and total > self.max_disk_bytes and count > 1):
+            key, size = self._db.execute(
+                "SELECT key, size FROM responses ORDER BY accessed ASC LIMIT 1"
+            ).fetchone()
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            count -= 1
+            total -= size
+            self._counters['evictions'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Trefferquote und Größen der Cache-Stufen zurück"""
+        with self._lock:
+            counters = dict(self._counters)
+            counters['memory_entries'] = len(self._memory)
+            counters['disk_entries'] = (
+                self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if self._db is not None else 0
+            )
+        lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+        counters['hit_rate'] = round((lookups - counters['misses']) / lookups, 3) if lookups else 0.0
+        return counters
+
+    def clear(self) -> None:
+        """Leert beide Cache-Stufen"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        """Schließt die Datenbankverbindung"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,144 @@
+"""
+Token-basierte Aufteilung von Texten für Prompts mit begrenztem Kontextfenster.
+
+Lässt sich das tiktoken-Encoding nicht laden (es wird beim ersten Mal aus dem
+Netz geholt), wird mit etwa 4 Zeichen pro Token gerechnet, statt bei jedem
+Aufruf erneut zu scheitern.
+"""
+import threading
+import warnings
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN = 4
+
+_encodings: Dict[str, object] = {}
+_unavailable: Dict[str, str] = {}
+_counters: Dict[str, Callable[[str], int]] = {}
+_lock = threading.Lock()
+
+def get_encoding(name: str = DEFAULT_ENCODING):
+    """Lädt ein tiktoken-Encoding einmalig und teilt es zwischen allen Aufrufern"""
+    with _lock:
+        if name not in _encodings:
+            import tiktoken
+            _encodings[name] = tiktoken.get_encoding(name)
+        return _encodings[name]
+
+def _encoding_or_none(name: str):
+    """Das Encoding oder None, wenn es nicht geladen werden kann (nur einmal versucht)"""
+    with _lock:
+        if name in _unavailable:
+            return None
+    try:
+        return get_encoding(name)
+    except Exception as e:
+        with _lock:
+            first = name not in _unavailable
+            _unavailable[name] = str(e)
+        if first:
+            warnings.warn(f"tiktoken-Encoding {name} nicht verfügbar, Tokens werden geschätzt: {e}")
+        return None
+
+def token_counter(encoding_name: str = DEFAULT_ENCODING) -> Callable[[str], int]:
+    """Gibt eine Zählfunktion für Tokens zurück (ohne Encoding geschätzt)"""
+    with _lock:
+        if encoding_name in _counters:
+            return _counters[encoding_name]
+    encoding = _encoding_or_none(encoding_name)
+    if encoding is not None:
+        counter = lambda text: len(encoding.encode(text, disallowed_special=()))
+    else:
+        counter = lambda text: (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    with _lock:
+        return _counters.setdefault(encoding_name, counter)
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Zählt die Tokens eines Textes"""
+    return token_counter(encoding_name)(text)
+
+def split_into_chunks(text: str, max_tokens: int = 2000, overlap: int = 200,
+                      encoding_name: str = DEFAULT_ENCODING) -> List[str]:
+    """
+    Teilt einen Text in Chunks mit höchstens `max_tokens` Tokens.
+
+    Args:
+        text: Der aufzuteilende Text
+        max_tokens: Token-Budget pro Chunk
+        overlap: Anzahl Tokens, die sich aufeinanderfolgende Chunks teilen
+        encoding_name: Name des tiktoken-Encodings
+
+    Returns:
+        Liste der Chunks in Textreihenfolge
+    """
+    if overlap >= max_tokens:
+        raise ValueError("overlap muss kleiner als max_tokens sein")
+
+    encoding: Optional[object] = _encoding_or_none(encoding_name)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        decode = encoding.decode
+    else:
+        # Ohne Encoding nach Zeichen teilen, Budget und Überlappung umgerechnet
+        tokens = text
+        max_tokens, overlap = max_tokens * CHARS_PER_TOKEN, overlap * CHARS_PER_TOKEN
+        decode = lambda part: part
+    if len(tokens) <= max_tokens:
+        return [text] if text else []
+
+    step = max_tokens - overlap
+    chunks = []
+    for start in range(0, len(tokens), step):
+        chunks.append(decode(tokens[start:start + max_tokens]))
+        if start + max_tokens >= len(tokens):
+            break
+    return chunks
+
+def pack_texts(texts: List[str], max_tokens: int, separator: str = "\n\n",
+               encoding_name: str = DEFAULT_ENCODING) -> List[str]:
+    """Fasst aufeinanderfolgende Texte zu Gruppen zusammen, die ins Token-Budget passen"""
+    separator_tokens = count_tokens(separator, encoding_name)
+    groups, current, current_tokens = [], [], 0
+
+    for text in texts:
+        tokens = count_tokens(text, encoding_name)
+        if current and current_tokens + separator_tokens + tokens > max_tokens:
+            groups.append(separator.join(current))
+            current, current_tokens = [], 0
+        if current:
+            current_tokens += separator_tokens
+        current.append(text)
+        current_tokens += tokens
+
+    if current:
+        groups.append(separator.join(current))
+    return groups
+
+def map_reduce_summaries(texts: List[str], summarize: Callable[[str], str], max_tokens: int,
+               max_parallel: int = 4, max_reduce_levels: int = 4,
+               encoding_name: str = DEFAULT_ENCODING) -> str:
+    """
+    Fasst Texte parallel zusammen und verdichtet die Zusammenfassungen hierarchisch.
+
+    Args:
+        texts: Chunks in Textreihenfolge
+        summarize: Fasst einen Text zusammen (z.B. ein LLM-Aufruf)
+        max_tokens: Token-Budget des Ergebnisses
+        max_parallel: Gleichzeitige Aufrufe von `summarize`
+        max_reduce_levels: Höchstzahl der Verdichtungsstufen nach der ersten Zusammenfassung
+        encoding_name: Name des tiktoken-Encodings
+
+    Returns:
+        Die verdichtete Zusammenfassung; passt sie nach `max_reduce_levels`
+        Stufen noch nicht ins Budget, die aneinandergehängten Zusammenfassungen
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max(1, int(max_parallel))) as executor:
+        summaries = list(executor.map(summarize, texts))
+        for _ in range(max_reduce_levels):
+            groups = pack_texts(summaries, max_tokens, encoding_name=encoding_name)
+            if len(groups) == 1:
+                return groups[0]
+            summaries = list(executor.map(summarize, groups))
+    return "\n\n".join(summaries)
@@ -0,0 +1,186 @@
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .metrics import MetricsRegistry
+
+class _PendingFile:
+    """Zustand einer Datei zwischen erstem Event und Freigabe"""
+
+    __slots__ = ('first_event', 'last_event_at', 'signature', 'stable_since', 'events')
+
+    def __init__(self, event: str, now: float):
+        self.first_event = event
+        self.last_event_at = now
+        self.signature: Optional[Tuple[int, int]] = None
+        self.stable_since = now
+        self.events = 1
+
+class EventCoalescer:
+    """
+    Fasst Dateisystem-Events pro Pfad zusammen und gibt eine Datei erst frei,
+    wenn sie fertig geschrieben ist.
+
+    Created-, Modified- und Moved-Events derselben Datei ergeben eine einzige
+    Freigabe. Fertig ist eine Datei, wenn Größe und mtime seit `stability_seconds`
+    unverändert sind und kein Event mehr kam, oder sofort, wenn eine
+    Sentinel-Datei (`<datei><sentinel_suffix>`) existiert. Solange eine
+    Lock-Datei (`<datei><lock_suffix>`) existiert, wird gewartet.
+    """
+
+    def __init__(self, callback: Callable[[Path, str], Any], stability_seconds: float = 2.0,
+                 poll_interval: float = 0.5, lock_suffix: Optional[str] = '.lock',
+                 sentinel_suffix: Optional[str] = None,
+                 ignore_suffixes: Iterable[str] = ('.part', '.tmp', '.crdownload'),
+                 metrics: Optional['MetricsRegistry'] = None):
+        """
+        Initialisiert den Coalescer.
+
+        Args:
+            callback: Wird je freigegebener Datei mit Pfad und erstem Event-Typ aufgerufen
+            stability_seconds: Sekunden ohne Änderung von Größe, mtime und ohne Event
+            poll_interval: Sekunden zwischen zwei Prüfungen der wartenden Dateien
+            lock_suffix: Endung der Lock-Datei, die die Freigabe zurückhält
+            sentinel_suffix: Endung der Sentinel-Datei, die sofort freigibt
+            ignore_suffixes: Endungen temporärer Dateien (z.B. unfertige Downloads)
+            metrics: Registry für Events und wartende Dateien
+        """
+        self.callback = callback
+        self.stability_seconds = stability_seconds
+        self.poll_interval = poll_interval
+        self.lock_suffix = lock_suffix
+        self.sentinel_suffix = sentinel_suffix
+        self.ignore_suffixes = tuple(suffix.lower() for suffix in ignore_suffixes)
+        self.metrics = metrics
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Path, _PendingFile] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, callback: Callable[[Path, str], Any], config: Dict[str, Any],
+                    metrics: Optional['MetricsRegistry'] = None) -> 'EventCoalescer':
+        """Erstellt den Coalescer aus dem Abschnitt `watcher` der settings.yaml"""
+        settings = config.get('watcher') or {}
+        return cls(
+            callback,
+            stability_seconds=settings.get('stability_seconds', 2.0),
+            poll_interval=settings.get('poll_interval_seconds', 0.5),
+            lock_suffix=settings.get('lock_suffix', '.lock'),
+            sentinel_suffix=settings.get('sentinel_suffix'),
+            ignore_suffixes=settings.get('ignore_suffixes', ('.part', '.tmp', '.crdownload')),
+            metrics=metrics
+        )
+
+    def _target(self, path: Path) -> Optional[Path]:
+        """Datei, auf die sich ein Event bezieht; None für ignorierte Dateien"""
+        name = path.name
+        for suffix in (self.lock_suffix, self.sentinel_suffix):
+            # Events auf Lock- und Sentinel-Dateien betreffen die eigentliche Datei
+            if suffix and name.endswith(suffix) and len(name) > len(suffix):
+                return path.with_name(name[:-len(suffix)])
+        if name.lower().endswith(self.ignore_suffixes):
+            return None
+        return path
+
+    def _companion(self, path: Path, suffix: Optional[str]) -> Optional[Path]:
+        return path.with_name(path.name + suffix) if suffix else None
+
+    def touch(self, path: Union[str, Path], event: str = 'modified') -> None:
+        """Meldet ein Event für `path`; jedes Event verlängert die Wartezeit"""
+        target = self._target(Path(path))
+        if target is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(target)
+            if entry is None:
+                self._pending[target] = _PendingFile(event, now)
+            else:
+                entry.events += 1
+                entry.last_event_at = now
+        if self.metrics is not None:
+            self.metrics.inc('watch_events_total', labels={'event': event})
+
+    def discard(self, path: Union[str, Path]) -> None:
+        """Vergisst eine wartende Datei (z.B. gelöscht oder wegbewegt)"""
+        path = Path(path)
+        if self._target(path) != path:
+            # Lock- oder Sentinel-Datei entfernt: die Datei selbst wartet weiter
+            self.touch(path, 'modified')
+            return
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def pending_count(self) -> int:
+        """Anzahl der Dateien, die noch nicht stabil sind"""
+        with self._lock:
+            return len(self._pending)
+
+    def _is_ready(self, path: Path, entry: _PendingFile, now: float) -> Optional[bool]:
+        """True: freigeben, False: weiter warten, None: Datei existiert nicht mehr"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        lock_file = self._companion(path, self.lock_suffix)
+        if lock_file is not None and lock_file.exists():
+            entry.stable_since = now
+            return False
+        sentinel = self._companion(path, self.sentinel_suffix)
+        if sentinel is not None and sentinel.exists():
+            return True
+
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature != entry.signature:
+            # Datei wird noch geschrieben: Stabilitätsfenster neu starten
+            entry.signature = signature
+            entry.stable_since = now
+        quiet_since = max(entry.stable_since, entry.last_event_at)
+        return entry.signature is not None and now - quiet_since >= self.stability_seconds
+
+    def poll(self) -> List[Path]:
+        """Prüft alle wartenden Dateien einmal und gibt die stabilen frei"""
+        now = time.monotonic()
+        released: List[Tuple[Path, _PendingFile]] = []
+        with self._lock:
+            for path, entry in list(self._pending.items()):
+                ready = self._is_ready(path, entry, now)
+                if ready is None:
+                    del self._pending[path]
+                elif ready:
+                    released.append((path, self._pending.pop(path)))
+
+        # Callback außerhalb des Locks: darf bei voller Job-Queue blockieren
+        for path, entry in released:
+            if self.metrics is not None:
+                self.metrics.inc('watch_coalesced_events_total', entry.events - 1)
+            self.callback(path, entry.first_event)
+        return [path for path, _ in released]
+
+    def start(self) -> 'EventCoalescer':
+        """Startet die periodische Prüfung im Hintergrund"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='event-coalescer', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Fehler beim Prüfen wartender Dateien: {str(e)}")
+
+    def stop(self) -> None:
+        """Beendet die Prüfung; noch nicht stabile Dateien werden verworfen"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._pending.clear()
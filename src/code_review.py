@@ -0,0 +1,318 @@
+"""
+Inkrementelles Code-Review ganzer Repositories.
+
+Python-Dateien werden per `ast` in Einheiten zerlegt (Funktionen, Methoden,
+Klassenrumpf, Modulebene). Jede Einheit bekommt einen Fingerprint über ihren
+AST, Kommentare und Formatierung ändern ihn also nicht. Reviewt werden nur
+neue oder geänderte Einheiten, die übrigen Reviews kommen aus dem `ReviewIndex`.
+"""
+import ast
+import fnmatch
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+DEFAULT_EXCLUDE_DIRS = ('.git', '.hg', '.venv', 'venv', 'env', '__pycache__', 'node_modules',
+                        'build', 'dist', '.tox', '.mypy_cache', '.pytest_cache')
+
+def _fingerprint(kind: str, payload: str) -> str:
+    return hashlib.sha256(f"{kind}\0{payload}".encode('utf-8')).hexdigest()
+
+def _unit(name: str, kind: str, lines: List[str], start: int, end: int, payload: str) -> Dict[str, Any]:
+    return {
+        'name': name,
+        'kind': kind,
+        'start_line': start,
+        'end_line': end,
+        'code': ''.join(lines[start - 1:end]),
+        'fingerprint': _fingerprint(kind, payload)
+    }
+
+def _start_line(node: ast.AST) -> int:
+    # Dekoratoren gehören zur Funktion bzw. Klasse
+    return min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+
+def extract_units(source: str) -> List[Dict[str, Any]]:
+    """
+    Zerlegt Python-Quelltext in Review-Einheiten.
+
+    - jede Funktion auf Modulebene und jede Methode (`Klasse.methode`)
+    - der Klassenrumpf ohne Methoden (Attribute, Docstring, Basisklassen)
+    - die übrigen Anweisungen der Modulebene (Imports, Konstanten) als `<modul>`
+
+    Nicht parsebare Dateien ergeben eine Einheit `<datei>` mit dem ganzen Text.
+
+    Returns:
+        Liste von Dicts mit name, kind, start_line, end_line, code und fingerprint
+    """
+    lines = source.splitlines(keepends=True)
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return [_unit('<datei>', 'file', lines, 1, max(len(lines), 1), source)] if source.strip() else []
+
+    functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+    units: List[Dict[str, Any]] = []
+    module_rest: List[ast.stmt] = []
+    for node in tree.body:
+        if isinstance(node, functions):
+            units.append(_unit(node.name, 'function', lines, _start_line(node), node.end_lineno,
+                               ast.dump(node)))
+        elif isinstance(node, ast.ClassDef):
+            methods = [child for child in node.body if isinstance(child, functions)]
+            for method in methods:
+                units.append(_unit(f"{node.name}.{method.name}", 'method', lines,
+                                   _start_line(method), method.end_lineno, ast.dump(method)))
+            # Fingerprint des Rumpfs ohne Methoden: geänderte Methoden betreffen ihn nicht
+            body = [child for child in node.body if not isinstance(child, functions)]
+            payload = '\n'.join([node.name] + [ast.dump(part) for part in
+                                                node.decorator_list + node.bases + node.keywords + body])
+            if not methods:
+                units.append(_unit(node.name, 'class', lines, _start_line(node), node.end_lineno, payload))
+                continue
+            header_end = _start_line(methods[0]) - 1
+            unit = _unit(node.name, 'class', lines, _start_line(node),
+                         max([header_end] + [child.end_lineno for child in body]), payload)
+            # Kopf bis zur ersten Methode plus Anweisungen zwischen/nach den Methoden
+            unit['code'] = ''.join(lines[_start_line(node) - 1:header_end]) + ''.join(
+                ''.join(lines[child.lineno - 1:child.end_lineno])
+                for child in body if child.lineno > header_end
+            )
+            units.append(unit)
+        else:
+            module_rest.append(node)
+
+    if module_rest:
+        payload = ast.dump(ast.Module(body=module_rest, type_ignores=[]))
+        start, end = module_rest[0].lineno, module_rest[-1].end_lineno
+        unit = _unit('<modul>', 'module', lines, start, end, payload)
+        # Nur die Anweisungen selbst, nicht dazwischenliegende Funktionen
+        unit['code'] = ''.join(
+            ''.join(lines[node.lineno - 1:node.end_lineno]) for node in module_rest
+        )
+        units.append(unit)
+
+    units.sort(key=lambda unit: unit['start_line'])
+    # Gleichnamige Einheiten (z.B. Property-Setter) eindeutig benennen
+    seen: Dict[str, int] = {}
+    for unit in units:
+        seen[unit['name']] = seen.get(unit['name'], 0) + 1
+        if seen[unit['name']] > 1:
+            unit['name'] = f"{unit['name']}#{seen[unit['name']]}"
+    return units
+
+class ReviewIndex:
+    """Gespeicherte Reviews je Einheit (Wurzel, Datei, Name), wiederverwendbar über den Fingerprint"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Initialisiert den Index.
+
+        Args:
+            path: Pfad zur SQLite-Datei, ohne Pfad nur im Speicher
+        """
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path) if path is not None else ':memory:',
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(unit_reviews)")]
+        if columns and 'root' not in columns:
+            # Alte Indizes ohne Wurzel lassen sich keinem Repository zuordnen
+            self._db.execute("DROP TABLE unit_reviews")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS unit_reviews (
+                root TEXT NOT NULL,
+                file TEXT NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                model TEXT NOT NULL,
+                review TEXT NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (root, file, name)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_unit_reviews_fp ON unit_reviews(fingerprint, model)")
+        self._db.commit()
+
+    def lookup(self, root: str, file: str, unit: Dict[str, Any],
+               model: str) -> Tuple[Optional[str], str]:
+        """
+        Sucht ein gespeichertes Review für die Einheit.
+
+        Ein verschobenes Review darf aus jeder Wurzel stammen, der Fingerprint
+        deckt den Code vollständig ab.
+
+        Returns:
+            Tupel aus Review (None, wenn keins passt) und Status: 'unchanged',
+            'moved' (gleicher Code an anderer Stelle), 'changed' oder 'new'
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, review FROM unit_reviews "
+                "WHERE root = ? AND file = ? AND name = ? AND model = ?",
+                (root, file, unit['name'], model)
+            ).fetchone()
+            if row is not None and row[0] == unit['fingerprint']:
+                return row[1], 'unchanged'
+            moved = self._db.execute(
+                "SELECT review FROM unit_reviews WHERE fingerprint = ? AND model = ? LIMIT 1",
+                (unit['fingerprint'], model)
+            ).fetchone()
+        if moved is not None:
+            return moved[0], 'moved'
+        return None, 'changed' if row is not None else 'new'
+
+    def store(self, root: str, file: str, units: List[Dict[str, Any]], model: str) -> None:
+        """Ersetzt alle Einträge einer Datei durch die aktuellen Einheiten samt Review"""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM unit_reviews WHERE root = ? AND file = ?", (root, file))
+            self._db.executemany(
+                "INSERT INTO unit_reviews (root, file, name, kind, fingerprint, model, review, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(root, file, unit['name'], unit['kind'], unit['fingerprint'], model, unit['review'], now)
+                 for unit in units if unit.get('review') is not None]
+            )
+
+    def files(self, root: str) -> List[str]:
+        """Alle Dateien einer Wurzel mit gespeicherten Reviews"""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT DISTINCT file FROM unit_reviews WHERE root = ?", (root,))]
+
+    def forget(self, root: str, file: str) -> None:
+        """Entfernt alle Reviews einer Datei (z.B. gelöscht)"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM unit_reviews WHERE root = ? AND file = ?", (root, file))
+
+    def close(self) -> None:
+        """Schließt die Datenbankverbindung"""
+        with self._lock:
+            self._db.close()
+
+def iter_source_files(root: Path, patterns: Iterable[str] = ('*.py',),
+                      exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS) -> List[Path]:
+    """Alle passenden Dateien unterhalb von `root`, ohne ausgeschlossene Verzeichnisse"""
+    exclude = set(exclude_dirs)
+    files = []
+    for directory, subdirs, names in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if d not in exclude and not d.endswith('.egg-info'))
+        files.extend(Path(directory) / name for name in sorted(names)
+                     if any(fnmatch.fnmatch(name, pattern) for pattern in patterns))
+    return files
+
+def merge_file_report(file: str, units: List[Dict[str, Any]]) -> str:
+    """Fügt die Reviews der Einheiten einer Datei zu einem Bericht zusammen"""
+    parts = [f"# Code-Review: {file}\n"]
+    for unit in units:
+        parts.append(f"## {unit['name']} ({unit['kind']}, Zeilen {unit['start_line']}-{unit['end_line']})\n")
+        parts.append(unit['review'].strip() + "\n")
+    return "\n".join(parts)
+
+class RepositoryReviewer:
+    """Reviewt nur neue und geänderte Einheiten eines Repositories, parallel"""
+
+    def __init__(self, review_unit: Callable[[str, Dict[str, Any]], str], index: ReviewIndex,
+                 model: str, max_parallel: int = 4, patterns: Iterable[str] = ('*.py',),
+                 exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS):
+        """
+        Initialisiert den Reviewer.
+
+        Args:
+            review_unit: Erstellt das Review einer Einheit (Dateipfad, Einheit) -> Text
+            index: Gespeicherte Reviews des letzten Laufs
+            model: Modellname; Reviews anderer Modelle werden nicht wiederverwendet
+            max_parallel: Gleichzeitige LLM-Aufrufe
+            patterns: Dateimuster der zu reviewenden Dateien
+            exclude_dirs: Verzeichnisnamen, die übersprungen werden
+        """
+        self.review_unit = review_unit
+        self.index = index
+        self.model = model
+        self.max_parallel = max(1, int(max_parallel))
+        self.patterns = tuple(patterns)
+        self.exclude_dirs = tuple(exclude_dirs)
+
+    def review(self, root: Union[str, Path],
+               output_dir: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+        """
+        Reviewt ein Repository inkrementell.
+
+        Args:
+            root: Wurzelverzeichnis des Repositories
+            output_dir: Schreibt je Datei einen Bericht `<pfad>.review.md`, None schreibt nichts
+
+        Returns:
+            Dict mit `files` (je Datei Einheiten samt Review und Status sowie der
+            zusammengeführte Bericht) und Zählern für reviewte, übernommene und
+            entfernte Einheiten
+        """
+        start = time.perf_counter()
+        root = Path(root).resolve()
+        root_key = root.as_posix()
+        files: Dict[str, List[Dict[str, Any]]] = {}
+        todo: List[Tuple[str, Dict[str, Any]]] = []
+
+        for path in iter_source_files(root, self.patterns, self.exclude_dirs):
+            relative = path.relative_to(root).as_posix()
+            try:
+                source = path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Datei übersprungen: {relative} ({str(e)})")
+                continue
+            units = extract_units(source)
+            for unit in units:
+                unit['review'], unit['status'] = self.index.lookup(root_key, relative, unit, self.model)
+                if unit['review'] is None:
+                    todo.append((relative, unit))
+            files[relative] = units
+
+        # Nur neue und geänderte Einheiten gehen an das Modell
+        def run(item: Tuple[str, Dict[str, Any]]) -> None:
+            relative, unit = item
+            try:
+                unit['review'] = self.review_unit(relative, unit)
+            except Exception as e:
+                unit['review'], unit['status'] = None, 'error'
+                unit['error'] = str(e)
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            list(executor.map(run, todo))
+
+        # Nur Dateien dieser Wurzel, andere Repositories im selben Index bleiben erhalten
+        removed = [file for file in self.index.files(root_key) if file not in files]
+        for file in removed:
+            self.index.forget(root_key, file)
+
+        report: Dict[str, Any] = {'root': str(root), 'files': {}}
+        for relative, units in files.items():
+            self.index.store(root_key, relative, units, self.model)
+            reviewed = [unit for unit in units if unit['review'] is not None]
+            report['files'][relative] = {
+                'units': units,
+                'changed': any(unit['status'] in ('new', 'changed') for unit in units),
+                'report': merge_file_report(relative, reviewed)
+            }
+            if output_dir is not None:
+                target = Path(output_dir) / f"{relative}.review.md"
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(report['files'][relative]['report'], encoding='utf-8')
+
+        statuses = [unit['status'] for units in files.values() for unit in units]
+        report.update({
+            'unit_count': len(statuses),
+            'reviewed_units': sum(status in ('new', 'changed') for status in statuses),
+            'reused_units': sum(status in ('unchanged', 'moved') for status in statuses),
+            'failed_units': statuses.count('error'),
+            'removed_files': removed,
+            'seconds': round(time.perf_counter() - start, 3)
+        })
+        return report
@@ -0,0 +1,278 @@
+"""
+Erkennung doppelter und fast doppelter Eingabedateien.
+
+Exakte Duplikate werden über den SHA-256 des Dateiinhalts erkannt, umsortierte
+Exporte über einen reihenfolgeunabhängigen Hash aller Zeilen. Für fast gleiche
+Dateien (einige Zeilen mehr oder weniger) wird eine MinHash-Signatur der
+Zeilenmenge gebildet und über ein LSH-Index (Banding) nach Kandidaten gesucht.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+def hash_rows(df: 'pd.DataFrame') -> 'np.ndarray':
+    """
+    Hasht jede Zeile auf uint64, unabhängig von Spaltenreihenfolge und int/float.
+
+    Zahlen werden als float64 gehasht (1 und 1.0 sind gleich), alles andere als Text.
+    """
+    import numpy as np
+    import pandas as pd
+
+    normalized = {}
+    for column in sorted(df.columns, key=str):
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            normalized[str(column)] = values.astype(np.float64)
+        else:
+            normalized[str(column)] = values.astype(str).where(values.notna(), '')
+    return pd.util.hash_pandas_object(pd.DataFrame(normalized), index=False).to_numpy(dtype=np.uint64)
+
+class DataFingerprint:
+    """Mergebarer Fingerprint einer Tabelle: Schema, Multiset-Hash und MinHash-Signatur"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        import numpy as np
+
+        self.num_perm = num_perm
+        rng = np.random.default_rng(seed)
+        # Multiply-Shift-Hashing: (a*h + b) mod 2^64, obere 32 Bit; a ungerade
+        self._a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self.signature = np.full(num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        self.columns: Optional[List[str]] = None
+        self.row_count = 0
+        self._sum = np.uint64(0)
+        self._sum_mixed = np.uint64(0)
+
+    def update(self, df: 'pd.DataFrame', block_size: int = 65536) -> 'DataFingerprint':
+        """Nimmt die Zeilen eines DataFrames (oder Chunks) auf"""
+        import numpy as np
+
+        columns = sorted(str(column) for column in df.columns)
+        if self.columns is None:
+            self.columns = columns
+        hashes = hash_rows(df)
+        self.row_count += len(hashes)
+
+        with np.errstate(over='ignore'):
+            # Summen über uint64 laufen modulo 2^64 über, unabhängig von der Reihenfolge
+            self._sum = np.uint64(self._sum + hashes.sum(dtype=np.uint64))
+            mixed = (hashes ^ (hashes >> np.uint64(29))) * np.uint64(0xBF58476D1CE4E5B9)
+            self._sum_mixed = np.uint64(self._sum_mixed + mixed.sum(dtype=np.uint64))
+
+            # MinHash über die Menge der Zeilen-Hashes (doppelte Zeilen zählen einmal)
+            unique = np.unique(hashes)
+            for start in range(0, len(unique), block_size):
+                block = unique[start:start + block_size]
+                permuted = (block[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+                np.minimum(self.signature, permuted.min(axis=0), out=self.signature)
+        return self
+
+    def content_digest(self) -> str:
+        """Hash über Schema und Zeilen-Multiset, gleich bei nur umsortierten Exporten"""
+        material = json.dumps([self.columns, self.row_count, int(self._sum), int(self._sum_mixed)])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def similarity(self, other_signature: 'np.ndarray') -> float:
+        """Geschätzte Jaccard-Ähnlichkeit der Zeilenmengen"""
+        return float((self.signature == other_signature).mean())
+
+    def bands(self, num_bands: int) -> List[str]:
+        """LSH-Schlüssel: die Signatur in `num_bands` Bänder zerlegt und gehasht"""
+        rows = self.num_perm // num_bands
+        return [
+            hashlib.blake2b(self.signature[i * rows:(i + 1) * rows].tobytes(), digest_size=8).hexdigest()
+            for i in range(num_bands)
+        ]
+
+def diff_stats(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Unterschiede zwischen zwei Basis-Statistiken (Zeilen, Spalten, Mittelwerte, Nullwerte)"""
+    previous_columns = [str(c) for c in previous.get('columns', [])]
+    current_columns = [str(c) for c in current.get('columns', [])]
+    diff: Dict[str, Any] = {
+        'row_count': {'vorher': previous.get('row_count'), 'jetzt': current.get('row_count')},
+        'added_columns': [c for c in current_columns if c not in previous_columns],
+        'removed_columns': [c for c in previous_columns if c not in current_columns],
+        'numeric_changes': {},
+        'missing_changes': {}
+    }
+    previous_summary = previous.get('numeric_summary', {})
+    for column, summary in current.get('numeric_summary', {}).items():
+        before = previous_summary.get(column)
+        if before is None:
+            continue
+        changes = {
+            key: {'vorher': before.get(key), 'jetzt': summary.get(key)}
+            for key in ('mean', 'min', 'max')
+            if before.get(key) != summary.get(key)
+        }
+        if changes:
+            diff['numeric_changes'][column] = changes
+    previous_missing = previous.get('missing_values', {})
+    for column, missing in current.get('missing_values', {}).items():
+        if column in previous_missing and previous_missing[column] != missing:
+            diff['missing_changes'][column] = {'vorher': previous_missing[column], 'jetzt': missing}
+    return diff
+
+class DuplicateIndex:
+    """Dauerhafter Index bereits analysierter Dateien für Duplikat-Abfragen"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, threshold: float = 0.8,
+                 num_perm: int = 128, num_bands: int = 16):
+        """
+        Initialisiert den Index.
+
+        Args:
+            path: Pfad zur SQLite-Datei, ohne Pfad nur im Speicher
+            threshold: Mindest-Ähnlichkeit (Jaccard der Zeilenmengen) für ein Fast-Duplikat
+            num_perm: Länge der MinHash-Signatur
+            num_bands: Anzahl LSH-Bänder; mit 128/16 werden Paare ab etwa 0.7
+                Ähnlichkeit sehr wahrscheinlich als Kandidaten gefunden
+        """
+        if num_perm % num_bands:
+            raise ValueError("num_perm muss durch num_bands teilbar sein")
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path) if path is not None else ':memory:',
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_name TEXT NOT NULL,
+                sha256 TEXT,
+                content_digest TEXT,
+                columns TEXT,
+                signature BLOB,
+                result TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_sha256 ON analyses(sha256);
+            CREATE INDEX IF NOT EXISTS idx_analyses_digest ON analyses(content_digest);
+            CREATE TABLE IF NOT EXISTS lsh_bands (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                analysis_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh_bands(band, bucket);
+        """)
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['DuplicateIndex']:
+        """Erstellt den Index aus dem Abschnitt `deduplication`, None wenn deaktiviert"""
+        settings = config.get('deduplication') or {}
+        if not settings.get('enabled', False):
+            return None
+        return cls(
+            path=settings.get('path'),
+            threshold=settings.get('threshold', 0.8),
+            num_perm=settings.get('num_perm', 128),
+            num_bands=settings.get('num_bands', 16)
+        )
+
+    def new_fingerprint(self) -> DataFingerprint:
+        """Leerer Fingerprint mit den Parametern dieses Index"""
+        return DataFingerprint(num_perm=self.num_perm)
+
+    def _load(self, row: Tuple) -> Dict[str, Any]:
+        return {'id': row[0], 'file_name': row[1], 'result': json.loads(row[2])}
+
+    def find_exact(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Frühere Analyse einer Datei mit identischem Inhalt"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, file_name, result FROM analyses WHERE sha256 = ? ORDER BY id DESC LIMIT 1",
+                (sha256,)
+            ).fetchone()
+        return self._load(row) if row else None
+
+    def find_similar(self, fingerprint: DataFingerprint) -> Optional[Dict[str, Any]]:
+        """
+        Ähnlichste frühere Analyse mit gleichem Schema.
+
+        Returns:
+            Dict mit `file_name`, `result`, `match` ('reordered' bei gleicher
+            Zeilenmenge in anderer Reihenfolge, sonst 'near') und `similarity`,
+            oder None wenn keine Analyse über dem Schwellwert liegt
+        """
+        import numpy as np
+
+        columns = json.dumps(fingerprint.columns)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, file_name, result FROM analyses "
+                "WHERE content_digest = ? AND columns = ? ORDER BY id DESC LIMIT 1",
+                (fingerprint.content_digest(), columns)
+            ).fetchone()
+            if row is not None:
+                match = self._load(row)
+                match.update({'match': 'reordered', 'similarity': 1.0})
+                return match
+
+            # Kandidaten: mindestens ein gemeinsames LSH-Band
+            candidate_ids = set()
+            for band, bucket in enumerate(fingerprint.bands(self.num_bands)):
+                candidate_ids.update(analysis_id for (analysis_id,) in self._db.execute(
+                    "SELECT analysis_id FROM lsh_bands WHERE band = ? AND bucket = ?", (band, bucket)
+                ))
+
+            best, best_similarity = None, self.threshold
+            for analysis_id in candidate_ids:
+                row = self._db.execute(
+                    "SELECT id, file_name, result, signature FROM analyses WHERE id = ? AND columns = ?",
+                    (analysis_id, columns)
+                ).fetchone()
+                if row is None:
+                    continue
+                similarity = fingerprint.similarity(
+                    np.frombuffer(row[3], dtype=np.uint64)
+                )
+                if similarity >= best_similarity:
+                    best, best_similarity = row, similarity
+
+        if best is None:
+            return None
+        match = self._load(best[:3])
+        match.update({'match': 'near', 'similarity': round(best_similarity, 4)})
+        return match
+
+    def add(self, file_name: str, sha256: Optional[str], fingerprint: Optional[DataFingerprint],
+            result: Dict[str, Any]) -> None:
+        """Nimmt eine abgeschlossene Analyse in den Index auf"""
+        stored = {key: value for key, value in result.items()
+                  if key in ('basic_stats', 'textanalyse', 'empfehlungen')}
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO analyses (file_name, sha256, content_digest, columns, signature, result, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_name, sha256,
+                 fingerprint.content_digest() if fingerprint is not None else None,
+                 json.dumps(fingerprint.columns) if fingerprint is not None else None,
+                 fingerprint.signature.tobytes() if fingerprint is not None else None,
+                 json.dumps(stored, ensure_ascii=False, default=str), time.time())
+            )
+            if fingerprint is not None:
+                self._db.executemany(
+                    "INSERT INTO lsh_bands (band, bucket, analysis_id) VALUES (?, ?, ?)",
+                    [(band, bucket, cursor.lastrowid)
+                     for band, bucket in enumerate(fingerprint.bands(self.num_bands))]
+                )
+
+    def close(self) -> None:
+        """Schließt die Datenbankverbindung"""
+        with self._lock:
+            self._db.close()
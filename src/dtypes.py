@@ -0,0 +1,112 @@
+"""
+Kompakte Dtypes für eingelesene Tabellen.
+
+pandas liest Text als Strings und Zahlen als int64/float64 ein. Tabellen mit
+vielen wiederholten Textwerten (Status, Geschlecht, Dienstgrad, ...) brauchen so
+ein Vielfaches des nötigen Speichers. `optimize_dtypes` wandelt Spalte für
+Spalte um, damit der Speicherbedarf während der Umwandlung kaum steigt.
+"""
+import re
+import warnings
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Werte wie 2021-03-04, 5/17/1967 oder 04.03.2021 (optional mit Uhrzeit)
+_DATE_PATTERN = re.compile(r'^\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}([ T]\d{1,2}:\d{2}(:\d{2})?)?')
+
+def _is_text(series: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)
+
+def _parse_dates(series: pd.Series, sample_size: int) -> Optional[pd.Series]:
+    """Wandelt eine Textspalte in datetime64, wenn alle Werte als Datum lesbar sind, sonst None"""
+    values = series.dropna()
+    if values.empty:
+        return None
+    sample = values.iloc[:sample_size].astype(str)
+    if not sample.str.match(_DATE_PATTERN).all():
+        return None
+    with warnings.catch_warnings():
+        # Formaterkennung aus dem ersten Wert, Hinweis bei gemischten Formaten unterdrücken
+        warnings.simplefilter('ignore', UserWarning)
+        parsed = pd.to_datetime(series, errors='coerce')
+    # Nur übernehmen, wenn kein Wert verloren geht
+    if parsed.isna().sum() != series.isna().sum():
+        return None
+    return parsed
+
+def _downcast_float(series: pd.Series) -> pd.Series:
+    """float64 -> float32, wenn alle Werte exakt darstellbar sind (z.B. ganzzahlige Jahre)"""
+    values = series.to_numpy()
+    narrow = values.astype(np.float32)
+    with np.errstate(invalid='ignore'):
+        exact = (narrow.astype(np.float64) == values) | np.isnan(values)
+    return pd.Series(narrow, index=series.index, name=series.name) if exact.all() else series
+
+def optimize_dtypes(df: pd.DataFrame, category_threshold: float = 0.5,
+                    parse_dates: bool = True, date_sample_size: int = 100
+                    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Wandelt die Spalten in speichersparende Dtypes um.
+
+    - Text mit wenigen verschiedenen Werten wird `category`, übriger Text in
+      Python-Objekten Arrow-basierter String (`string[pyarrow]`), falls pyarrow
+      installiert ist
+    - Textspalten, deren Werte alle Datumsangaben sind, werden `datetime64`
+    - Ganzzahlen werden auf den kleinsten passenden (unsigned) Typ verkleinert,
+      Gleitkommazahlen auf float32, sofern das ohne Genauigkeitsverlust geht
+
+    Args:
+        df: Eingelesene Tabelle, wird spaltenweise ersetzt
+        category_threshold: Höchster Anteil verschiedener Werte an den nicht
+            leeren Werten, bis zu dem Text als `category` gespeichert wird
+        parse_dates: Datumsspalten erkennen und umwandeln
+        date_sample_size: Anzahl Werte, die vor dem Umwandeln auf ein
+            Datumsformat geprüft werden
+
+    Returns:
+        Tupel aus Tabelle und Speicherbericht (Bytes vorher/nachher, Ersparnis in
+        Prozent und die durchgeführten Umwandlungen je Spalte)
+    """
+    try:
+        import pyarrow  # noqa: F401
+        string_dtype = 'string[pyarrow]'
+    except ImportError:
+        string_dtype = None
+
+    before = df.memory_usage(deep=True, index=False)
+    conversions: Dict[str, str] = {}
+    for column in df.columns:
+        series = df[column]
+        converted = None
+        if _is_text(series):
+            converted = _parse_dates(series, date_sample_size) if parse_dates else None
+            if converted is None:
+                non_null = series.count()
+                if non_null and series.nunique() / non_null <= category_threshold:
+                    converted = series.astype('category')
+                elif string_dtype is not None and pd.api.types.is_object_dtype(series.dtype):
+                    # pandas >= 3 liest Text bereits Arrow-basiert ein
+                    converted = series.astype(string_dtype)
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            continue
+        elif pd.api.types.is_integer_dtype(series.dtype) and series.dtype.kind in 'iu':
+            unsigned = not series.empty and series.min() >= 0
+            converted = pd.to_numeric(series, downcast='unsigned' if unsigned else 'integer')
+        elif series.dtype == np.float64:
+            converted = _downcast_float(series)
+
+        if converted is not None and converted.dtype != series.dtype:
+            conversions[str(column)] = f"{series.dtype} -> {converted.dtype}"
+            # Spalte ersetzen, die alte kann sofort freigegeben werden
+            df[column] = converted
+
+    after = df.memory_usage(deep=True, index=False)
+    bytes_before, bytes_after = int(before.sum()), int(after.sum())
+    report = {
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'reduction_pct': round(100 * (1 - bytes_after / bytes_before), 1) if bytes_before else 0.0,
+        'conversions': conversions
+    }
+    return df, report
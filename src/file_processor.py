@@ -1,56 +1,375 @@
 from pathlib import Path
-import pandas as pd
-from typing import Union, Dict
-from .ollama_agent import OllamaAgent
+from datetime import datetime
+import json
+import threading
+from typing import Callable, Union, Dict, Any, Optional, Tuple, TYPE_CHECKING
+from .dedup import DuplicateIndex, diff_stats
+from .manifest import FileManifest
+from .metrics import MetricsRegistry, StageTimer
+
+if TYPE_CHECKING:
+    from .dedup import DataFingerprint
+    from .ollama_agent import OllamaAgent
+    from .sampling import RowSampler
 
 class FileProcessor:
-    def __init__(self, agent: OllamaAgent):
+    def __init__(self, agent: 'OllamaAgent', chunk_size: int = 100_000,
+                 streaming_threshold_mb: float = 256, approximate_stats: bool = False,
+                 stream_output: bool = False, profile_moments: bool = False,
+                 metrics: Optional[MetricsRegistry] = None,
+                 output_dir: Union[str, Path] = 'output', write_report: bool = True,
+                 dedup: Optional[DuplicateIndex] = None, near_duplicates: str = 'reuse',
+                 optimize_dtypes: bool = False, category_threshold: float = 0.5,
+                 parse_dates: bool = True, excel_settings: Optional[Dict[str, Any]] = None,
+                 max_rows_preview: int = 0, sample_max_tokens: int = 1500,
+                 sample_stratify_by: Optional[str] = None, outlier_zscore: float = 4.0,
+                 document_settings: Optional[Dict[str, Any]] = None):
         self.agent = agent
-        
-    def process_file(self, file_path: Union[str, Path]) -> Dict:
-        """Verarbeitet eine einzelne Datei"""
+        # Index früherer Analysen; 'reuse' übernimmt Fast-Duplikate, 'analyze' fragt
+        # trotzdem das Modell und liefert die Unterschiede mit
+        self.dedup = dedup
+        if near_duplicates not in ('reuse', 'analyze'):
+            raise ValueError(f"Unbekannter Modus für Fast-Duplikate: {near_duplicates}")
+        self.near_duplicates = near_duplicates
+        self.output_dir = Path(output_dir)
+        # Ohne Textbericht landet die Analyse nur im Ergebnis (z.B. im ResultStore)
+        self.write_report = write_report
+        # Standardmäßig dieselbe Registry wie der Agent
+        self.metrics = metrics if metrics is not None else agent.metrics
+        self.chunk_size = chunk_size
+        self.approximate_stats = approximate_stats
+        self.streaming_threshold_bytes = streaming_threshold_mb * 1024 * 1024
+        self.stream_output = stream_output
+        # Metadaten-Profile (Parquet) liefern ohne Dekodieren nur Anzahl, Minimum
+        # und Maximum; True liest numerische Spalten für Mittelwert und Streuung
+        self.profile_moments = profile_moments
+        # Kompakte Dtypes (category, Arrow-Strings, verkleinerte Zahlen, Datum)
+        # für komplett eingelesene Dateien, Bericht unter basic_stats['memory']
+        self.optimize_dtypes = optimize_dtypes
+        self.category_threshold = category_threshold
+        self.parse_dates = parse_dates
+        # Engine, Parquet-Cache und Parallelität für Excel (siehe readers.configure_excel),
+        # angewendet erst beim ersten Einlesen, damit pandas nicht beim Start lädt
+        self.excel_settings = excel_settings
+        # Beispielzeilen im Prompt: Stichprobe aus max_rows_preview Zeilen plus
+        # Ausreißer, gekürzt auf sample_max_tokens (0 Zeilen schaltet ab)
+        self.max_rows_preview = max_rows_preview
+        self.sample_max_tokens = sample_max_tokens
+        self.sample_stratify_by = sample_stratify_by
+        self.outlier_zscore = outlier_zscore
+        # Fließtext (.txt ohne Tabellenstruktur) wird per Map-Reduce analysiert,
+        # Parameter aus dem Abschnitt `document_analysis`
+        self.document_settings = document_settings or {}
+        # Wird beim Beenden gesetzt und bricht alle laufenden Streams ab
+        self.cancel_event = threading.Event()
+
+    @classmethod
+    def from_config(cls, agent: 'OllamaAgent', config: Dict[str, Any],
+                    metrics: Optional[MetricsRegistry] = None,
+                    dedup: Optional[DuplicateIndex] = None) -> 'FileProcessor':
+        """Erstellt den Processor aus dem Abschnitt `analysis_settings` der settings.yaml"""
+        settings = config.get('analysis_settings', {})
+        return cls(
+            agent,
+            chunk_size=settings.get('chunk_size', 100_000),
+            streaming_threshold_mb=settings.get('streaming_threshold_mb', 256),
+            approximate_stats=settings.get('approximate_stats', False),
+            stream_output=settings.get('stream_output', False),
+            profile_moments=settings.get('profile_moments', False),
+            optimize_dtypes=settings.get('optimize_dtypes', False),
+            category_threshold=settings.get('category_threshold', 0.5),
+            parse_dates=settings.get('parse_dates', True),
+            excel_settings=settings.get('excel'),
+            max_rows_preview=settings.get('max_rows_preview', 0),
+            sample_max_tokens=settings.get('sample_max_tokens', 1500),
+            sample_stratify_by=settings.get('sample_stratify_by'),
+            outlier_zscore=settings.get('outlier_zscore', 4.0),
+            document_settings=config.get('document_analysis'),
+            metrics=metrics,
+            output_dir=config.get('output_directory', 'output'),
+            write_report=(config.get('results') or {}).get('write_files', True),
+            dedup=dedup,
+            near_duplicates=(config.get('deduplication') or {}).get('near_duplicates', 'reuse')
+        )
+
+    def _is_large(self, file_path: Path) -> bool:
+        return file_path.stat().st_size > self.streaming_threshold_bytes
+
+    def _use_streaming(self, file_path: Path, reader) -> bool:
+        """Große Dateien werden chunkweise statt komplett eingelesen"""
+        return reader.supports_chunks and self._is_large(file_path)
+
+    @staticmethod
+    def _write_header(f, file_path: Path) -> None:
+        f.write(f"Analyse für: {file_path.name}\n")
+        f.write(f"Zeitpunkt: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        f.write("=" * 80 + "\n\n")
+        f.write("DATENANALYSE\n\n")
+
+    def _new_sampler(self) -> Optional['RowSampler']:
+        if not self.max_rows_preview:
+            return None
+        from .sampling import RowSampler
+        return RowSampler(max_rows=self.max_rows_preview, max_tokens=self.sample_max_tokens,
+                          stratify_by=self.sample_stratify_by, outlier_zscore=self.outlier_zscore)
+
+    def _analyze_streaming(self, analyze: Callable[..., Dict[str, Any]], txt_output: Path,
+                           file_path: Path) -> Dict[str, Any]:
+        """Schreibt die Textanalyse während der Generierung in die Ausgabedatei"""
+        with open(txt_output, 'w', encoding='utf-8') as f:
+            self._write_header(f, file_path)
+            f.flush()
+
+            def write_token(token: str) -> None:
+                f.write(token)
+                if '\n' in token:
+                    f.flush()
+
+            return analyze(on_token=write_token)
+
+    def _read_stats(self, file_path: Path, timer: StageTimer,
+                    fingerprint: Optional['DataFingerprint'],
+                    sampler: Optional['RowSampler'] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Liest die Datei und berechnet die Basis-Statistiken (optional mit Fingerprint und Stichprobe).
+
+        Returns:
+            Tupel aus Basis-Statistiken und dem Text, falls die Datei keine Tabelle
+            sondern Fließtext enthält (sonst None)
+        """
+        # pandas & Co. erst bei der ersten Datei laden, nicht beim Programmstart
+        from .readers import configure_excel, get_reader
+        from .streaming_stats import StreamingStats
+
+        if self.excel_settings is not None:
+            configure_excel(**self.excel_settings)
+            self.excel_settings = None
+        reader = get_reader(file_path)
+        if not reader.is_tabular(file_path):
+            with timer.stage('read'):
+                document = file_path.read_text(encoding='utf-8', errors='replace')
+            return {'document': {'characters': len(document), 'lines': document.count('\n') + 1}}, document
+
+        # Profil und Chunk-Streaming lesen und zählen in einem Durchgang,
+        # ihre Dauer zählt komplett zur Stufe 'read'
+        with timer.stage('read'):
+            # Formate mit eigener Statistik zuerst. Reine Metadaten-Profile (Parquet)
+            # nur für große Dateien: ohne Zeilen gibt es keine exakten Quantile,
+            # keinen Fingerprint und keine Stichprobe, nur exakte Duplikate werden erkannt
+            basic_stats = None
+            if not reader.profile_from_metadata or self._is_large(file_path):
+                basic_stats = reader.profile(file_path, self.chunk_size, sketches=self.approximate_stats,
+                                             moments=self.profile_moments, fingerprint=fingerprint,
+                                             sampler=sampler)
+            if basic_stats is None and self._use_streaming(file_path, reader):
+                chunks = reader.iter_chunks(file_path, self.chunk_size)
+                consumers = [c for c in (fingerprint, sampler) if c is not None]
+                if consumers:
+                    chunks = self._tapped(chunks, consumers)
+                basic_stats = StreamingStats.from_chunks(
+                    chunks, sketches=self.approximate_stats
+                ).to_basic_stats()
+            elif basic_stats is None:
+                df = reader.read(file_path)
+        if basic_stats is None:
+            # Fingerprint vor optimize_dtypes, wie beim Streaming über die
+            # eingelesenen Werte (z.B. Datumstext statt geparster Daten)
+            if fingerprint is not None:
+                with timer.stage('fingerprint'):
+                    fingerprint.update(df)
+            memory = None
+            if self.optimize_dtypes:
+                from .dtypes import optimize_dtypes
+                with timer.stage('optimize'):
+                    df, memory = optimize_dtypes(df, self.category_threshold, self.parse_dates)
+            with timer.stage('stats'):
+                basic_stats = self.agent.compute_basic_stats(df, approximate=self.approximate_stats)
+            if memory is not None:
+                basic_stats['memory'] = memory
+            if sampler is not None:
+                with timer.stage('sample'):
+                    sampler.update(df)
+            del df
+        return basic_stats, None
+
+    @staticmethod
+    def _tapped(chunks, consumers):
+        """Reicht die Chunks durch und ergänzt dabei Fingerprint und Stichprobe"""
+        for chunk in chunks:
+            for consumer in consumers:
+                consumer.update(chunk)
+            yield chunk
+
+    def _reuse(self, file_path: Path, match: Dict[str, Any], basic_stats: Dict[str, Any],
+               timer: StageTimer) -> Dict[str, Any]:
+        """Übernimmt die Analyse eines (Fast-)Duplikats statt das Modell erneut zu fragen"""
+        previous = match['result']
+        duplicate_of = {
+            'file_name': match['file_name'],
+            'match': match['match'],
+            'similarity': match['similarity']
+        }
+        stats_diff = diff_stats(previous['basic_stats'], basic_stats)
+
+        if self.write_report:
+            txt_output = self.output_dir / f"analyse_{file_path.stem}.txt"
+            with timer.stage('write'), open(txt_output, 'w', encoding='utf-8') as f:
+                self._write_header(f, file_path)
+                f.write(f"Übernommen aus der Analyse von {match['file_name']} "
+                        f"(Übereinstimmung: {match['match']}, Ähnlichkeit {match['similarity']:.0%})\n\n")
+                if match['match'] == 'near':
+                    f.write("Änderungen gegenüber der früheren Datei:\n")
+                    f.write(json.dumps(stats_diff, indent=2, ensure_ascii=False, default=str))
+                    f.write("\n\n")
+                f.write(previous['textanalyse'])
+
+        if self.metrics is not None:
+            self.metrics.inc('duplicates_total', labels={'match': match['match']})
+        self._count_file('duplicate')
+        return {
+            'file_name': file_path.name,
+            'status': 'success',
+            'timestamp': datetime.now().isoformat(),
+            'basic_stats': basic_stats,
+            'textanalyse': previous['textanalyse'],
+            'empfehlungen': previous['empfehlungen'],
+            'llm_metrics': {},
+            'duplicate_of': duplicate_of,
+            'stats_diff': stats_diff,
+            'stage_seconds': timer.to_dict()
+        }
+
+    def process_file(self, file_path: Union[str, Path],
+                     cancel_event: Optional[threading.Event] = None,
+                     content_hash: Optional[str] = None) -> Dict:
+        """
+        Verarbeitet eine einzelne Datei.
+
+        Das Ergebnis enthält die Textanalyse unter `textanalyse` und unter
+        `stage_seconds` die Dauer der Stufen read, optimize, stats, sample, prompt_build,
+        llm_wait und write. Mit `max_rows_preview` stehen Umfang und Tokens der
+        Beispielzeilen im Prompt unter `sample`.
+        Mit Duplikat-Index wird die Analyse identischer oder sehr ähnlicher Dateien
+        übernommen (`duplicate_of`, `stats_diff`), ohne das Modell aufzurufen.
+
+        Args:
+            file_path: Die zu analysierende Datei
+            cancel_event: Bricht eine laufende Generierung ab
+            content_hash: SHA-256 des Inhalts, falls bereits bekannt (z.B. aus dem Manifest)
+        """
+        from .ollama_agent import GenerationCancelled
+
         file_path = Path(file_path)
-        
+        timer = StageTimer(self.metrics)
+        fingerprint = None
+
         # Datei einlesen
         try:
-            if file_path.suffix == '.csv':
-                df = pd.read_csv(file_path)
-            elif file_path.suffix in ['.xlsx', '.xls']:
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError(f"Nicht unterstütztes Dateiformat: {file_path.suffix}")
+            if self.dedup is not None:
+                with timer.stage('fingerprint'):
+                    content_hash = content_hash or FileManifest.hash_file(file_path)
+                    earlier = self.dedup.find_exact(content_hash)
+                if earlier is not None:
+                    earlier.update({'match': 'exact', 'similarity': 1.0})
+                    return self._reuse(file_path, earlier, earlier['result']['basic_stats'], timer)
+                fingerprint = self.dedup.new_fingerprint()
+
+            sampler = self._new_sampler()
+            basic_stats, document = self._read_stats(file_path, timer, fingerprint, sampler)
+            sample, sample_info = None, None
+            if sampler is not None and document is None:
+                with timer.stage('sample'):
+                    sample, sample_info = sampler.to_prompt()
         except Exception as e:
+            self._count_file('read_error')
             return {
                 'file_name': file_path.name,
-                'error': f"Fehler beim Einlesen der Datei: {str(e)}"
+                'error': f"Fehler beim Einlesen der Datei: {str(e)}",
+                'stage_seconds': timer.to_dict()
             }
-            
+
+        similar = None
+        if fingerprint is not None and fingerprint.columns is not None:
+            similar = self.dedup.find_similar(fingerprint)
+            if similar is not None and (similar['match'] == 'reordered' or self.near_duplicates == 'reuse'):
+                result = self._reuse(file_path, similar, basic_stats, timer)
+                self.dedup.add(file_path.name, content_hash, fingerprint, result)
+                return result
+
         # Analyse durchführen
         try:
-            analysis_results = self.agent.analyze_data(df)
-            
-            # Textanalyse in .txt Datei speichern
-            output_dir = Path('output')
-            txt_output = output_dir / f"analyse_{file_path.stem}.txt"
-            
-            with open(txt_output, 'w', encoding='utf-8') as f:
-                f.write(f"Analyse für: {file_path.name}\n")
-                f.write(f"Zeitpunkt: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write("=" * 80 + "\n\n")
-                f.write("DATENANALYSE\n\n")
-                f.write(analysis_results['textanalyse'])
-            
+            txt_output = self.output_dir / f"analyse_{file_path.stem}.txt"
+            cancel_event = cancel_event or self.cancel_event
+
+            if document is not None:
+                def analyze(on_token=None):
+                    settings = self.document_settings
+                    results = self.agent.analyze_document(
+                        document, on_token=on_token, cancel_event=cancel_event, timer=timer,
+                        chunk_tokens=settings.get('chunk_tokens', 2000),
+                        chunk_overlap=settings.get('chunk_overlap', 200),
+                        max_parallel=settings.get('max_parallel', 4),
+                        max_reduce_levels=settings.get('max_reduce_levels', 4),
+                        encoding_name=settings.get('encoding')
+                    )
+                    basic_stats['document']['chunk_count'] = results['chunk_count']
+                    return results
+            else:
+                def analyze(on_token=None):
+                    return self.agent.analyze_stats(basic_stats, on_token=on_token,
+                                                    cancel_event=cancel_event, timer=timer,
+                                                    sample=sample or None)
+
+            if self.write_report and self.stream_output:
+                analysis_results = self._analyze_streaming(analyze, txt_output, file_path)
+            else:
+                analysis_results = analyze()
+
+            if self.write_report and not self.stream_output:
+                # Textanalyse in .txt Datei speichern
+                with timer.stage('write'), open(txt_output, 'w', encoding='utf-8') as f:
+                    self._write_header(f, file_path)
+                    f.write(analysis_results['textanalyse'])
+
+            self._count_file('success')
             # JSON mit Empfehlungen und Basis-Statistiken zurückgeben
-            return {
+            result = {
                 'file_name': file_path.name,
                 'status': 'success',
-                'timestamp': pd.Timestamp.now().isoformat(),
-                'basic_stats': analysis_results['basic_stats'],
-                'empfehlungen': analysis_results['empfehlungen']
+                'timestamp': datetime.now().isoformat(),
+                'basic_stats': basic_stats,
+                'textanalyse': analysis_results['textanalyse'],
+                'empfehlungen': analysis_results['empfehlungen'],
+                'llm_metrics': analysis_results['llm_metrics'],
+                'stage_seconds': timer.to_dict()
+            }
+            if sample_info is not None:
+                result['sample'] = sample_info
+        except GenerationCancelled:
+            self._count_file('cancelled')
+            return {
+                'file_name': file_path.name,
+                'status': 'cancelled',
+                'error': "Analyse abgebrochen",
+                'stage_seconds': timer.to_dict()
             }
         except Exception as e:
+            self._count_file('error')
             return {
                 'file_name': file_path.name,
                 'status': 'error',
-                'error': f"Fehler bei der Analyse: {str(e)}"
-            }
\ No newline at end of file
+                'error': f"Fehler bei der Analyse: {str(e)}",
+                'stage_seconds': timer.to_dict()
+            }
+
+        if similar is not None:
+            # Fast-Duplikat trotzdem analysiert: Bezug und Unterschiede mitliefern
+            result['duplicate_of'] = {key: similar[key] for key in ('file_name', 'match', 'similarity')}
+            result['stats_diff'] = diff_stats(similar['result']['basic_stats'], basic_stats)
+        if self.dedup is not None:
+            self.dedup.add(file_path.name, content_hash, fingerprint, result)
+        return result
+
+    def _count_file(self, status: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc('files_total', labels={'status': status})
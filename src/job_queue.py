@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_STOP = object()
+
+class QueueClosed(RuntimeError):
+    """Wird von `submit` ausgelöst, wenn die Warteschlange beendet wird oder ist"""
+
+class WorkerStats:
+    """Durchsatz-Statistik eines einzelnen Workers"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Gibt die Statistik als Dict zurück"""
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            'worker': self.name,
+            'jobs_done': self.jobs_done,
+            'jobs_failed': self.jobs_failed,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'utilization': round(self.busy_seconds / elapsed, 3),
+            'files_per_minute': round(self.jobs_done / elapsed * 60, 2)
+        }
+
+class JobQueue:
+    """Begrenzte Warteschlange mit fester Anzahl an Worker-Threads"""
+
+    def __init__(self, handler: Callable[[Any], None], num_workers: int = 4,
+                 max_queue_size: int = 100):
+        """
+        Initialisiert die Warteschlange.
+
+        Args:
+            handler: Funktion, die für jeden Job im Worker-Thread aufgerufen wird
+            num_workers: Anzahl paralleler Worker
+            max_queue_size: Maximale Anzahl wartender Jobs (Backpressure)
+        """
+        self.handler = handler
+        self.num_workers = max(1, int(num_workers))
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._workers: List[threading.Thread] = []
+        self._stats: Dict[str, WorkerStats] = {}
+        self._closed = False
+        # Weckt blockierte submit-Aufrufe, wenn ein Platz frei oder die Queue beendet wird
+        self._space = threading.Condition()
+
+    def start(self) -> None:
+        """Startet die Worker-Threads"""
+        for i in range(self.num_workers):
+            name = f"worker-{i + 1}"
+            self._stats[name] = WorkerStats(name)
+            thread = threading.Thread(target=self._run, args=(name,), name=name, daemon=True)
+            thread.start()
+            self._workers.append(thread)
+
+    def submit(self, job: Any, timeout: Optional[float] = None) -> None:
+        """
+        Reiht einen Job ein.
+
+        Ist die Warteschlange voll, blockiert der Aufruf, bis ein Platz frei wird
+        (oder `timeout` abläuft, dann wird `queue.Full` ausgelöst). Beginnt
+        währenddessen `shutdown`, gibt er sofort mit `QueueClosed` auf.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._space:
+            while True:
+                if self._closed:
+                    raise QueueClosed("JobQueue wurde bereits beendet")
+                try:
+                    self._queue.put_nowait(job)
+                    return
+                except queue.Full:
+                    pass
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Full
+                self._space.wait(remaining)
+
+    def qsize(self) -> int:
+        """Anzahl der wartenden Jobs"""
+        return self._queue.qsize()
+
+    def _run(self, name: str) -> None:
+        stats = self._stats[name]
+        while True:
+            job = self._queue.get()
+            with self._space:
+                self._space.notify()
+            try:
+                if job is _STOP:
+                    return
+                start = time.perf_counter()
+                try:
+                    self.handler(job)
+                    stats.jobs_done += 1
+                except Exception as e:
+                    stats.jobs_failed += 1
+                    print(f"[{name}] Fehler bei der Verarbeitung von {job}: {str(e)}")
+                finally:
+                    stats.busy_seconds += time.perf_counter() - start
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        """
+        Beendet die Worker.
+
+        Neue Jobs werden ab sofort abgewiesen, auch bereits in `submit`
+        blockierte. Ein zweiter Aufruf wartet nur noch auf die Worker.
+
+        Args:
+            wait: Auf das Ende laufender Jobs warten
+            cancel_pending: Noch nicht begonnene Jobs verwerfen
+        """
+        with self._space:
+            first = not self._closed
+            self._closed = True
+            if first and cancel_pending:
+                try:
+                    while True:
+                        self._queue.get_nowait()
+                        self._queue.task_done()
+                except queue.Empty:
+                    pass
+            self._space.notify_all()
+
+        if first:
+            for _ in self._workers:
+                self._queue.put(_STOP)
+
+        if wait:
+            for thread in self._workers:
+                thread.join()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Gibt die Durchsatz-Statistik aller Worker zurück"""
+        return [s.to_dict() for s in self._stats.values()]
@@ -0,0 +1,120 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+class FileManifest:
+    """Dauerhafte Liste verarbeiteter Dateien (Pfad, Größe, mtime und Inhalts-Hash)"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Initialisiert das Manifest.
+
+        Args:
+            path: Pfad zur SQLite-Datei, ohne Pfad nur im Speicher (geht beim Beenden verloren)
+        """
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path) if path is not None else ':memory:',
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                updated REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_files_sha256 ON files(sha256)")
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'FileManifest':
+        """Erstellt das Manifest aus `manifest_path` der settings.yaml"""
+        return cls(config.get('manifest_path'))
+
+    @staticmethod
+    def hash_file(path: Union[str, Path], block_size: int = 1024 * 1024) -> str:
+        """Berechnet den SHA-256 des Dateiinhalts blockweise"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return str(Path(path).resolve())
+
+    def check(self, path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """
+        Prüft, ob eine Datei (erneut) analysiert werden muss.
+
+        Returns:
+            None, wenn die Datei unverändert erfolgreich verarbeitet wurde,
+            sonst ihren aktuellen Fingerprint für `record`
+        """
+        stat = Path(path).stat()
+        key = self._key(path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, sha256, status FROM files WHERE path = ?", (key,)
+            ).fetchone()
+
+        # Schneller Pfad: Größe und mtime unverändert, kein Hash nötig
+        if row is not None and row[3] == 'done' and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return None
+
+        fingerprint = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': self.hash_file(path)
+        }
+        if row is not None and row[3] == 'done' and row[2] == fingerprint['sha256']:
+            # Nur berührt (z.B. kopiert), Inhalt gleich: mtime nachziehen
+            self.record(path, fingerprint, 'done')
+            return None
+        return fingerprint
+
+    def record(self, path: Union[str, Path], fingerprint: Dict[str, Any], status: str,
+               error: Optional[str] = None) -> None:
+        """Speichert das Ergebnis einer Verarbeitung ('done' oder 'failed')"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, status, error, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._key(path), fingerprint['size'], fingerprint['mtime_ns'],
+                 fingerprint['sha256'], status, error, time.time())
+            )
+            self._db.commit()
+
+    def forget(self, path: Union[str, Path]) -> None:
+        """Entfernt eine Datei aus dem Manifest, sie wird beim nächsten Mal neu analysiert"""
+        with self._lock:
+            self._db.execute("DELETE FROM files WHERE path = ?", (self._key(path),))
+            self._db.commit()
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status FROM files WHERE path = ?", (self._key(path),)
+            ).fetchone()
+        return row is not None and row[0] == 'done'
+
+    def stats(self) -> Dict[str, int]:
+        """Anzahl der Einträge je Status"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """Schließt die Datenbankverbindung"""
+        with self._lock:
+            self._db.close()
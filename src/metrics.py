@@ -0,0 +1,315 @@
+"""
+Laufzeit-Metriken der Pipeline: Stufen-Timer, Token-Zähler und Queue-Tiefe.
+
+Die Werte landen in einer `MetricsRegistry`, die als Prometheus-Text
+(`/metrics`-Endpunkt) oder als regelmäßig geschriebene JSON-Datei exportiert
+wird. Zusätzlich misst `StageTimer` die Stufen jeder einzelnen Datei für den
+Ergebnis-Datensatz.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Grenzen der Histogramm-Buckets in Sekunden (Einlesen bis LLM-Antwort)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_HELP = {
+    'stage_seconds': "Dauer der Verarbeitungsstufen (read, stats, prompt_build, llm_wait, write)",
+    'files_total': "Verarbeitete Dateien nach Status",
+    'duplicates_total': "Übernommene Analysen nach Art der Übereinstimmung (exact, reordered, near)",
+    'llm_requests_total': "Anfragen an Ollama nach Status",
+    'llm_request_seconds': "Gesamtdauer einer Ollama-Anfrage",
+    'llm_prompt_tokens_total': "Vom Modell verarbeitete Prompt-Tokens (prompt_eval_count)",
+    'llm_completion_tokens_total': "Vom Modell erzeugte Tokens (eval_count)",
+    'llm_prompt_eval_seconds_total': "Zeit für die Prompt-Verarbeitung (prompt_eval_duration)",
+    'llm_eval_seconds_total': "Zeit für die Generierung (eval_duration)",
+    'llm_prompt_cached_tokens_total': "Geschätzt aus dem KV-Cache gelesene Prompt-Tokens",
+    'llm_prompt_eval_seconds_saved_total': "Geschätzt gesparte Zeit für die Prompt-Verarbeitung",
+    'job_queue_depth': "Wartende Jobs in der JobQueue",
+    'watch_events_total': "Dateisystem-Events nach Typ (created, modified, moved)",
+    'watch_coalesced_events_total': "Events, die mit einem früheren Event derselben Datei zusammengefasst wurden",
+    'watch_pending_files': "Dateien, die noch geschrieben werden (Größe/mtime nicht stabil)",
+    'backend_outstanding': "Laufende Anfragen je Ollama-Backend",
+    'backend_healthy': "1, wenn das Ollama-Backend in der Rotation ist",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+class MetricsRegistry:
+    """Thread-sichere Sammlung von Countern, Gauges und Histogrammen"""
+
+    def __init__(self, namespace: str = 'file_analyzer', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialisiert die Registry.
+
+        Args:
+            namespace: Präfix aller Metriknamen im Prometheus-Export
+            buckets: Bucket-Grenzen der Histogramme in Sekunden
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._types: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._callbacks: Dict[str, Callable[[], float]] = {}
+
+    def _declare(self, name: str, kind: str) -> None:
+        declared = self._types.setdefault(name, kind)
+        if declared != kind:
+            raise ValueError(f"Metrik {name} ist bereits als {declared} registriert")
+
+    def inc(self, name: str, value: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Erhöht einen Counter"""
+        with self._lock:
+            self._declare(name, 'counter')
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Setzt einen Gauge"""
+        with self._lock:
+            self._declare(name, 'gauge')
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float]) -> None:
+        """Gauge, dessen Wert erst beim Export abgefragt wird (z.B. Queue-Tiefe)"""
+        with self._lock:
+            self._declare(name, 'gauge')
+            self._callbacks[name] = callback
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Trägt einen Messwert in ein Histogramm ein"""
+        with self._lock:
+            self._declare(name, 'histogram')
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = _Histogram(self.buckets)
+            series[key].observe(value)
+
+    def _gauge_values(self) -> Dict[str, Dict[LabelKey, float]]:
+        gauges = {name: dict(series) for name, series in self._gauges.items()}
+        for name, callback in self._callbacks.items():
+            try:
+                gauges.setdefault(name, {})[()] = float(callback())
+            except Exception:
+                continue
+        return gauges
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Alle Metriken als JSON-fähiges Dict"""
+        with self._lock:
+            metrics: Dict[str, Any] = {}
+            for name, series in self._counters.items():
+                metrics[name] = {'type': 'counter', 'samples': [
+                    {'labels': dict(key), 'value': value} for key, value in series.items()
+                ]}
+            for name, series in self._gauge_values().items():
+                metrics[name] = {'type': 'gauge', 'samples': [
+                    {'labels': dict(key), 'value': value} for key, value in series.items()
+                ]}
+            for name, series in self._histograms.items():
+                metrics[name] = {'type': 'histogram', 'samples': [
+                    {'labels': dict(key), 'count': hist.count, 'sum': round(hist.sum, 6),
+                     'buckets': dict(zip(map(str, hist.buckets), hist.cumulative()))}
+                    for key, hist in series.items()
+                ]}
+        return {'timestamp': time.time(), 'metrics': metrics}
+
+    def to_prometheus(self) -> str:
+        """Alle Metriken im Prometheus-Textformat (Version 0.0.4)"""
+        lines = []
+        with self._lock:
+            def header(name: str, kind: str) -> str:
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {full_name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                return full_name
+
+            for name, series in sorted(self._counters.items()):
+                full_name = header(name, 'counter')
+                for key, value in series.items():
+                    lines.append(f"{full_name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._gauge_values().items()):
+                full_name = header(name, 'gauge')
+                for key, value in series.items():
+                    lines.append(f"{full_name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                full_name = header(name, 'histogram')
+                for key, hist in series.items():
+                    for bound, count in zip(hist.buckets, hist.cumulative()):
+                        lines.append(f"{full_name}_bucket{_format_labels(key, ('le', str(bound)))} {count}")
+                    lines.append(f"{full_name}_bucket{_format_labels(key, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {hist.sum}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {hist.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: Union[str, Path]) -> None:
+        """Schreibt den aktuellen Stand atomar als JSON-Datei"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        tmp_path.replace(path)
+
+class StageTimer:
+    """Misst die Stufen einer einzelnen Verarbeitung und meldet sie an die Registry"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Trägt eine bereits gemessene Dauer ein"""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        if self.registry is not None:
+            self.registry.observe('stage_seconds', seconds, {'stage': name})
+
+    def to_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 6) for name, seconds in self.durations.items()}
+
+def _serve_metrics(registry: MetricsRegistry, host: str, port: int):
+    """Startet den /metrics-Endpunkt (http.server erst hier laden, nicht beim Import)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    return server
+
+class MetricsExporter:
+    """Exportiert eine Registry per HTTP (/metrics) und/oder als periodische JSON-Datei"""
+
+    def __init__(self, registry: MetricsRegistry, json_path: Optional[Union[str, Path]] = None,
+                 interval_seconds: float = 30.0, http_port: Optional[int] = None,
+                 http_host: str = '127.0.0.1'):
+        """
+        Initialisiert den Exporter.
+
+        Args:
+            registry: Die zu exportierende Registry
+            json_path: Zieldatei für den JSON-Export, None deaktiviert ihn
+            interval_seconds: Abstand zwischen zwei JSON-Exporten
+            http_port: Port des Prometheus-Endpunkts, None deaktiviert ihn (0 wählt einen freien Port)
+            http_host: Adresse des Prometheus-Endpunkts
+        """
+        self.registry = registry
+        self.json_path = Path(json_path) if json_path is not None else None
+        self.interval_seconds = interval_seconds
+        self.http_port = http_port
+        self.http_host = http_host
+        self._server = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @classmethod
+    def from_config(cls, registry: MetricsRegistry, config: Dict[str, Any]) -> 'MetricsExporter':
+        """Erstellt den Exporter aus dem Abschnitt `metrics` der settings.yaml"""
+        settings = config.get('metrics') or {}
+        return cls(
+            registry,
+            json_path=settings.get('json_path'),
+            interval_seconds=settings.get('json_interval_seconds', 30.0),
+            http_port=settings.get('http_port'),
+            http_host=settings.get('http_host', '127.0.0.1')
+        )
+
+    @property
+    def url(self) -> Optional[str]:
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> 'MetricsExporter':
+        """Startet HTTP-Endpunkt und JSON-Export im Hintergrund"""
+        if self.http_port is not None:
+            self._server = _serve_metrics(self.registry, self.http_host, self.http_port)
+            thread = threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.json_path is not None:
+            thread = threading.Thread(target=self._write_periodically, name='metrics-json', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _write_periodically(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.registry.write_json(self.json_path)
+            except OSError as e:
+                print(f"Metriken konnten nicht geschrieben werden: {str(e)}")
+
+    def stop(self) -> None:
+        """Beendet den Export und schreibt einen letzten JSON-Stand"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        if self.json_path is not None:
+            self.registry.write_json(self.json_path)
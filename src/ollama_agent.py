@@ -1,85 +1,626 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
-import pandas as pd
-from typing import Dict, Any
+import time
+import asyncio
+import threading
+from typing import Callable, Dict, Any, List, Optional, Set, Union, TYPE_CHECKING
+from .backend_pool import Backend, BackendPool, NoBackendAvailable, backoff_delay
+from .cache import ResponseCache
+from .metrics import MetricsRegistry, StageTimer
+from .prompts import (ANALYSIS_PROMPT, DATA_ANALYSIS_PREFIX, DATA_ANALYSIS_TASK,
+                      DATA_RECOMMENDATIONS_TASK, DATA_SAMPLE_BLOCK, DATA_STATS_BLOCK,
+                      SUMMARIZATION_PROMPT)
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from .sampling import RowSampler
+
+class GenerationCancelled(Exception):
+    """Wird ausgelöst, wenn eine gestreamte Generierung abgebrochen wurde"""
 
 class OllamaAgent:
-    def __init__(self, model: str = "mistral", base_url: str = "http://localhost:11434"):
+    def __init__(self, model: str = "mistral",
+                 base_url: Union[str, List[str]] = "http://localhost:11434",
+                 connect_timeout: float = 5.0, request_timeout: float = 300.0,
+                 max_connections: int = 10, cache: Optional[ResponseCache] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 max_concurrency_per_backend: Optional[int] = None,
+                 max_retries: int = 2, retry_backoff: float = 0.5, retry_backoff_max: float = 10.0,
+                 health_check_interval: Optional[float] = 15.0, failure_threshold: int = 3,
+                 temperature: Optional[float] = None, options: Optional[Dict[str, Any]] = None,
+                 keep_alive: Optional[Union[str, float]] = None):
+        """
+        Initialisiert den Agent.
+
+        Args:
+            base_url: URL eines Ollama-Hosts oder Liste mehrerer Hosts, auf die
+                die Anfragen verteilt werden
+            max_connections: Größe des Keep-Alive-Pools je Host
+            max_concurrency_per_backend: Gleichzeitige Anfragen je Host,
+                Standard ist `max_connections`
+            max_retries: Wiederholungen bei Verbindungsfehlern, Timeouts und 5xx
+            retry_backoff: Basis des exponentiellen Backoffs in Sekunden (mit Jitter)
+            retry_backoff_max: Obergrenze einer Wartezeit in Sekunden
+            health_check_interval: Sekunden zwischen Health-Checks bei mehreren Hosts
+            failure_threshold: Aufeinanderfolgende Fehler, bis ein Host pausiert wird
+            temperature: Sampling-Temperatur, wird als Ollama-Option gesendet
+            options: Weitere Ollama-Optionen (z.B. num_ctx)
+            keep_alive: Wie lange Ollama das Modell nach einer Anfrage geladen hält
+                (z.B. "30m", -1 für unbegrenzt), None für den Server-Standard
+        """
+        urls = [base_url] if isinstance(base_url, str) else list(base_url)
         self.model = model
-        self.base_url = base_url
-        
-    def _generate_response(self, prompt: str) -> str:
-        """Sendet Anfrage an Ollama API"""
-        response = requests.post(
-            f"{self.base_url}/api/generate",
-            json={
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False
-            }
+        self.base_url = urls[0]
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
+        self.cache = cache
+        self.metrics = metrics
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.options = dict(options or {})
+        if temperature is not None:
+            self.options['temperature'] = temperature
+        self.keep_alive = keep_alive
+
+        # Kalibrierung für die Schätzung der per KV-Cache gesparten Prompt-Auswertung
+        self._prompt_lock = threading.Lock()
+        self._tokens_per_char = 0.0
+        self._seconds_per_prompt_token: Optional[float] = None
+        self.prompt_cached_tokens = 0
+        self.prompt_eval_seconds_saved = 0.0
+
+        # Gepoolte Keep-Alive-Session, wird von allen Threads gemeinsam genutzt
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(urls), pool_maxsize=max_connections)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.pool = BackendPool(
+            urls, self.session,
+            max_concurrency=max_concurrency_per_backend or max_connections,
+            failure_threshold=failure_threshold,
+            health_check_interval=health_check_interval,
+            metrics=metrics
         )
-        return response.json()['response']
-    
-    def analyze_data(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Führt Datenanalyse mit Ollama durch"""
-        # Basis-Statistiken erstellen
-        basic_stats = {
+        if len(urls) > 1:
+            self.pool.start_health_checks()
+
+        # Async-Session wird erst im laufenden Event-Loop angelegt
+        self._async_session = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    cache: Optional[ResponseCache] = None,
+                    metrics: Optional[MetricsRegistry] = None) -> 'OllamaAgent':
+        """Erstellt einen Agent aus dem Abschnitt `model_settings` der settings.yaml"""
+        settings = config.get('model_settings', {})
+        return cls(
+            model=settings.get('model_name', 'mistral'),
+            base_url=settings.get('base_url', 'http://localhost:11434'),
+            connect_timeout=settings.get('connect_timeout', 5.0),
+            request_timeout=settings.get('request_timeout', 300.0),
+            max_connections=settings.get('max_connections', 10),
+            cache=cache,
+            metrics=metrics,
+            max_concurrency_per_backend=settings.get('max_concurrency_per_backend'),
+            max_retries=settings.get('max_retries', 2),
+            retry_backoff=settings.get('retry_backoff', 0.5),
+            retry_backoff_max=settings.get('retry_backoff_max', 10.0),
+            health_check_interval=settings.get('health_check_interval', 15.0),
+            failure_threshold=settings.get('failure_threshold', 3),
+            temperature=settings.get('temperature'),
+            options=settings.get('options'),
+            keep_alive=settings.get('keep_alive')
+        )
+
+    def _build_payload(self, prompt: str, stream: bool = False) -> Dict[str, Any]:
+        """Erstellt den Request-Body für /api/generate"""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream
+        }
+        if self.options:
+            payload["options"] = self.options
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _cache_key(self, prompt: str) -> str:
+        payload = self._build_payload(prompt)
+        # keep_alive ändert die Antwort nicht
+        options = {k: v for k, v in payload.items()
+                   if k not in ('model', 'prompt', 'stream', 'keep_alive')}
+        return ResponseCache.make_key(self.model, prompt, options)
+
+    def warm_up(self, prime_prefix: bool = True) -> List[Dict[str, Any]]:
+        """
+        Lädt das Modell auf allen Backends, bevor die erste Datei kommt.
+
+        Mit `prime_prefix` wird zusätzlich der feste Anfang der Analyse-Prompts
+        ausgewertet (ein Token Ausgabe), sodass schon die erste Analyse ihn aus
+        dem KV-Cache lesen kann. Das Modell bleibt `keep_alive` lang geladen.
+
+        Returns:
+            Je Backend URL, Erfolg und Dauer (inklusive Ladezeit des Modells)
+        """
+        payload = {"model": self.model, "prompt": "", "stream": False}
+        if prime_prefix:
+            payload.update(prompt=DATA_ANALYSIS_PREFIX, options={**self.options, 'num_predict': 1})
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+
+        results = []
+        for url in self.pool.urls:
+            start = time.perf_counter()
+            try:
+                response = self.session.post(f"{url}/api/generate", json=payload,
+                                             timeout=(self.connect_timeout, self.request_timeout))
+                response.raise_for_status()
+                data = response.json()
+                results.append({
+                    'url': url,
+                    'ok': True,
+                    'seconds': round(time.perf_counter() - start, 3),
+                    'load_seconds': round(data.get('load_duration', 0) / 1e9, 3)
+                })
+            except (requests.RequestException, ValueError) as e:
+                results.append({'url': url, 'ok': False, 'error': str(e)})
+        return results
+
+    def _generate_response(self, prompt: str,
+                           on_token: Optional[Callable[[str], None]] = None,
+                           cancel_event: Optional[threading.Event] = None,
+                           metrics: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Sendet Anfrage an Ollama API.
+
+        Args:
+            prompt: Der Prompt
+            on_token: Wird bei gesetztem Callback für jedes gestreamte Textstück aufgerufen
+            cancel_event: Bricht das Streaming ab, sobald das Event gesetzt ist
+            metrics: Wird mit Time-to-first-Token, Token-Zahlen und Tokens/Sekunde befüllt
+        """
+        metrics = metrics if metrics is not None else {}
+        start = time.perf_counter()
+
+        if self.cache is not None:
+            key = self._cache_key(prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                metrics.update({'cached': True, 'total_seconds': time.perf_counter() - start})
+                self._count_request('cached')
+                return cached
+
+        stream = on_token is not None or cancel_event is not None
+        emitted = []
+
+        def forward(token: str) -> None:
+            emitted.append(True)
+            on_token(token)
+
+        tried: Set[str] = set()
+        for attempt in range(self.max_retries + 1):
+            try:
+                backend = self.pool.acquire(exclude=tried, timeout=self.request_timeout)
+                tried.add(backend.url)
+                try:
+                    result, final = self._post_generate(
+                        backend, prompt, stream, forward if on_token is not None else None,
+                        cancel_event, start, metrics
+                    )
+                except Exception as e:
+                    self.pool.release(backend, failed=self._is_retryable(e))
+                    raise
+                self.pool.release(backend)
+                break
+            except GenerationCancelled:
+                self._count_request('cancelled')
+                raise
+            except Exception as e:
+                # Nach bereits ausgegebenen Tokens nicht wiederholen (doppelter Text)
+                if emitted or not self._is_retryable(e) or attempt == self.max_retries:
+                    self._count_request('error')
+                    raise
+                self._count_request('retry')
+                time.sleep(backoff_delay(attempt, self.retry_backoff, self.retry_backoff_max))
+
+        self._record_generation_metrics(final, start, metrics, len(prompt))
+        if self.cache is not None:
+            self.cache.set(key, result)
+        return result
+
+    def _post_generate(self, backend: Backend, prompt: str, stream: bool,
+                       on_token: Optional[Callable[[str], None]],
+                       cancel_event: Optional[threading.Event], start: float,
+                       metrics: Dict[str, Any]):
+        """Ein einzelner Versuch gegen ein Backend"""
+        response = self.session.post(
+            f"{backend.url}/api/generate",
+            json=self._build_payload(prompt, stream=stream),
+            timeout=(self.connect_timeout, self.request_timeout),
+            stream=stream
+        )
+        response.raise_for_status()
+
+        if stream:
+            return self._consume_stream(response, start, on_token, cancel_event, metrics)
+        final = response.json()
+        metrics['ttft_seconds'] = time.perf_counter() - start
+        return final['response'], final
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Verbindungsfehler, Timeouts, 429 und 5xx lohnen einen neuen Versuch"""
+        if isinstance(error, (NoBackendAvailable, requests.ConnectionError, requests.Timeout,
+                              requests.exceptions.ChunkedEncodingError, asyncio.TimeoutError)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+        else:
+            # aiohttp.ClientResponseError
+            status = getattr(error, 'status', None)
+        return status is not None and (status >= 500 or status == 429)
+
+    @staticmethod
+    def _consume_stream(response: requests.Response, start: float,
+                        on_token: Optional[Callable[[str], None]],
+                        cancel_event: Optional[threading.Event],
+                        metrics: Dict[str, Any]):
+        """Liest den NDJSON-Tokenstrom von Ollama"""
+        parts, final = [], {}
+        try:
+            for line in response.iter_lines():
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GenerationCancelled("Generierung abgebrochen")
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get('response', '')
+                if token:
+                    if 'ttft_seconds' not in metrics:
+                        metrics['ttft_seconds'] = time.perf_counter() - start
+                    parts.append(token)
+                    if on_token is not None:
+                        on_token(token)
+                if chunk.get('done'):
+                    final = chunk
+                    break
+        finally:
+            response.close()
+
+        metrics.setdefault('stream_chunks', len(parts))
+        return ''.join(parts), final
+
+    def _count_request(self, status: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc('llm_requests_total', labels={'model': self.model, 'status': status})
+
+    def _estimate_prompt_cache(self, prompt_chars: int, prompt_eval_count: Optional[int],
+                               prompt_eval_duration: Optional[int]) -> Dict[str, Any]:
+        """
+        Schätzt, wie viele Prompt-Tokens Ollama aus dem KV-Cache gelesen hat.
+
+        Ollama zählt in `prompt_eval_count` nur neu ausgewertete Tokens. Die
+        Prompt-Länge in Tokens wird über das größte beobachtete Verhältnis
+        Tokens/Zeichen geschätzt (eine Anfrage ohne Cache-Treffer kalibriert es),
+        die gesparte Zeit über die zuletzt gemessene Zeit je Prompt-Token.
+        """
+        with self._prompt_lock:
+            if prompt_eval_count and prompt_chars:
+                self._tokens_per_char = max(self._tokens_per_char, prompt_eval_count / prompt_chars)
+            if prompt_eval_count and prompt_eval_duration:
+                self._seconds_per_prompt_token = prompt_eval_duration / 1e9 / prompt_eval_count
+            if not self._tokens_per_char or self._seconds_per_prompt_token is None:
+                return {}
+            cached_tokens = max(0, round(prompt_chars * self._tokens_per_char) - (prompt_eval_count or 0))
+            saved = cached_tokens * self._seconds_per_prompt_token
+            self.prompt_cached_tokens += cached_tokens
+            self.prompt_eval_seconds_saved += saved
+        return {'prompt_cached_tokens': cached_tokens, 'prompt_eval_seconds_saved': saved}
+
+    def prompt_cache_stats(self) -> Dict[str, Any]:
+        """Summe der geschätzt aus dem KV-Cache gelesenen Prompt-Tokens und gesparten Sekunden"""
+        with self._prompt_lock:
+            return {
+                'cached_tokens': self.prompt_cached_tokens,
+                'seconds_saved': round(self.prompt_eval_seconds_saved, 3)
+            }
+
+    def _record_generation_metrics(self, final: Dict[str, Any], start: float,
+                                   metrics: Dict[str, Any], prompt_chars: int = 0) -> None:
+        """Übernimmt Laufzeit, Token-Zahlen und Durchsatz aus der letzten Ollama-Antwort"""
+        metrics['total_seconds'] = time.perf_counter() - start
+        eval_count = final.get('eval_count')
+        eval_duration = final.get('eval_duration')
+        prompt_eval_count = final.get('prompt_eval_count')
+        prompt_eval_duration = final.get('prompt_eval_duration')
+        if eval_count is not None:
+            metrics['eval_count'] = eval_count
+        if eval_duration is not None:
+            metrics['eval_seconds'] = eval_duration / 1e9
+        if prompt_eval_count is not None:
+            metrics['prompt_eval_count'] = prompt_eval_count
+        if prompt_eval_duration is not None:
+            metrics['prompt_eval_seconds'] = prompt_eval_duration / 1e9
+        if eval_count and eval_duration:
+            metrics['tokens_per_second'] = eval_count / (eval_duration / 1e9)
+        elif metrics.get('stream_chunks') and 'ttft_seconds' in metrics:
+            # Ohne Zeitangaben vom Server: Chunks nach dem ersten Token zählen
+            generation_seconds = metrics['total_seconds'] - metrics['ttft_seconds']
+            if generation_seconds > 0:
+                metrics['tokens_per_second'] = metrics['stream_chunks'] / generation_seconds
+        metrics.update(self._estimate_prompt_cache(prompt_chars, prompt_eval_count, prompt_eval_duration))
+
+        if self.metrics is not None:
+            labels = {'model': self.model}
+            self._count_request('success')
+            self.metrics.observe('llm_request_seconds', metrics['total_seconds'], labels)
+            self.metrics.inc('llm_completion_tokens_total', eval_count or 0, labels)
+            self.metrics.inc('llm_prompt_tokens_total', prompt_eval_count or 0, labels)
+            self.metrics.inc('llm_eval_seconds_total', metrics.get('eval_seconds', 0.0), labels)
+            self.metrics.inc('llm_prompt_eval_seconds_total', metrics.get('prompt_eval_seconds', 0.0), labels)
+            self.metrics.inc('llm_prompt_cached_tokens_total', metrics.get('prompt_cached_tokens', 0), labels)
+            self.metrics.inc('llm_prompt_eval_seconds_saved_total',
+                             metrics.get('prompt_eval_seconds_saved', 0.0), labels)
+
+    async def _get_async_session(self):
+        """Gibt die aiohttp-Session zurück und legt sie bei Bedarf an"""
+        import aiohttp
+
+        if self._async_session is None or self._async_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            timeout = aiohttp.ClientTimeout(
+                total=self.request_timeout,
+                connect=self.connect_timeout
+            )
+            self._async_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._async_session
+
+    async def agenerate(self, prompt: str) -> str:
+        """Sendet Anfrage asynchron an Ollama API"""
+        if self.cache is not None:
+            key = self._cache_key(prompt)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                self._count_request('cached')
+                return cached
+
+        import aiohttp
+
+        start = time.perf_counter()
+        session = await self._get_async_session()
+        tried: Set[str] = set()
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Blockierendes Warten auf einen freien Platz nicht im Event-Loop
+                backend = await asyncio.to_thread(
+                    self.pool.acquire, tried, self.request_timeout
+                )
+                tried.add(backend.url)
+                try:
+                    async with session.post(
+                        f"{backend.url}/api/generate",
+                        json=self._build_payload(prompt)
+                    ) as response:
+                        response.raise_for_status()
+                        data = await response.json(content_type=None)
+                except Exception as e:
+                    retryable = isinstance(e, aiohttp.ClientConnectionError) or self._is_retryable(e)
+                    self.pool.release(backend, failed=retryable)
+                    raise
+                self.pool.release(backend)
+                break
+            except Exception as e:
+                retryable = isinstance(e, aiohttp.ClientConnectionError) or self._is_retryable(e)
+                if not retryable or attempt == self.max_retries:
+                    self._count_request('error')
+                    raise
+                self._count_request('retry')
+                await asyncio.sleep(backoff_delay(attempt, self.retry_backoff, self.retry_backoff_max))
+        result = data['response']
+        self._record_generation_metrics(data, start, {}, len(prompt))
+
+        if self.cache is not None:
+            await self.cache.aset(key, result)
+        return result
+
+    def close(self) -> None:
+        """Beendet die Health-Checks und schließt die HTTP-Session"""
+        self.pool.stop()
+        self.session.close()
+
+    async def aclose(self) -> None:
+        """Schließt die HTTP-Sessions inklusive der Async-Session"""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self.close()
+
+    def compute_basic_stats(self, df: 'pd.DataFrame', approximate: bool = False) -> Dict[str, Any]:
+        """
+        Berechnet die Basis-Statistiken für den Analyse-Prompt.
+
+        Mit `approximate=True` werden Quantile per KLL-Sketch und Distinct Counts
+        per HyperLogLog ermittelt (linear, ohne Sortierung der Spalten).
+        """
+        if approximate:
+            from .streaming_stats import StreamingStats
+            return StreamingStats.from_chunks([df], sketches=True).to_basic_stats()
+        return {
             'row_count': len(df),
             'column_count': len(df.columns),
             'columns': df.columns.tolist(),
             'dtypes': {str(k): str(v) for k, v in df.dtypes.to_dict().items()},
             'missing_values': df.isnull().sum().to_dict(),
             'numeric_summary': {
-                col: df[col].describe().to_dict() 
-                for col in df.select_dtypes(include=['int64', 'float64']).columns
+                # float32 (nach optimize_dtypes) in float64 auswerten, sonst verlieren die Summen Genauigkeit
+                col: (df[col].astype('float64') if df[col].dtype == 'float32' else df[col])
+                .describe().to_dict()
+                for col in df.select_dtypes(include='number').columns
             } if not df.empty else {}
         }
-        
-        # Analyse-Prompt erstellen
-        # Analyse-Prompt für detaillierte Textanalyse
-        analysis_prompt = f"""Als Data Science Experte, analysiere folgende Daten und antworte auf Deutsch:
-
-Basis-Statistiken:
-{json.dumps(basic_stats, indent=2)}
-
-Bitte führe eine detaillierte Analyse durch und strukturiere deine Antwort in folgende Abschnitte:
-
-1. Datenübersicht: Beschreibe die grundlegende Struktur und den Inhalt der Daten
-2. Statistische Analyse: Erkläre wichtige statistische Merkmale und Auffälligkeiten
-3. Datenqualität: Bewerte die Qualität und Vollständigkeit der Daten
-4. Muster und Trends: Beschreibe erkennbare Muster oder Trends in den Daten
-
-Gib eine ausführliche, gut strukturierte Analyse in natürlicher Sprache."""
-
-        # Zusätzlicher Prompt für Empfehlungen im JSON-Format
-        recommendations_prompt = f"""Basierend auf der vorherigen Analyse, erstelle konkrete Empfehlungen.
-
-Antworte in folgendem JSON-Format:
-{{
-    'datenverarbeitung': [Liste von Empfehlungen zur Datenverarbeitung],
-    'weitere_analysen': [Liste von vorgeschlagenen weiterführenden Analysen],
-    'visualisierungen': [Liste von empfohlenen Visualisierungen],
-    'actionable_insights': [Liste von konkreten Handlungsempfehlungen]
-}}"""
-
-        # Analyse durchführen
-        analysis_result = self._generate_response(analysis_prompt)
-        
-        # Empfehlungen generieren
-        recommendations_result = self._generate_response(recommendations_prompt)
-        
+
+    def _build_prompts(self, basic_stats: Dict[str, Any], sample: Optional[str] = None) -> Dict[str, str]:
+        """
+        Erstellt Analyse- und Empfehlungs-Prompt.
+
+        Beide beginnen mit demselben festen Prefix, denselben Statistiken und
+        Beispielzeilen und unterscheiden sich erst in der Aufgabe am Ende
+        (KV-Cache-Wiederverwendung).
+        """
+        shared = DATA_ANALYSIS_PREFIX + DATA_STATS_BLOCK.format(stats=json.dumps(basic_stats, indent=2))
+        if sample:
+            shared += DATA_SAMPLE_BLOCK.format(sample=sample)
+        return {
+            'analysis': shared + DATA_ANALYSIS_TASK,
+            'recommendations': shared + DATA_RECOMMENDATIONS_TASK
+        }
+
+    @staticmethod
+    def _parse_recommendations(recommendations_result: str) -> Dict[str, Any]:
+        """Parst die Empfehlungen aus der Modellantwort"""
         try:
-            recommendations_dict = json.loads(recommendations_result)
+            return json.loads(recommendations_result)
         except json.JSONDecodeError:
-            recommendations_dict = {
+            return {
                 'datenverarbeitung': ['Fehler beim Parsen der Empfehlungen'],
                 'weitere_analysen': [],
                 'visualisierungen': [],
                 'actionable_insights': []
             }
-            
+
+    @staticmethod
+    def _sample_rows(df: 'pd.DataFrame', sampler: Optional['RowSampler'],
+                     timer: StageTimer) -> Optional[str]:
+        if sampler is None:
+            return None
+        with timer.stage('sample'):
+            sampler.update(df)
+            return sampler.to_prompt()[0] or None
+
+    def analyze_data(self, df: 'pd.DataFrame', sampler: Optional['RowSampler'] = None) -> Dict[str, Any]:
+        """Führt Datenanalyse mit Ollama durch, mit `sampler` samt Beispielzeilen im Prompt"""
+        timer = StageTimer(self.metrics)
+        # Basis-Statistiken erstellen
+        with timer.stage('stats'):
+            basic_stats = self.compute_basic_stats(df)
+        sample = self._sample_rows(df, sampler, timer)
+        return self.analyze_stats(basic_stats, timer=timer, sample=sample)
+
+    def analyze_stats(self, basic_stats: Dict[str, Any],
+                      on_token: Optional[Callable[[str], None]] = None,
+                      cancel_event: Optional[threading.Event] = None,
+                      timer: Optional[StageTimer] = None,
+                      sample: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Führt die Analyse auf bereits berechneten Basis-Statistiken durch.
+
+        Mit `on_token` wird die Textanalyse gestreamt, `cancel_event` bricht sie ab
+        (dann wird `GenerationCancelled` ausgelöst). Die Stufen `prompt_build` und
+        `llm_wait` werden in `timer` gemessen (ohne Timer in einem eigenen).
+        `sample` sind Beispielzeilen aus `RowSampler.to_prompt`.
+        """
+        timer = timer if timer is not None else StageTimer(self.metrics)
+        with timer.stage('prompt_build'):
+            prompts = self._build_prompts(basic_stats, sample)
+        llm_metrics = {'analysis': {}, 'recommendations': {}}
+
+        with timer.stage('llm_wait'):
+            # Analyse durchführen
+            analysis_result = self._generate_response(
+                prompts['analysis'], on_token=on_token, cancel_event=cancel_event,
+                metrics=llm_metrics['analysis']
+            )
+
+            # Empfehlungen generieren
+            recommendations_result = self._generate_response(
+                prompts['recommendations'], cancel_event=cancel_event,
+                metrics=llm_metrics['recommendations']
+            )
+
+        return {
+            'basic_stats': basic_stats,
+            'textanalyse': analysis_result,
+            'empfehlungen': self._parse_recommendations(recommendations_result),
+            'llm_metrics': llm_metrics,
+            'stage_seconds': timer.to_dict()
+        }
+
+    def analyze_document(self, content: str, on_token: Optional[Callable[[str], None]] = None,
+                         cancel_event: Optional[threading.Event] = None,
+                         timer: Optional[StageTimer] = None, chunk_tokens: int = 2000,
+                         chunk_overlap: int = 200, max_parallel: int = 4,
+                         max_reduce_levels: int = 4,
+                         encoding_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analysiert Fließtext (z.B. .txt-Dateien ohne Tabellenstruktur).
+
+        Passt der Text nicht in `chunk_tokens`, werden die Abschnitte parallel
+        zusammengefasst und die Zusammenfassungen verdichtet, bis sie in das
+        Budget passen (dasselbe Map-Reduce wie im DocumentAnalyzer). Nur die
+        abschließende Analyse wird über `on_token` gestreamt.
+        """
+        from .chunking import DEFAULT_ENCODING, map_reduce_summaries, split_into_chunks
+
+        encoding_name = encoding_name or DEFAULT_ENCODING
+        timer = timer if timer is not None else StageTimer(self.metrics)
+        with timer.stage('prompt_build'):
+            texts = split_into_chunks(content, chunk_tokens, chunk_overlap, encoding_name)
+        chunk_count = len(texts)
+        llm_metrics = {'analysis': {}}
+
+        with timer.stage('llm_wait'):
+            if chunk_count > 1:
+                content = map_reduce_summaries(
+                    texts,
+                    lambda text: self._generate_response(SUMMARIZATION_PROMPT.format(text=text),
+                                                         cancel_event=cancel_event),
+                    chunk_tokens, max_parallel, max_reduce_levels, encoding_name
+                )
+            analysis_result = self._generate_response(
+                ANALYSIS_PROMPT.format(content=content), on_token=on_token,
+                cancel_event=cancel_event, metrics=llm_metrics['analysis']
+            )
+
+        return {
+            'textanalyse': analysis_result,
+            'empfehlungen': {},
+            'chunk_count': chunk_count,
+            'llm_metrics': llm_metrics,
+            'stage_seconds': timer.to_dict()
+        }
+
+    async def aanalyze_data(self, df: 'pd.DataFrame',
+                            sampler: Optional['RowSampler'] = None) -> Dict[str, Any]:
+        """Führt Datenanalyse asynchron durch, beide Prompts laufen parallel"""
+        timer = StageTimer(self.metrics)
+        with timer.stage('stats'):
+            basic_stats = self.compute_basic_stats(df)
+        sample = self._sample_rows(df, sampler, timer)
+        return await self.aanalyze_stats(basic_stats, timer=timer, sample=sample)
+
+    async def aanalyze_stats(self, basic_stats: Dict[str, Any],
+                             timer: Optional[StageTimer] = None,
+                             sample: Optional[str] = None) -> Dict[str, Any]:
+        """Asynchrone Variante von `analyze_stats`"""
+        timer = timer if timer is not None else StageTimer(self.metrics)
+        with timer.stage('prompt_build'):
+            prompts = self._build_prompts(basic_stats, sample)
+
+        with timer.stage('llm_wait'):
+            analysis_result, recommendations_result = await asyncio.gather(
+                self.agenerate(prompts['analysis']),
+                self.agenerate(prompts['recommendations'])
+            )
+
         return {
             'basic_stats': basic_stats,
             'textanalyse': analysis_result,
-            'empfehlungen': recommendations_dict
-        }
\ No newline at end of file
+            'empfehlungen': self._parse_recommendations(recommendations_result),
+            'stage_seconds': timer.to_dict()
+        }
@@ -1,5 +1,9 @@
 """
 Sammlung von Prompt-Templates für verschiedene Analysetypen.
+
+Feste Anweisungen stehen am Anfang, variable Inhalte am Ende: Ollama kann den
+KV-Cache für einen gleichen Prompt-Anfang wiederverwenden und muss dann nur den
+neuen Teil auswerten.
 """
 
 ANALYSIS_PROMPT = """
@@ -32,6 +36,65 @@ Code:
 Code-Review Ergebnis:
 """
 
+UNIT_REVIEW_PROMPT = """
+Führe ein Code-Review für einen Ausschnitt aus einer Python-Datei durch.
+Beziehe dich nur auf diesen Ausschnitt und achte besonders auf:
+1. Code-Qualität
+2. Best Practices
+3. Mögliche Verbesserungen
+4. Potenzielle Bugs oder Sicherheitsprobleme
+
+Antworte knapp; ohne Befund genügt "Keine Anmerkungen".
+
+Datei: {file_path} ({kind} `{name}`)
+Code:
+```python
+{code}
+```
+
+Code-Review Ergebnis:
+"""
+
+# Datenanalyse im OllamaAgent: PREFIX + STATS (+ SAMPLE) + Aufgabe. Der Prefix ist für alle
+# Dateien gleich, Prefix und Statistik teilen sich Analyse- und Empfehlungs-Prompt
+DATA_ANALYSIS_PREFIX = """Als Data Science Experte analysierst du tabellarische Daten und antwortest auf Deutsch.
+Du erhältst die Basis-Statistiken einer Datei als JSON: Anzahl Zeilen und Spalten,
+Datentypen, fehlende Werte je Spalte und Kennzahlen der numerischen Spalten.
+Falls vorhanden folgen Beispielzeilen als CSV: eine Zufallsstichprobe und auffällige
+Ausreißer, die erste Spalte ist die Zeilennummer in der Datei.
+"""
+
+DATA_STATS_BLOCK = """
+Basis-Statistiken:
+{stats}
+"""
+
+DATA_SAMPLE_BLOCK = """
+Beispielzeilen:
+{sample}
+"""
+
+DATA_ANALYSIS_TASK = """
+Bitte führe eine detaillierte Analyse durch und strukturiere deine Antwort in folgende Abschnitte:
+
+1. Datenübersicht: Beschreibe die grundlegende Struktur und den Inhalt der Daten
+2. Statistische Analyse: Erkläre wichtige statistische Merkmale und Auffälligkeiten
+3. Datenqualität: Bewerte die Qualität und Vollständigkeit der Daten
+4. Muster und Trends: Beschreibe erkennbare Muster oder Trends in den Daten
+
+Gib eine ausführliche, gut strukturierte Analyse in natürlicher Sprache."""
+
+DATA_RECOMMENDATIONS_TASK = """
+Erstelle auf Basis dieser Daten konkrete Empfehlungen.
+
+Antworte in folgendem JSON-Format:
+{
+    'datenverarbeitung': [Liste von Empfehlungen zur Datenverarbeitung],
+    'weitere_analysen': [Liste von vorgeschlagenen weiterführenden Analysen],
+    'visualisierungen': [Liste von empfohlenen Visualisierungen],
+    'actionable_insights': [Liste von konkreten Handlungsempfehlungen]
+}"""
+
 SUMMARIZATION_PROMPT = """
 Fasse den folgenden Text kurz und prägnant zusammen.
 Behalte die wichtigsten Informationen bei und
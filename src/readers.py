@@ -0,0 +1,439 @@
+"""
+Registry der Dateiformate, die der FileProcessor einlesen kann.
+
+Neue Formate werden mit `@register_reader('.endung')` auf einer Unterklasse
+von `TableReader` angemeldet.
+"""
+import csv
+import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+import pandas as pd
+from .streaming_stats import StreamingStats
+
+_READERS: Dict[str, 'TableReader'] = {}
+
+def register_reader(*suffixes: str):
+    """Meldet eine Reader-Klasse für die angegebenen Dateiendungen an"""
+    def decorator(reader_cls: Type['TableReader']) -> Type['TableReader']:
+        reader = reader_cls()
+        for suffix in suffixes:
+            _READERS[suffix.lower()] = reader
+        return reader_cls
+    return decorator
+
+def get_reader(file_path: Union[str, Path]) -> 'TableReader':
+    """Liefert den Reader für eine Datei"""
+    suffix = Path(file_path).suffix.lower()
+    if suffix not in _READERS:
+        raise ValueError(f"Nicht unterstütztes Dateiformat: {suffix}")
+    return _READERS[suffix]
+
+def supported_suffixes() -> Tuple[str, ...]:
+    """Alle Dateiendungen, für die ein Reader registriert ist"""
+    return tuple(sorted(_READERS))
+
+class TableReader:
+    """Basisklasse für tabellarische Formate"""
+
+    # True, wenn `iter_chunks` die Datei wirklich stückweise liest
+    supports_chunks = False
+
+    def read(self, file_path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Liest die komplette Datei (optional nur ausgewählte Spalten)"""
+        raise NotImplementedError
+
+    def iter_chunks(self, file_path: Path, chunk_size: int,
+                    columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Liest die Datei in Chunks, ohne Chunk-Unterstützung als ein Stück"""
+        yield self.read(file_path, columns)
+
+    # True, wenn `profile` nur aus Metadaten rechnet (ohne Quantile, Fingerprint
+    # und Stichprobe); dann lohnt es sich erst für große Dateien
+    profile_from_metadata = False
+
+    def profile(self, file_path: Path, chunk_size: int, sketches: bool = False,
+                moments: bool = False, fingerprint=None, sampler=None) -> Optional[Dict[str, Any]]:
+        """
+        Formatspezifische Statistik ohne Einlesen aller Werte, None wenn nicht möglich.
+
+        `moments` verlangt Mittelwert und Streuung auch dann, wenn sie nur durch
+        Dekodieren der Spalten zu bekommen sind. Liest das Profil die Zeilen,
+        bekommen `fingerprint` und `sampler` sie über `update`; reine
+        Metadaten-Profile lassen beide leer.
+        """
+        return None
+
+    def is_tabular(self, file_path: Path) -> bool:
+        """False, wenn die Datei keine Tabelle enthält (z.B. Fließtext in einer .txt)"""
+        return True
+
+@register_reader('.csv')
+class CsvReader(TableReader):
+    supports_chunks = True
+
+    def read(self, file_path, columns=None):
+        return pd.read_csv(file_path, usecols=columns)
+
+    def iter_chunks(self, file_path, chunk_size, columns=None):
+        with pd.read_csv(file_path, usecols=columns, chunksize=chunk_size) as reader:
+            yield from reader
+
+@register_reader('.txt', '.tsv')
+class DelimitedTextReader(TableReader):
+    """Textdateien mit automatisch erkanntem Trennzeichen"""
+    supports_chunks = True
+
+    # Umfang der Probe, an der Trennzeichen und Spaltenzahl geprüft werden
+    sniff_bytes = 64 * 1024
+    sniff_lines = 50
+
+    def is_tabular(self, file_path):
+        """Tabelle, wenn alle Probezeilen mit demselben Trennzeichen gleich viele (>= 2) Spalten haben"""
+        with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            sample = f.read(self.sniff_bytes)
+        lines = [line for line in sample.splitlines() if line.strip()]
+        if len(sample) == self.sniff_bytes:
+            lines = lines[:-1]  # letzte Zeile ist evtl. abgeschnitten
+        lines = lines[:self.sniff_lines]
+        if len(lines) < 2:
+            return False
+        try:
+            dialect = csv.Sniffer().sniff('\n'.join(lines), delimiters=',;\t|')
+        except csv.Error:
+            return False
+        widths = {len(row) for row in csv.reader(lines, dialect)}
+        return len(widths) == 1 and widths.pop() >= 2
+
+    def read(self, file_path, columns=None):
+        return pd.read_csv(file_path, sep=None, engine='python', usecols=columns)
+
+    def iter_chunks(self, file_path, chunk_size, columns=None):
+        with pd.read_csv(file_path, sep=None, engine='python', usecols=columns,
+                         chunksize=chunk_size) as reader:
+            yield from reader
+
+def _calamine_available() -> bool:
+    try:
+        import python_calamine  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+@register_reader('.xlsx', '.xlsm', '.xls')
+class ExcelReader(TableReader):
+    """
+    Excel-Arbeitsmappen mit allen Tabellenblättern.
+
+    Jede Mappe wird einmal eingelesen und als Parquet-Sidecar je Blatt unter
+    `cache_dir/<sha256>/` abgelegt; weitere Zugriffe auf denselben Inhalt lesen
+    nur noch Parquet. Mappen mit mehreren Blättern werden je Blatt profiliert.
+    """
+
+    # Per `configure_excel` gesetzt: 'calamine', 'openpyxl', ... oder 'auto'
+    engine = 'auto'
+    cache_dir: Optional[Path] = None
+    max_workers = 4
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def _engine(self) -> Optional[str]:
+        if self.engine == 'auto':
+            return 'calamine' if _calamine_available() else None
+        return self.engine
+
+    def _content_hash(self, file_path: Path) -> str:
+        # Hash je (Pfad, Größe, mtime) merken: profile und read hashen nur einmal
+        stat = file_path.stat()
+        key = (str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if key not in self._hashes:
+                from .manifest import FileManifest
+                self._hashes = {key: FileManifest.hash_file(file_path)}
+            return self._hashes[key]
+
+    def _read_workbook(self, file_path: Path) -> Dict[str, pd.DataFrame]:
+        """Liest alle Blätter; mit calamine parallel, je Blatt ein eigener Leser"""
+        engine = self._engine()
+        if engine != 'calamine':
+            # openpyxl parst in Python (GIL): alle Blätter in einem Durchgang
+            return pd.read_excel(file_path, sheet_name=None, engine=engine)
+        sheet_names = pd.ExcelFile(file_path, engine=engine).sheet_names
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(sheet_names)))) as executor:
+            frames = executor.map(
+                lambda name: pd.read_excel(file_path, sheet_name=name, engine=engine), sheet_names
+            )
+            return dict(zip(sheet_names, frames))
+
+    def _sidecar(self, file_path: Path) -> Optional[Path]:
+        return self.cache_dir / self._content_hash(file_path) if self.cache_dir is not None else None
+
+    def _write_sidecar(self, sidecar: Path, sheets: Dict[str, pd.DataFrame]) -> None:
+        """Schreibt alle Blätter als Parquet; gemischte Spalten verhindern das Caching"""
+        import pyarrow as pa
+
+        # Eigenes Temp-Verzeichnis je Schreibvorgang, fertig per Umbenennen
+        tmp = Path(tempfile.mkdtemp(prefix=sidecar.name, dir=sidecar.parent))
+        try:
+            manifest = []
+            for index, (name, df) in enumerate(sheets.items()):
+                file_name = f"sheet_{index}.parquet"
+                df.to_parquet(tmp / file_name, index=False)
+                manifest.append({'name': str(name), 'file': file_name})
+            (tmp / 'sheets.json').write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+        except (pa.ArrowException, ValueError, TypeError, OSError) as e:
+            print(f"Excel-Cache nicht geschrieben: {str(e)}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        try:
+            tmp.replace(sidecar)
+        except OSError:
+            # Ein anderer Worker hat dieselbe Mappe gerade konvertiert
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def read_sheets(self, file_path: Path, first_only: bool = False,
+                    columns: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Alle Blätter (oder nur das erste) aus dem Parquet-Sidecar, sonst aus der Mappe"""
+        file_path = Path(file_path)
+        sidecar = self._sidecar(file_path)
+        if sidecar is not None and (sidecar / 'sheets.json').exists():
+            import pyarrow.parquet as pq
+
+            manifest = json.loads((sidecar / 'sheets.json').read_text(encoding='utf-8'))
+            if first_only:
+                manifest = manifest[:1]
+            return {
+                entry['name']: pq.read_table(str(sidecar / entry['file']), columns=columns,
+                                             memory_map=True).to_pandas()
+                for entry in manifest
+            }
+
+        sheets = self._read_workbook(file_path)
+        if sidecar is not None:
+            self._write_sidecar(sidecar, sheets)
+        if first_only:
+            sheets = dict(list(sheets.items())[:1])
+        if columns is not None:
+            sheets = {name: df[columns] for name, df in sheets.items()}
+        return sheets
+
+    def read(self, file_path, columns=None):
+        return next(iter(self.read_sheets(file_path, first_only=True, columns=columns).values()))
+
+    def profile(self, file_path, chunk_size, sketches=False, moments=False,
+                fingerprint=None, sampler=None):
+        if self.cache_dir is None:
+            # Ohne Cache nur die Blattnamen lesen, damit `read` die Mappe nicht doppelt parst
+            if len(pd.ExcelFile(file_path, engine=self._engine()).sheet_names) <= 1:
+                return None
+        sheets = self.read_sheets(file_path)
+        if len(sheets) <= 1:
+            # Ein Blatt: normaler Weg mit exakter Statistik über `read`
+            return None
+        per_sheet, columns = {}, []
+        for name, df in sheets.items():
+            per_sheet[name] = StreamingStats.from_chunks([df], sketches=sketches).to_basic_stats()
+            columns.extend(column for column in per_sheet[name]['columns'] if column not in columns)
+            # Fingerprint über die Zeilen aller Blätter; die Stichprobe nur aus
+            # Blättern mit den Spalten des ersten, damit sie eine Kopfzeile hat
+            if fingerprint is not None:
+                fingerprint.update(df)
+            if sampler is not None and (sampler.columns is None
+                                        or [str(column) for column in df.columns] == sampler.columns):
+                sampler.update(df)
+        return {
+            'sheet_count': len(per_sheet),
+            'row_count': sum(stats['row_count'] for stats in per_sheet.values()),
+            'column_count': len(columns),
+            'columns': columns,
+            'sheets': per_sheet
+        }
+
+def configure_excel(engine: str = 'auto', cache_dir: Optional[Union[str, Path]] = None,
+                    max_workers: int = 4) -> None:
+    """
+    Stellt das Einlesen von Excel-Mappen ein.
+
+    Args:
+        engine: pandas-Engine, 'auto' wählt calamine, falls python-calamine installiert ist
+        cache_dir: Verzeichnis für die Parquet-Sidecars, None deaktiviert den Cache
+        max_workers: Gleichzeitig gelesene Blätter (nur calamine)
+    """
+    if cache_dir is not None:
+        try:
+            import pyarrow  # noqa: F401
+            cache_dir = Path(cache_dir)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        except ImportError:
+            cache_dir = None
+    ExcelReader.engine = engine
+    ExcelReader.cache_dir = cache_dir
+    ExcelReader.max_workers = max(1, int(max_workers))
+
+@register_reader('.json', '.ndjson', '.jsonl')
+class JsonReader(TableReader):
+    """JSON-Arrays sowie zeilenweises JSON (NDJSON), letzteres wird gestreamt"""
+    supports_chunks = True
+
+    @staticmethod
+    def _is_ndjson(file_path: Path) -> bool:
+        if file_path.suffix.lower() in ('.ndjson', '.jsonl'):
+            return True
+        with open(file_path, 'r', encoding='utf-8') as f:
+            first_line = f.readline().strip()
+        try:
+            return isinstance(json.loads(first_line), dict)
+        except json.JSONDecodeError:
+            return False
+
+    def read(self, file_path, columns=None):
+        df = pd.read_json(file_path, lines=self._is_ndjson(file_path))
+        return df[columns] if columns is not None else df
+
+    def iter_chunks(self, file_path, chunk_size, columns=None):
+        if not self._is_ndjson(file_path):
+            yield self.read(file_path, columns)
+            return
+        with pd.read_json(file_path, lines=True, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk[columns] if columns is not None else chunk
+
+@register_reader('.feather', '.arrow')
+class FeatherReader(TableReader):
+    """Arrow-IPC-Dateien, per Memory-Mapping und nur mit den benötigten Spalten gelesen"""
+    supports_chunks = True
+
+    def read(self, file_path, columns=None):
+        from pyarrow import feather
+        return feather.read_table(str(file_path), columns=columns, memory_map=True).to_pandas()
+
+    def iter_chunks(self, file_path, chunk_size, columns=None):
+        import pyarrow as pa
+
+        with pa.memory_map(str(file_path), 'r') as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                yield batch.to_pandas()
+
+@register_reader('.parquet')
+class ParquetReader(TableReader):
+    """Parquet-Dateien; Zeilenzahl, Nullwerte, Minimum und Maximum kommen aus den Row-Group-Metadaten"""
+    supports_chunks = True
+    profile_from_metadata = True
+
+    def read(self, file_path, columns=None):
+        import pyarrow.parquet as pq
+        return pq.read_table(str(file_path), columns=columns, memory_map=True).to_pandas()
+
+    def iter_chunks(self, file_path, chunk_size, columns=None):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(str(file_path), memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+
+    def profile(self, file_path, chunk_size, sketches=False, moments=False,
+                fingerprint=None, sampler=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(str(file_path), memory_map=True)
+        metadata = parquet_file.metadata
+        schema = parquet_file.schema_arrow
+        columns = schema.names
+        numeric = {
+            field.name for field in schema
+            if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+        }
+
+        # Nullwerte, Minimum und Maximum je Spalte aus den Row-Group-Statistiken.
+        # Die Statistik gehört zu den Blattspalten: verschachtelte Felder (struct,
+        # list, map) bestehen aus mehreren davon und werden dekodiert
+        leaves = {metadata.schema.column(i).path: i for i in range(metadata.num_columns)}
+        nested = [field.name for field in schema if pa.types.is_nested(field.type)]
+        null_counts: Dict[str, Optional[int]] = {}
+        bounds: Dict[str, Optional[Tuple[Any, Any]]] = {}
+        for name in columns:
+            index = None if name in nested else leaves.get(name)
+            nulls, low, high = None, None, None
+            usable = index is not None
+            if index is not None:
+                nulls = 0
+                for row_group in range(metadata.num_row_groups):
+                    group = metadata.row_group(row_group)
+                    statistics = group.column(index).statistics
+                    if statistics is None or not statistics.has_null_count:
+                        nulls, usable = None, False
+                        break
+                    nulls += statistics.null_count
+                    if name not in numeric or statistics.null_count == group.num_rows:
+                        continue
+                    if not statistics.has_min_max:
+                        usable = False
+                        continue
+                    low = statistics.min if low is None else min(low, statistics.min)
+                    high = statistics.max if high is None else max(high, statistics.max)
+            null_counts[name] = nulls
+            bounds[name] = (low, high) if name in numeric and usable else None
+
+        # Dekodiert werden nur Spalten ohne brauchbare Statistik, verschachtelte
+        # Spalten (nur Nullwerte) und numerische Spalten, wenn Mittelwert und
+        # Streuung (moments) oder Sketches verlangt sind
+        decode = [
+            name for name in columns
+            if name not in nested and (null_counts[name] is None
+                                       or (name in numeric and (bounds[name] is None or moments or sketches)))
+        ]
+
+        decoded = StreamingStats(sketches=sketches)
+        if decode or nested:
+            nested_nulls = dict.fromkeys(nested, 0)
+            for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=decode + nested):
+                for name in nested:
+                    nested_nulls[name] += batch.column(name).null_count
+                if decode:
+                    decoded.update(batch.select(decode).to_pandas())
+            null_counts.update(nested_nulls)
+        decoded_stats = decoded.to_basic_stats()
+
+        empty_dtypes = schema.empty_table().to_pandas().dtypes
+        dtypes, missing, summary = {}, {}, {}
+        for name in columns:
+            if name in decoded.accumulators:
+                dtypes[name] = decoded_stats['dtypes'][name]
+                missing[name] = decoded_stats['missing_values'][name]
+                if name in decoded_stats['numeric_summary']:
+                    summary[name] = decoded_stats['numeric_summary'][name]
+                continue
+            dtypes[name] = str(empty_dtypes[name])
+            missing[name] = null_counts[name]
+            if bounds.get(name) is not None:
+                # Ohne Dekodieren gibt es keinen Mittelwert und keine Streuung
+                low, high = bounds[name]
+                summary[name] = {
+                    'count': float(metadata.num_rows - missing[name]),
+                    'min': float('nan') if low is None else low,
+                    'max': float('nan') if high is None else high
+                }
+
+        stats = {
+            'row_count': metadata.num_rows,
+            'column_count': len(columns),
+            'columns': columns,
+            'dtypes': dtypes,
+            'missing_values': missing,
+            'numeric_summary': summary if metadata.num_rows else {}
+        }
+        if sketches:
+            stats['distinct_counts'] = decoded_stats['distinct_counts']
+            stats['approximation'] = decoded_stats['approximation']
+        return stats
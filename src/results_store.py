@@ -0,0 +1,212 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+class ResultStore:
+    """Append-only Ablage aller Analyseergebnisse in SQLite, indiziert nach Datei, Hash und Zeit"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, batch_size: int = 100,
+                 flush_interval: Optional[float] = 2.0):
+        """
+        Initialisiert den Store.
+
+        Args:
+            path: Pfad zur SQLite-Datei, ohne Pfad nur im Speicher
+            batch_size: Ab so vielen gepufferten Ergebnissen wird sofort geschrieben
+            flush_interval: Sekunden, nach denen ein Hintergrund-Thread den Puffer
+                spätestens schreibt, None schreibt nur bei vollem Puffer und `flush`
+        """
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._on_committed: List[Callable[[], Any]] = []
+        self._db = sqlite3.connect(str(path) if path is not None else ':memory:',
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_name TEXT NOT NULL,
+                file_path TEXT,
+                sha256 TEXT,
+                status TEXT NOT NULL,
+                created REAL NOT NULL,
+                result TEXT NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_file_name ON results(file_name, created)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_sha256 ON results(sha256)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_created ON results(created)")
+        self._db.commit()
+
+        self._stop = threading.Event()
+        self._flusher = None
+        if flush_interval:
+            self._flusher = threading.Thread(target=self._flush_periodically,
+                                             name='results-flush', daemon=True)
+            self._flusher.start()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ResultStore':
+        """Erstellt den Store aus dem Abschnitt `results` der settings.yaml"""
+        settings = config.get('results') or {}
+        return cls(
+            path=settings.get('path'),
+            batch_size=settings.get('batch_size', 100),
+            flush_interval=settings.get('flush_interval_seconds', 2.0)
+        )
+
+    def append(self, result: Dict[str, Any], file_path: Optional[Union[str, Path]] = None,
+               sha256: Optional[str] = None,
+               on_committed: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Puffert ein Ergebnis; geschrieben wird gesammelt in einer Transaktion.
+
+        Args:
+            result: Ergebnis-Dict von `FileProcessor.process_file`
+            file_path: Pfad der analysierten Datei
+            sha256: Inhalts-Hash der Datei (z.B. aus dem Manifest)
+            on_committed: Wird aufgerufen, sobald die Transaktion mit diesem
+                Ergebnis festgeschrieben ist (z.B. um die Datei im Manifest
+                als erledigt zu markieren); schlägt das Schreiben fehl, erst
+                nach einem späteren erfolgreichen Flush
+        """
+        row = (
+            result.get('file_name') or Path(file_path).name,
+            str(Path(file_path).resolve()) if file_path is not None else None,
+            sha256,
+            result.get('status', 'error'),
+            time.time(),
+            json.dumps(result, ensure_ascii=False, default=str)
+        )
+        with self._lock:
+            self._pending.append(row)
+            if on_committed is not None:
+                self._on_committed.append(on_committed)
+            if len(self._pending) < self.batch_size:
+                return
+            callbacks = self._write_pending()
+        self._run_callbacks(callbacks)
+
+    def _write_pending(self) -> List[Callable[[], Any]]:
+        """Schreibt den Puffer, gibt die danach fälligen Callbacks zurück"""
+        # Aufrufer hält self._lock
+        if not self._pending:
+            return []
+        # Eine Transaktion je Batch: entweder alle Zeilen oder keine. Der Puffer
+        # wird erst nach dem Commit geleert, bei einem Fehler bleibt er für den
+        # nächsten Versuch stehen
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO results (file_name, file_path, sha256, status, created, result) "
+                "VALUES (?, ?, ?, ?, ?, ?)", self._pending
+            )
+        callbacks, self._on_committed = self._on_committed, []
+        self._pending = []
+        return callbacks
+
+    @staticmethod
+    def _run_callbacks(callbacks: List[Callable[[], Any]]) -> None:
+        # Außerhalb des Locks: Callbacks dürfen selbst schreiben (z.B. ins Manifest)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Fehler nach dem Speichern eines Ergebnisses: {str(e)}")
+
+    def flush(self) -> None:
+        """Schreibt alle gepufferten Ergebnisse"""
+        with self._lock:
+            callbacks = self._write_pending()
+        self._run_callbacks(callbacks)
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Ergebnisse konnten nicht geschrieben werden: {str(e)}")
+
+    def query(self, file_name: Optional[str] = None, sha256: Optional[str] = None,
+              status: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """
+        Sucht gespeicherte Ergebnisse, neueste zuerst.
+
+        Args:
+            file_name: Nur Ergebnisse zu diesem Dateinamen
+            sha256: Nur Ergebnisse zu diesem Inhalts-Hash
+            status: Nur Ergebnisse mit diesem Status
+            since: Frühester Zeitpunkt (Unix-Zeit)
+            until: Spätester Zeitpunkt (Unix-Zeit)
+            limit: Maximale Anzahl, None für alle
+
+        Returns:
+            Liste der Ergebnis-Dicts, ergänzt um `_stored` (id, Pfad, Hash, Zeit)
+        """
+        conditions, params = [], []
+        for column, value in (('file_name', file_name), ('sha256', sha256), ('status', status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created <= ?")
+            params.append(until)
+
+        sql = "SELECT id, file_path, sha256, created, result FROM results"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            callbacks = self._write_pending()
+            rows = self._db.execute(sql, params).fetchall()
+        self._run_callbacks(callbacks)
+
+        results = []
+        for row_id, file_path, row_sha256, created, result in rows:
+            record = json.loads(result)
+            record['_stored'] = {'id': row_id, 'file_path': file_path,
+                                 'sha256': row_sha256, 'created': created}
+            results.append(record)
+        return results
+
+    def latest(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """Das neueste Ergebnis zu einem Dateinamen"""
+        results = self.query(file_name=file_name, limit=1)
+        return results[0] if results else None
+
+    def find_by_hash(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Das neueste erfolgreiche Ergebnis zu einem Inhalts-Hash"""
+        results = self.query(sha256=sha256, status='success', limit=1)
+        return results[0] if results else None
+
+    def count(self) -> int:
+        """Anzahl gespeicherter Ergebnisse"""
+        with self._lock:
+            callbacks = self._write_pending()
+            count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        self._run_callbacks(callbacks)
+        return count
+
+    def close(self) -> None:
+        """Schreibt den Puffer und schließt die Datenbank"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            callbacks = self._write_pending()
+            self._db.close()
+        self._run_callbacks(callbacks)
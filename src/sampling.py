@@ -0,0 +1,313 @@
+"""
+Repräsentative Beispielzeilen für den Analyse-Prompt.
+
+Die Basis-Statistiken zeigen dem Modell keine echten Zeilen, eine komplette
+Tabelle sprengt dagegen das Kontextfenster. `RowSampler` zieht in einem
+Durchlauf über die Chunks eine Zufallsstichprobe fester Größe (optional
+geschichtet nach einer kategorialen Spalte) und merkt sich die auffälligsten
+Ausreißer. `to_prompt` kürzt beides auf ein Token-Budget, die Prompt-Größe
+hängt damit nicht von der Dateigröße ab.
+"""
+import csv
+import io
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .chunking import DEFAULT_ENCODING, token_counter
+
+_EMPTY_STRATUM = '<leer>'
+_OTHER_STRATA = '<sonstige>'
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+def _format_cell(value: Any, max_chars: int) -> str:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.6g}"
+    text = str(value).replace('\n', ' ')
+    return text if len(text) <= max_chars else text[:max_chars - 1] + '…'
+
+class RowSampler:
+    """
+    Zufallsstichprobe und Ausreißer einer Tabelle in einem Durchlauf.
+
+    Jede Zeile erhält einen zufälligen Schlüssel, behalten werden je Schicht die
+    `max_rows` Zeilen mit den kleinsten Schlüsseln. Das entspricht Reservoir
+    Sampling, lässt sich aber pro Chunk vektorisiert berechnen: ist das
+    Reservoir voll, kommen nur Zeilen unter dem bisher größten Schlüssel in
+    Frage. Ausreißer sind Zeilen mit einem |z|-Wert ab `outlier_zscore` in einer
+    numerischen Spalte; Mittelwert und Standardabweichung laufen mit, am Ende
+    wird mit den endgültigen Werten neu bewertet.
+    """
+
+    def __init__(self, max_rows: int = 1000, max_tokens: int = 1500,
+                 stratify_by: Optional[str] = None, max_strata: int = 20,
+                 outlier_zscore: float = 4.0, max_outliers: int = 20,
+                 outlier_share: float = 0.25, max_cell_chars: int = 60, seed: int = 0,
+                 count_tokens: Optional[Callable[[str], int]] = None,
+                 encoding_name: str = DEFAULT_ENCODING):
+        """
+        Initialisiert den Sampler.
+
+        Args:
+            max_rows: Größe der Stichprobe (je Schicht höchstens so viele Zeilen)
+            max_tokens: Token-Budget der Beispielzeilen im Prompt
+            stratify_by: Spalte, nach deren Werten geschichtet wird; "auto" wählt
+                die erste Textspalte mit höchstens `max_strata` Werten im ersten Chunk
+            max_strata: Weitere Werte der Schichtspalte landen in einer Sammelschicht
+            outlier_zscore: Ab diesem |z|-Wert gilt eine Zeile als Ausreißer, 0 schaltet ab
+            max_outliers: Höchstzahl gemerkter Ausreißer
+            outlier_share: Höchster Anteil der Ausreißer am Token-Budget
+            max_cell_chars: Längere Zellen werden im Prompt gekürzt
+            seed: Startwert des Zufallsgenerators; gleiche Datei, gleiche Stichprobe
+                (und damit Treffer im Antwort-Cache)
+            count_tokens: Zählfunktion für Tokens, Standard ist tiktoken
+            encoding_name: tiktoken-Encoding für die Standard-Zählfunktion
+        """
+        if max_rows < 1:
+            raise ValueError("max_rows muss mindestens 1 sein")
+        self.max_rows = max_rows
+        self.max_tokens = max_tokens
+        self.stratify_by = stratify_by
+        self.max_strata = max_strata
+        self.outlier_zscore = outlier_zscore
+        self.max_outliers = max_outliers
+        self.outlier_share = outlier_share
+        self.max_cell_chars = max_cell_chars
+        self.count_tokens = count_tokens
+        self.encoding_name = encoding_name
+        self._rng = np.random.default_rng(seed)
+
+        self.rows_seen = 0
+        self.columns: Optional[List[str]] = None
+        # Reservoir: Zeilen samt Zeilennummer, Schlüssel und Schicht
+        self._rows: Optional[pd.DataFrame] = None
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0)
+        self._strata = np.empty(0, dtype=object)
+        self._thresholds: Dict[str, float] = {}
+        # Ausreißer-Kandidaten und laufende Momente je numerischer Spalte
+        self._outliers: Optional[pd.DataFrame] = None
+        self._outlier_ids = np.empty(0, dtype=np.int64)
+        self._moments: Dict[str, Tuple[int, float, float]] = {}
+
+    def _choose_stratum_column(self, chunk: pd.DataFrame) -> Optional[str]:
+        """Erste Text-, Kategorie- oder Bool-Spalte mit wenigen verschiedenen Werten"""
+        for column in chunk.columns:
+            series = chunk[column]
+            if _is_numeric(series) or pd.api.types.is_datetime64_any_dtype(series.dtype):
+                continue
+            distinct = series.nunique()
+            if 1 < distinct <= self.max_strata and distinct < len(series) / 2:
+                return column
+        return None
+
+    def _strata_of(self, chunk: pd.DataFrame) -> np.ndarray:
+        if self.stratify_by is None or self.stratify_by not in chunk.columns:
+            return np.full(len(chunk), '', dtype=object)
+        values = chunk[self.stratify_by]
+        labels = values.astype(object).where(values.notna(), _EMPTY_STRATUM).astype(str).to_numpy(dtype=object)
+        # Schichten in der Reihenfolge ihres Auftretens, der Rest wird zusammengefasst
+        for label in pd.unique(labels):
+            if label not in self._thresholds and len(self._thresholds) < self.max_strata:
+                self._thresholds[label] = 1.0
+        known = pd.Series(labels).isin(list(self._thresholds)).to_numpy()
+        if not known.all():
+            labels = np.where(known, labels, _OTHER_STRATA)
+            self._thresholds.setdefault(_OTHER_STRATA, 1.0)
+        return labels
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Verarbeitet einen DataFrame-Chunk"""
+        if chunk.empty:
+            return
+        if self.columns is None:
+            self.columns = [str(column) for column in chunk.columns]
+            if self.stratify_by == 'auto':
+                self.stratify_by = self._choose_stratum_column(chunk)
+        chunk = chunk.reset_index(drop=True)
+        row_ids = np.arange(self.rows_seen, self.rows_seen + len(chunk), dtype=np.int64)
+        self.rows_seen += len(chunk)
+
+        self._sample(chunk, row_ids)
+        if self.outlier_zscore:
+            self._find_outliers(chunk, row_ids)
+
+    def _sample(self, chunk: pd.DataFrame, row_ids: np.ndarray) -> None:
+        keys = self._rng.random(len(chunk))
+        strata = self._strata_of(chunk)
+        # Nur Zeilen unter dem größten Schlüssel ihrer (vollen) Schicht kommen in Frage
+        thresholds = pd.Series(strata).map(self._thresholds).fillna(1.0).to_numpy()
+        mask = keys < thresholds
+        if not mask.any():
+            return
+
+        rows = chunk[mask]
+        if self._rows is None:
+            self._rows = rows.reset_index(drop=True)
+        else:
+            self._rows = pd.concat([self._rows, rows], ignore_index=True)
+        self._row_ids = np.concatenate([self._row_ids, row_ids[mask]])
+        self._keys = np.concatenate([self._keys, keys[mask]])
+        self._strata = np.concatenate([self._strata, strata[mask]])
+
+        ranked = pd.DataFrame({'key': self._keys, 'stratum': self._strata}).sort_values('key')
+        keep = np.sort(ranked.groupby('stratum', sort=False).head(self.max_rows).index.to_numpy())
+        self._rows = self._rows.iloc[keep].reset_index(drop=True)
+        self._row_ids, self._keys, self._strata = self._row_ids[keep], self._keys[keep], self._strata[keep]
+
+        full = pd.Series(self._keys).groupby(self._strata).agg(['size', 'max'])
+        for stratum, (size, largest) in full.iterrows():
+            self._thresholds[stratum] = largest if size >= self.max_rows else 1.0
+
+    def _update_moments(self, column: str, values: np.ndarray) -> Tuple[float, float]:
+        """Führt die Momente eines Chunks hinein (Chan et al.), gibt Mittelwert und Std zurück"""
+        count, mean, m2 = self._moments.get(column, (0, 0.0, 0.0))
+        chunk_count = len(values)
+        if chunk_count:
+            chunk_mean = float(values.mean())
+            chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+            total = count + chunk_count
+            delta = chunk_mean - mean
+            mean += delta * chunk_count / total
+            m2 += chunk_m2 + delta * delta * count * chunk_count / total
+            count = total
+            self._moments[column] = (count, mean, m2)
+        return mean, float(np.sqrt(m2 / (count - 1))) if count > 1 else 0.0
+
+    def _zscores(self, frame: pd.DataFrame, moments: Dict[str, Tuple[float, float]]) -> pd.DataFrame:
+        scores = {}
+        for column, (mean, std) in moments.items():
+            if std > 0 and column in frame.columns:
+                values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                scores[column] = np.abs(values - mean) / std
+        return pd.DataFrame(scores, index=frame.index)
+
+    def _find_outliers(self, chunk: pd.DataFrame, row_ids: np.ndarray) -> None:
+        moments = {}
+        for column in chunk.columns:
+            if _is_numeric(chunk[column]):
+                values = chunk[column].dropna().to_numpy(dtype=np.float64)
+                moments[column] = self._update_moments(column, values)
+        scores = self._zscores(chunk, moments)
+        if scores.empty:
+            return
+        mask = (scores.max(axis=1) >= self.outlier_zscore).to_numpy()
+        if not mask.any():
+            return
+
+        candidates = chunk[mask]
+        if self._outliers is None:
+            self._outliers = candidates.reset_index(drop=True)
+        else:
+            self._outliers = pd.concat([self._outliers, candidates], ignore_index=True)
+        self._outlier_ids = np.concatenate([self._outlier_ids, row_ids[mask]])
+        if len(self._outliers) > 4 * self.max_outliers:
+            # Nur die stärksten Kandidaten behalten, am Ende wird neu bewertet
+            self._keep_strongest_outliers(4 * self.max_outliers)
+
+    def _final_moments(self) -> Dict[str, Tuple[float, float]]:
+        return {
+            column: (mean, float(np.sqrt(m2 / (count - 1))) if count > 1 else 0.0)
+            for column, (count, mean, m2) in self._moments.items()
+        }
+
+    def _keep_strongest_outliers(self, limit: int) -> pd.DataFrame:
+        """Bewertet die Kandidaten mit den aktuellen Momenten, gibt die Scores der behaltenen zurück"""
+        scores = self._zscores(self._outliers, self._final_moments())
+        strongest = scores.max(axis=1).fillna(0.0)
+        keep = strongest[strongest >= self.outlier_zscore].sort_values(ascending=False).index[:limit]
+        self._outliers = self._outliers.loc[keep].reset_index(drop=True)
+        self._outlier_ids = self._outlier_ids[keep.to_numpy()]
+        return scores.loc[keep].reset_index(drop=True)
+
+    def _csv_line(self, values: List[Any]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerow(
+            [_format_cell(value, self.max_cell_chars) for value in values]
+        )
+        return buffer.getvalue()
+
+    def _take(self, lines: List[Tuple[int, str]], budget: int, counter: Callable[[str], int]
+              ) -> Tuple[List[Tuple[int, str]], int]:
+        """Übernimmt Zeilen der Reihe nach, bis das Budget erreicht ist"""
+        taken, used = [], 0
+        for row_id, line in lines:
+            tokens = counter(line)
+            if used + tokens > budget:
+                break
+            taken.append((row_id, line))
+            used += tokens
+        return taken, used
+
+    def _sample_order(self) -> List[int]:
+        """Positionen im Reservoir: reihum aus allen Schichten, je Schicht in Schlüsselreihenfolge"""
+        ranked = pd.DataFrame({'key': self._keys, 'stratum': self._strata}).sort_values('key')
+        ranked['round'] = ranked.groupby('stratum', sort=False).cumcount()
+        return ranked.sort_values(['round', 'key']).index[:self.max_rows].tolist()
+
+    def to_prompt(self) -> Tuple[str, Dict[str, Any]]:
+        """
+        Gibt die Beispielzeilen als CSV-Text für den Prompt zurück.
+
+        Zuerst werden Ausreißer (höchstens `outlier_share` des Budgets), dann die
+        Stichprobe übernommen, bis `max_tokens` erreicht ist. Bei geschichteter
+        Stichprobe kommen die Schichten reihum dran, damit auch seltene Werte
+        im gekürzten Prompt landen.
+
+        Returns:
+            Tupel aus Text (leer ohne Zeilen) und Bericht mit der Anzahl Zeilen,
+            Ausreißer, Tokens und der Schichtspalte
+        """
+        info = {'rows': 0, 'outliers': 0, 'tokens': 0, 'rows_seen': self.rows_seen,
+                'stratified_by': self.stratify_by}
+        if self._rows is None or self.columns is None:
+            return '', info
+        counter = self.count_tokens or token_counter(self.encoding_name)
+
+        outlier_lines = []
+        if self._outliers is not None and len(self._outliers):
+            scores = self._keep_strongest_outliers(self.max_outliers)
+            for position, row in enumerate(self._outliers.itertuples(index=False)):
+                flagged = scores.iloc[position].dropna()
+                flagged = flagged[flagged >= self.outlier_zscore].sort_values(ascending=False)
+                reason = '; '.join(f"{column} z={score:.1f}" for column, score in flagged.items())
+                row_id = int(self._outlier_ids[position])
+                outlier_lines.append((row_id, self._csv_line([row_id + 1, *row, reason])))
+        outlier_ids = set(self._outlier_ids.tolist())
+
+        sample_lines = []
+        for position in self._sample_order():
+            row_id = int(self._row_ids[position])
+            if row_id not in outlier_ids:
+                sample_lines.append((row_id, self._csv_line([row_id + 1, *self._rows.iloc[position]])))
+
+        stratified = f", geschichtet nach '{self.stratify_by}'" if self.stratify_by else ''
+        sample_title = f"Zufallsstichprobe: {{}} von {self.rows_seen} Zeilen{stratified}\n"
+        outlier_title = f"Ausreißer (|z| >= {self.outlier_zscore:g}): {{}} Zeilen\n"
+        sample_header = self._csv_line(['#', *self.columns])
+        outlier_header = self._csv_line(['#', *self.columns, 'auffällig'])
+
+        # Überschriften mit der größtmöglichen Anzahl vorab vom Budget abziehen
+        outlier_overhead = counter(outlier_title.format(self.max_outliers)) + counter(outlier_header)
+        budget = (self.max_tokens - counter(sample_title.format(self.max_rows)) - counter(sample_header)
+                  - (outlier_overhead if outlier_lines else 0))
+        outliers, used = self._take(outlier_lines, int(budget * self.outlier_share), counter)
+        if not outliers:
+            budget += outlier_overhead if outlier_lines else 0
+        sample, _ = self._take(sample_lines, budget - used, counter)
+
+        parts = []
+        if sample:
+            parts.append(sample_title.format(len(sample)))
+            parts.append(sample_header)
+            parts.extend(line for _, line in sorted(sample))
+        if outliers:
+            parts.append(outlier_title.format(len(outliers)))
+            parts.append(outlier_header)
+            parts.extend(line for _, line in sorted(outliers))
+        text = ''.join(parts).rstrip('\n')
+        info.update({'rows': len(sample), 'outliers': len(outliers), 'tokens': counter(text) if text else 0})
+        return text, info
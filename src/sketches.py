@@ -0,0 +1,168 @@
+"""
+Mergebare Sketches für approximative Statistiken auf sehr großen Spalten.
+"""
+import math
+from typing import List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """Hasht die Nicht-Null-Werte einer Spalte typunabhängig auf uint64"""
+    values = values.dropna()
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        # int und float mit gleichem Wert sollen denselben Hash bekommen
+        return pd.util.hash_array(values.to_numpy(dtype=np.float64))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+class KLLSketch:
+    """
+    KLL-Quantil-Sketch (Karnin, Lang, Liberty 2016).
+
+    Der Speicherbedarf ist unabhängig von der Anzahl der Werte etwa 3*k Zahlen.
+    Der normalisierte Rangfehler einer einzelnen Quantilabfrage liegt mit
+    99% Wahrscheinlichkeit unter `rank_error()` (≈1.3% für k=200).
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def rank_error(self) -> float:
+        """Näherung für den normalisierten Rangfehler (99% Konfidenz)"""
+        return 2.296 / self.k ** 0.9723
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: Sequence[float]) -> None:
+        """Fügt einen Block von Werten hinzu (NaN wird ignoriert)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """Führt einen zweiten Sketch hinein"""
+        if other.count == 0:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # Bei ungerader Anzahl bleibt ein Element auf dieser Ebene
+                keep = items[:1] if len(items) % 2 else items[:0]
+                items = items[len(keep):]
+                offset = int(self._rng.integers(2))
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], items[offset::2]])
+                self._levels[level] = keep
+                # Neue Ebene verschiebt die Kapazitäten, daher von vorn prüfen
+                level = 0
+                continue
+            level += 1
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Liefert approximative Quantile für die Anteile in `qs`"""
+        if self.count == 0:
+            return [float('nan')] * len(qs)
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2 ** level, dtype=np.float64)
+            for level, level_items in enumerate(self._levels)
+        ])
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        results = []
+        for q in qs:
+            if q <= 0:
+                results.append(self.min)
+            elif q >= 1:
+                results.append(self.max)
+            else:
+                idx = int(np.searchsorted(cumulative, q * cumulative[-1], side='left'))
+                results.append(float(items[min(idx, len(items) - 1)]))
+        return results
+
+    def quantile(self, q: float) -> float:
+        """Liefert ein einzelnes approximatives Quantil"""
+        return self.quantiles([q])[0]
+
+class HyperLogLog:
+    """
+    HyperLogLog-Sketch für die Anzahl unterschiedlicher Werte.
+
+    Der relative Standardfehler beträgt 1.04 / sqrt(2**precision)
+    (≈0.8% bei precision=14, 16 KiB Speicher).
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision muss zwischen 4 und 18 liegen")
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def relative_error(self) -> float:
+        """Relativer Standardfehler der Schätzung"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """Fügt bereits gehashte uint64-Werte hinzu"""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << remaining_bits) - 1)
+        # Bitlänge je 32-Bit-Hälfte per frexp, exakt für jede Präzision
+        # (float64 stellt nur Werte < 2**53 sicher exakt dar)
+        high = rest >> np.uint64(32)
+        _, high_length = np.frexp(high.astype(np.float64))
+        _, low_length = np.frexp((rest & np.uint64(0xFFFFFFFF)).astype(np.float64))
+        bit_length = np.where(high > 0, high_length + 32, low_length)
+        rank = (remaining_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def update(self, values: pd.Series) -> None:
+        """Fügt die Nicht-Null-Werte einer Spalte hinzu"""
+        self.update_hashes(hash_values(values))
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Führt einen zweiten Sketch gleicher Präzision hinein"""
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog-Sketches mit unterschiedlicher Präzision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """Schätzt die Anzahl unterschiedlicher Werte"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear Counting für kleine Kardinalitäten
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
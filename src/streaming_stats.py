@@ -0,0 +1,198 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+import numpy as np
+import pandas as pd
+from .sketches import KLLSketch, HyperLogLog
+
+def _merge_dtypes(left: Optional[np.dtype], right: np.dtype) -> np.dtype:
+    """Vereinigt die Dtypes zweier Chunks so, wie pandas sie beim Komplett-Einlesen wählen würde"""
+    if left is None or left == right:
+        return right
+    left_numeric = pd.api.types.is_numeric_dtype(left) and not pd.api.types.is_bool_dtype(left)
+    right_numeric = pd.api.types.is_numeric_dtype(right) and not pd.api.types.is_bool_dtype(right)
+    if left_numeric and right_numeric:
+        return np.result_type(left, right)
+    if pd.api.types.is_string_dtype(left) and pd.api.types.is_string_dtype(right):
+        return left if left != np.dtype(object) else right
+    return np.dtype(object)
+
+class ColumnAccumulator:
+    """Mergebarer Akkumulator für eine Spalte (Welford/Chan für Mittelwert und Varianz)"""
+
+    def __init__(self, sketches: bool = False, kll_k: int = 200, hll_precision: int = 14):
+        self.kll = KLLSketch(k=kll_k, seed=0) if sketches else None
+        self.hll = HyperLogLog(precision=hll_precision) if sketches else None
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.nulls = 0
+        self.dtype = None
+        self._null_dtype = None
+
+    @property
+    def is_numeric(self) -> bool:
+        dtype = self.final_dtype
+        return (dtype is not None and pd.api.types.is_numeric_dtype(dtype)
+                and not pd.api.types.is_bool_dtype(dtype))
+
+    @property
+    def final_dtype(self):
+        return self.dtype if self.dtype is not None else self._null_dtype
+
+    def update(self, series: pd.Series) -> None:
+        """Verarbeitet einen Chunk der Spalte"""
+        nulls = int(series.isnull().sum())
+        self.nulls += nulls
+        if self.hll is not None:
+            self.hll.update(series)
+
+        # Komplett leere Chunks sagen nichts über den Dtype aus
+        if nulls == len(series):
+            self._null_dtype = _merge_dtypes(self._null_dtype, series.dtype)
+            return
+        self.dtype = _merge_dtypes(self.dtype, series.dtype)
+
+        if not (pd.api.types.is_numeric_dtype(series.dtype)
+                and not pd.api.types.is_bool_dtype(series.dtype)):
+            return
+
+        values = series.dropna().to_numpy(dtype=np.float64)
+        if self.kll is not None:
+            self.kll.update(values)
+        chunk = ColumnAccumulator()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        self._merge_moments(chunk)
+
+    def _merge_moments(self, other: 'ColumnAccumulator') -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+
+        # Parallele Varianz nach Chan et al.
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def merge(self, other: 'ColumnAccumulator') -> None:
+        """Führt einen zweiten Akkumulator derselben Spalte hinein"""
+        self.nulls += other.nulls
+        if other.dtype is not None:
+            self.dtype = _merge_dtypes(self.dtype, other.dtype)
+        if other._null_dtype is not None:
+            self._null_dtype = _merge_dtypes(self._null_dtype, other._null_dtype)
+        if self.kll is not None and other.kll is not None:
+            self.kll.merge(other.kll)
+        if self.hll is not None and other.hll is not None:
+            self.hll.merge(other.hll)
+        self._merge_moments(other)
+
+    def describe(self) -> Dict[str, float]:
+        """Gibt die Kennzahlen im Stil von `Series.describe()` zurück"""
+        std = float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan')
+        summary = {
+            'count': float(self.count),
+            'mean': self.mean if self.count else float('nan'),
+            'std': std,
+            'min': self.min if self.min is not None else float('nan')
+        }
+        if self.kll is not None:
+            q25, q50, q75 = self.kll.quantiles([0.25, 0.5, 0.75])
+            summary.update({'25%': q25, '50%': q50, '75%': q75})
+        summary['max'] = self.max if self.max is not None else float('nan')
+        return summary
+
+class StreamingStats:
+    """Berechnet `basic_stats` in einem Durchlauf über beliebig viele Chunks"""
+
+    def __init__(self, sketches: bool = False, kll_k: int = 200, hll_precision: int = 14):
+        """
+        Initialisiert die Statistik.
+
+        Args:
+            sketches: Approximative Quantile (KLL) und Distinct Counts (HyperLogLog) berechnen
+            kll_k: Genauigkeitsparameter des KLL-Sketches
+            hll_precision: Anzahl Register-Bits des HyperLogLog-Sketches
+        """
+        self.sketches = sketches
+        self.kll_k = kll_k
+        self.hll_precision = hll_precision
+        self.row_count = 0
+        self.columns: List[str] = []
+        self.accumulators: Dict[str, ColumnAccumulator] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Verarbeitet einen DataFrame-Chunk"""
+        self.row_count += len(df)
+        for col in df.columns:
+            if col not in self.accumulators:
+                self.columns.append(col)
+                self.accumulators[col] = self._new_accumulator()
+            self.accumulators[col].update(df[col])
+
+    def _new_accumulator(self) -> ColumnAccumulator:
+        return ColumnAccumulator(self.sketches, self.kll_k, self.hll_precision)
+
+    def merge(self, other: 'StreamingStats') -> 'StreamingStats':
+        """Führt die Statistik eines anderen Durchlaufs (z.B. eines zweiten Workers) hinein"""
+        self.row_count += other.row_count
+        for col in other.columns:
+            if col not in self.accumulators:
+                self.columns.append(col)
+                self.accumulators[col] = self._new_accumulator()
+            self.accumulators[col].merge(other.accumulators[col])
+        return self
+
+    def to_basic_stats(self) -> Dict[str, Any]:
+        """Erzeugt dieselbe Struktur wie `OllamaAgent.compute_basic_stats`"""
+        stats = {
+            'row_count': self.row_count,
+            'column_count': len(self.columns),
+            'columns': list(self.columns),
+            'dtypes': {str(col): str(self.accumulators[col].final_dtype) for col in self.columns},
+            'missing_values': {col: self.accumulators[col].nulls for col in self.columns},
+            'numeric_summary': {
+                col: self.accumulators[col].describe()
+                for col in self.columns
+                if self.accumulators[col].is_numeric
+            } if self.row_count else {}
+        }
+        if self.sketches:
+            stats['distinct_counts'] = {
+                col: self.accumulators[col].hll.estimate() for col in self.columns
+            }
+            # Fehlerschranken mitliefern, damit das Modell die Werte richtig einordnet
+            kll, hll = KLLSketch(self.kll_k), HyperLogLog(self.hll_precision)
+            stats['approximation'] = {
+                'quantiles': f"KLL (k={self.kll_k}), Rangfehler <= {kll.rank_error():.1%} (99% Konfidenz)",
+                'distinct_counts': f"HyperLogLog (p={self.hll_precision}), relativer Standardfehler "
+                                   f"{hll.relative_error():.1%}"
+            }
+        return stats
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], **kwargs) -> 'StreamingStats':
+        """Berechnet die Statistik über einen Iterator von Chunks"""
+        stats = cls(**kwargs)
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats
+
+    @classmethod
+    def from_csv(cls, file_path: Union[str, Path], chunk_size: int = 100_000,
+                 sketches: bool = False, **read_kwargs) -> 'StreamingStats':
+        """Liest eine CSV-Datei chunkweise ein, der Speicherbedarf hängt nur von `chunk_size` ab"""
+        with pd.read_csv(file_path, chunksize=chunk_size, **read_kwargs) as reader:
+            return cls.from_chunks(reader, sketches=sketches)
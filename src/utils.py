@@ -1,11 +1,13 @@
 import os
 import logging
-from typing import Union, List, Dict, Any
+import warnings
+import threading
+from typing import Union, List, Dict, Any, Callable, Iterable
 import pandas as pd
 import numpy as np
 from pathlib import Path
-import spacy
-from spacy_langdetect import LanguageDetector
+from .sketches import KLLSketch
+from .streaming_stats import ColumnAccumulator
 
 class FileUtils:
     """Hilfsfunktionen für Dateioperationen und Vorverarbeitung"""
@@ -33,18 +35,54 @@ class FileUtils:
 
 class TextPreprocessor:
     """Klasse für die Textvorverarbeitung"""
-    
-    def __init__(self):
-        self.nlp = spacy.load("de_core_news_sm")
-        self.nlp.add_pipe("language_detector")
-        
-    def preprocess_text(self, text: str, config: Dict) -> str:
-        """Führt die Textvorverarbeitung durch"""
+
+    MODEL_NAME = "de_core_news_sm"
+    # Für Lemmatisierung und Spracherkennung nicht benötigt
+    DISABLED_COMPONENTS = ("parser", "ner")
+
+    # Das Modell wird beim ersten Gebrauch geladen und von allen Instanzen geteilt
+    _shared_nlp = None
+    _nlp_lock = threading.Lock()
+    # Eigene Pipeline einer Instanz (z.B. anderes Modell oder Test-Attrappe)
+    _nlp = None
+
+    @property
+    def nlp(self):
+        return self._nlp if self._nlp is not None else self._load_nlp()
+
+    @nlp.setter
+    def nlp(self, pipeline):
+        """Ersetzt die geteilte Pipeline nur für diese Instanz, None stellt sie wieder her"""
+        self._nlp = pipeline
+
+    @classmethod
+    def _load_nlp(cls):
+        """Lädt die spaCy-Pipeline einmalig"""
+        if cls._shared_nlp is None:
+            with cls._nlp_lock:
+                if cls._shared_nlp is None:
+                    import spacy
+                    from spacy.language import Language
+                    from spacy_langdetect import LanguageDetector
+
+                    if not Language.has_factory("language_detector"):
+                        Language.factory("language_detector", func=lambda nlp, name: LanguageDetector())
+                    nlp = spacy.load(cls.MODEL_NAME, disable=list(cls.DISABLED_COMPONENTS))
+                    # Der Spracherkenner braucht Satzgrenzen, ohne Parser liefert sie der Sentencizer
+                    if "parser" not in nlp.pipe_names:
+                        nlp.add_pipe("sentencizer")
+                    nlp.add_pipe("language_detector")
+                    cls._shared_nlp = nlp
+        return cls._shared_nlp
+
+    @staticmethod
+    def _prepare(text: str, config: Dict) -> str:
         if config.get("lowercase", True):
             text = text.lower()
-            
-        doc = self.nlp(text)
-        
+        return text
+
+    @staticmethod
+    def _finish(doc, text: str, config: Dict) -> str:
         if config.get("lemmatization", True):
             text = " ".join([token.lemma_ for token in doc])
             
@@ -52,54 +90,279 @@ class TextPreprocessor:
             text = "".join(char for char in text if char.isalnum() or char.isspace())
             
         return text
+        
+    def preprocess_text(self, text: str, config: Dict) -> str:
+        """Führt die Textvorverarbeitung durch"""
+        text = self._prepare(text, config)
+        return self._finish(self.nlp(text), text, config)
     
     def detect_language(self, text: str) -> str:
         """Erkennt die Sprache des Textes"""
         doc = self.nlp(text)
         return doc._.language["language"]
 
+    def analyze_text(self, text: str, config: Dict) -> Dict[str, str]:
+        """Vorverarbeitung und Spracherkennung mit nur einem Durchlauf der Pipeline"""
+        text = self._prepare(text, config)
+        doc = self.nlp(text)
+        return {
+            "text": self._finish(doc, text, config),
+            "language": doc._.language["language"]
+        }
+
+    def process_batch(self, texts: Iterable[str], config: Dict,
+                      batch_size: int = 64, n_process: int = 1) -> List[Dict[str, str]]:
+        """
+        Verarbeitet viele Texte gebündelt über `nlp.pipe`.
+
+        Args:
+            texts: Zu verarbeitende Texte
+            config: Vorverarbeitungsoptionen wie bei `preprocess_text`
+            batch_size: Texte pro Batch
+            n_process: Anzahl Prozesse für spaCy
+
+        Returns:
+            Liste von Dicts mit vorverarbeitetem Text und erkannter Sprache
+        """
+        prepared = [self._prepare(text, config) for text in texts]
+        docs = self.nlp.pipe(prepared, batch_size=batch_size, n_process=n_process)
+        return [
+            {
+                "text": self._finish(doc, text, config),
+                "language": doc._.language["language"]
+            }
+            for doc, text in zip(docs, prepared)
+        ]
+
 class DataFrameAnalyzer:
     """Erweiterte Analysefunktionen für DataFrames"""
     
     @staticmethod
     def analyze_correlations(df: pd.DataFrame, 
                            method: str = 'pearson',
-                           threshold: float = 0.5) -> pd.DataFrame:
-        """Analysiert Korrelationen zwischen numerischen Spalten"""
+                           threshold: float = 0.5,
+                           output: str = 'matrix',
+                           top_k: int = None,
+                           sample_size: int = None,
+                           block_size: int = 512,
+                           random_state: int = 0) -> pd.DataFrame:
+        """
+        Analysiert Korrelationen zwischen numerischen Spalten.
+
+        Mit `output='matrix'` wird wie bisher die gefilterte, dichte Matrix geliefert.
+        `output='pairs'` berechnet die Korrelationen blockweise in float32 und gibt
+        nur die Paare oberhalb von `threshold` (bzw. die `top_k` stärksten) als
+        Kantenliste zurück. Fehlende Werte werden dabei durch den Spaltenmittelwert
+        ersetzt, Spearman wird über eine einmalige Rangtransformation berechnet.
+
+        Args:
+            df: Zu analysierender DataFrame
+            method: 'pearson' oder 'spearman' ('kendall' nur bei output='matrix')
+            threshold: Mindestbetrag der Korrelation
+            output: 'matrix' oder 'pairs'
+            top_k: Nur die k stärksten Paare behalten (nur bei output='pairs')
+            sample_size: Zufällige Stichprobe von Zeilen statt aller Zeilen
+            block_size: Anzahl Spalten pro Block
+            random_state: Seed für die Stichprobe
+
+        Returns:
+            Korrelationsmatrix oder DataFrame mit Spalten column_1, column_2, correlation
+        """
         numeric_cols = df.select_dtypes(include=[np.number]).columns
-        corr_matrix = df[numeric_cols].corr(method=method)
+        data = df[numeric_cols]
+        if sample_size is not None and len(data) > sample_size:
+            data = data.sample(n=sample_size, random_state=random_state)
+
+        if output == 'matrix':
+            corr_matrix = data.corr(method=method)
         
-        # Filtere signifikante Korrelationen
-        significant_corr = corr_matrix[abs(corr_matrix) > threshold]
-        return significant_corr
+            # Filtere signifikante Korrelationen
+            significant_corr = corr_matrix[abs(corr_matrix) > threshold]
+            return significant_corr
+
+        if method == 'spearman':
+            data = data.rank()
+        elif method != 'pearson':
+            raise ValueError(f"Methode {method} wird für output='pairs' nicht unterstützt")
+
+        # Standardisieren, konstante Spalten fallen heraus
+        values = data.to_numpy(dtype=np.float32, na_value=np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0)
+        valid = np.flatnonzero(np.isfinite(std) & (std > 0))
+        values = (values[:, valid] - mean[valid]) / std[valid]
+        np.nan_to_num(values, copy=False, nan=0.0)
+        names = np.asarray(numeric_cols)[valid]
+        n_rows, n_cols = values.shape
+
+        left_parts, right_parts, corr_parts = [], [], []
+        for start_i in range(0, n_cols, block_size):
+            block_i = values[:, start_i:start_i + block_size]
+            for start_j in range(start_i, n_cols, block_size):
+                block = block_i.T @ values[:, start_j:start_j + block_size] / n_rows
+                rows, cols = np.nonzero(np.abs(block) > threshold)
+                rows, cols = rows + start_i, cols + start_j
+                # Diagonale und doppelte Paare nur einmal
+                keep = rows < cols
+                left_parts.append(rows[keep])
+                right_parts.append(cols[keep])
+                corr_parts.append(block[rows[keep] - start_i, cols[keep] - start_j])
+
+            if top_k is not None and corr_parts:
+                # Nur die bisher stärksten Kandidaten im Speicher halten
+                left, right, corr = (np.concatenate(left_parts), np.concatenate(right_parts),
+                                     np.concatenate(corr_parts))
+                if len(corr) > top_k:
+                    best = np.argpartition(-np.abs(corr), top_k - 1)[:top_k]
+                    left, right, corr = left[best], right[best], corr[best]
+                left_parts, right_parts, corr_parts = [left], [right], [corr]
+
+        left = np.concatenate(left_parts) if left_parts else np.empty(0, dtype=np.int64)
+        right = np.concatenate(right_parts) if right_parts else np.empty(0, dtype=np.int64)
+        corr = np.concatenate(corr_parts) if corr_parts else np.empty(0, dtype=np.float32)
+        order = np.argsort(-np.abs(corr), kind='stable')[:top_k]
+
+        return pd.DataFrame({
+            'column_1': names[left[order]],
+            'column_2': names[right[order]],
+            'correlation': np.clip(corr[order], -1.0, 1.0)
+        })
     
     @staticmethod
     def detect_outliers(df: pd.DataFrame,
                        columns: List[str] = None,
-                       method: str = 'iqr') -> Dict[str, List[int]]:
-        """Erkennt Ausreißer in numerischen Spalten"""
+                       method: str = 'iqr',
+                       output: str = 'indices') -> Dict[str, Any]:
+        """
+        Erkennt Ausreißer in numerischen Spalten.
+
+        Quantile bzw. Mittelwert und Streuung werden für alle Spalten in einem
+        NumPy-Durchlauf berechnet.
+
+        Args:
+            df: Zu prüfender DataFrame
+            columns: Zu prüfende Spalten, standardmäßig alle numerischen
+            method: 'iqr' (1.5 * IQR) oder 'zscore' (|z| > 3)
+            output: 'indices' (Index-Labels), 'positions' (int64-Positionen),
+                    'mask' (bool-Array) oder 'count' (Anzahl)
+
+        Returns:
+            Dict Spalte -> Ausreißer im gewünschten Format
+        """
         if columns is None:
             columns = df.select_dtypes(include=[np.number]).columns
-            
-        outliers = {}
-        
-        for col in columns:
-            if method == 'iqr':
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                outlier_indices = df[
-                    (df[col] < (Q1 - 1.5 * IQR)) |
-                    (df[col] > (Q3 + 1.5 * IQR))
-                ].index.tolist()
+        columns = list(columns)
+
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        lower, upper = DataFrameAnalyzer._outlier_bounds(values, method)
+        mask = DataFrameAnalyzer._outlier_mask(values, lower, upper)
+
+        return {
+            col: DataFrameAnalyzer._format_outliers(mask[:, i], df.index, output)
+            for i, col in enumerate(columns)
+        }
+
+    @staticmethod
+    def detect_outliers_chunked(chunk_factory: Callable[[], Iterable[pd.DataFrame]],
+                                columns: List[str] = None,
+                                method: str = 'iqr',
+                                output: str = 'positions') -> Dict[str, Any]:
+        """
+        Erkennt Ausreißer in Daten, die nicht in den Speicher passen.
+
+        Im ersten Durchlauf werden die Grenzen bestimmt (IQR über KLL-Sketches,
+        Z-Score exakt über Welford/Chan), im zweiten werden die Zeilen markiert.
+
+        Args:
+            chunk_factory: Liefert bei jedem Aufruf einen neuen Iterator über die Chunks,
+                           z.B. `lambda: pd.read_csv(pfad, chunksize=100_000)`
+            columns: Zu prüfende Spalten, standardmäßig alle numerischen des ersten Chunks
+            method: 'iqr' oder 'zscore'
+            output: wie bei `detect_outliers`, Positionen zählen über alle Chunks
+
+        Returns:
+            Dict Spalte -> Ausreißer im gewünschten Format
+        """
+        # Erster Durchlauf: Verteilung je Spalte erfassen
+        summaries = None
+        for chunk in chunk_factory():
+            if columns is None:
+                columns = list(chunk.select_dtypes(include=[np.number]).columns)
+            if summaries is None:
+                summaries = [KLLSketch(seed=0) if method == 'iqr' else ColumnAccumulator()
+                             for _ in columns]
+            for col, summary in zip(columns, summaries):
+                summary.update(chunk[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                               if method == 'iqr' else chunk[col])
+        if summaries is None:
+            return {}
+
+        if method == 'iqr':
+            quartiles = np.array([summary.quantiles([0.25, 0.75]) for summary in summaries])
+            q1, q3 = quartiles[:, 0], quartiles[:, 1]
+            iqr = q3 - q1
+            lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        else:
+            mean = np.array([summary.describe()['mean'] for summary in summaries])
+            std = np.array([summary.describe()['std'] for summary in summaries])
+            lower, upper = mean - 3 * std, mean + 3 * std
+
+        # Zweiter Durchlauf: Zeilen gegen die globalen Grenzen prüfen
+        parts = {col: [] for col in columns}
+        offset = 0
+        for chunk in chunk_factory():
+            values = chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+            mask = DataFrameAnalyzer._outlier_mask(values, lower, upper)
+            for i, col in enumerate(columns):
+                if output == 'positions':
+                    parts[col].append(np.flatnonzero(mask[:, i]) + offset)
+                else:
+                    parts[col].append(DataFrameAnalyzer._format_outliers(mask[:, i], chunk.index, output))
+            offset += len(chunk)
+
+        result = {}
+        for col, col_parts in parts.items():
+            if output == 'count':
+                result[col] = int(sum(col_parts))
+            elif output == 'indices':
+                result[col] = [label for part in col_parts for label in part]
             else:
-                # Z-Score Methode
-                z_scores = abs((df[col] - df[col].mean()) / df[col].std())
-                outlier_indices = df[z_scores > 3].index.tolist()
-                
-            outliers[col] = outlier_indices
-            
-        return outliers
+                result[col] = np.concatenate(col_parts).astype(
+                    np.int64 if output == 'positions' else bool
+                ) if col_parts else np.empty(0, dtype=np.int64 if output == 'positions' else bool)
+        return result
+
+    @staticmethod
+    def _outlier_bounds(values: np.ndarray, method: str):
+        """Berechnet untere und obere Grenze je Spalte"""
+        with warnings.catch_warnings():
+            # Spalten ohne Werte liefern NaN-Grenzen und damit keine Ausreißer
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            if method == 'iqr':
+                q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+                iqr = q3 - q1
+                return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            # Z-Score Methode
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0, ddof=1)
+            return mean - 3 * std, mean + 3 * std
+
+    @staticmethod
+    def _outlier_mask(values: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """Markiert Werte außerhalb der Grenzen, NaN zählt nicht als Ausreißer"""
+        return (values < lower) | (values > upper)
+
+    @staticmethod
+    def _format_outliers(mask: np.ndarray, index: pd.Index, output: str):
+        if output == 'mask':
+            return mask
+        if output == 'positions':
+            return np.flatnonzero(mask).astype(np.int64)
+        if output == 'count':
+            return int(np.count_nonzero(mask))
+        return index[mask].tolist()
 
 class VisualizationHelper:
     """Hilfsklasse für Datenvisualisierung"""
@@ -0,0 +1,8 @@
+import pytest
+from benchmarks.fake_ollama import FakeOllamaServer
+
+@pytest.fixture
+def fake_ollama():
+    """Startet einen lokalen Fake-Ollama-Server und liefert ihn zurück"""
+    with FakeOllamaServer() as server:
+        yield server
@@ -0,0 +1,80 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from benchmarks.fake_ollama import FakeOllamaServer
+from src.backend_pool import BackendPool, NoBackendAvailable, backoff_delay
+from src.ollama_agent import OllamaAgent
+
+def test_least_outstanding_scheduling():
+    """Testet, dass das Backend mit den wenigsten laufenden Anfragen gewählt wird"""
+    pool = BackendPool(['http://a', 'http://b'], requests.Session(), max_concurrency=2,
+                       health_check_interval=None)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first.url != second.url
+
+    pool.release(first)
+    assert pool.acquire().url == first.url
+
+def test_concurrency_cap():
+    """Testet die Obergrenze je Backend"""
+    pool = BackendPool('http://a', requests.Session(), max_concurrency=1, health_check_interval=None)
+    backend = pool.acquire()
+
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire(timeout=0.1)
+    pool.release(backend)
+    assert pool.acquire(timeout=0.1) is backend
+
+def test_failed_backend_is_revived_by_health_check(fake_ollama):
+    """Testet das Entfernen nach Fehlern und die Wiederaufnahme per Health-Check"""
+    pool = BackendPool([fake_ollama.url], requests.Session(), failure_threshold=2,
+                       health_check_interval=None)
+    for _ in range(2):
+        pool.release(pool.acquire(), failed=True)
+    assert pool.stats()[0]['healthy'] is False
+
+    pool.check_health()
+    assert pool.stats()[0]['healthy'] is True
+
+def test_backoff_is_bounded():
+    """Testet, dass der Jitter innerhalb der Grenzen bleibt"""
+    delays = [backoff_delay(attempt, base=0.5, maximum=2.0) for attempt in range(10)]
+    assert all(0 <= delay <= 2.0 for delay in delays)
+
+def test_dead_backend_is_skipped():
+    """Testet Wiederholungen auf einem anderen Backend, wenn ein Host ausfällt"""
+    with FakeOllamaServer() as alive:
+        dead = FakeOllamaServer().start()
+        dead_url = dead.url
+        dead.stop()
+
+        agent = OllamaAgent(base_url=[dead_url, alive.url], request_timeout=5,
+                            retry_backoff=0.01, failure_threshold=1, health_check_interval=None)
+        results = [agent._generate_response(f"Anfrage {i}") for i in range(6)]
+        stats = {backend['url']: backend for backend in agent.pool.stats()}
+        agent.close()
+
+    assert all(result.startswith("Antwort auf") for result in results)
+    assert len(alive.requests) == 6
+    assert stats[dead_url]['healthy'] is False
+
+def test_throughput_scales_with_backends():
+    """Testet, dass zwei Backends parallel arbeiten"""
+    def run(urls):
+        agent = OllamaAgent(base_url=urls, request_timeout=5, max_concurrency_per_backend=1,
+                            health_check_interval=None)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(agent._generate_response, [f"Anfrage {i}" for i in range(4)]))
+        agent.close()
+        return time.perf_counter() - start
+
+    with FakeOllamaServer(latency=0.2) as first, FakeOllamaServer(latency=0.2) as second:
+        single = run([first.url])
+        double = run([first.url, second.url])
+
+    assert single >= 0.8
+    assert double < single * 0.75
+    assert len(second.requests) == 2
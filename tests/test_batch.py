@@ -0,0 +1,49 @@
+import json
+import threading
+import time
+from src.batch import BatchRunner
+
+def test_batch_runs_supported_files_and_writes_report(tmp_path):
+    """Testet Dateiauswahl, Parallelverarbeitung und Abschlussbericht"""
+    for name in ['a.csv', 'b.csv', 'c.xlsx', 'notiz.md']:
+        (tmp_path / name).write_text('x')
+
+    def handle_file(path):
+        if path.name == 'b.csv':
+            return {'file_name': path.name, 'error': 'kaputt'}
+        return {'file_name': path.name, 'status': 'success'}
+
+    runner = BatchRunner(handle_file, ['.csv', '.xlsx'], num_workers=2)
+    report_path = tmp_path / 'out' / 'bericht.json'
+    report = runner.run(tmp_path, report_path)
+
+    assert report['file_count'] == 3
+    assert report['succeeded'] == 2
+    assert report['failed'] == 1
+    assert [entry['file_name'] for entry in report['files']] == ['a.csv', 'b.csv', 'c.xlsx']
+    assert json.loads(report_path.read_text(encoding='utf-8'))['files_per_minute'] > 0
+
+def test_interrupt_cancels_pending_files_and_writes_report(tmp_path):
+    """Testet, dass Strg+C wartende Dateien verwirft und einen Teilbericht schreibt"""
+    for i in range(20):
+        (tmp_path / f"datei_{i:02d}.csv").write_text('x' * (i + 1))
+    handled = []
+
+    def handle_file(path):
+        handled.append(path.name)
+        if path.name == 'datei_01.csv':
+            raise KeyboardInterrupt
+        time.sleep(0.01)
+        return {'file_name': path.name, 'status': 'success'}
+
+    cancel_event = threading.Event()
+    runner = BatchRunner(handle_file, ['.csv'], num_workers=1, cancel_event=cancel_event)
+    report_path = tmp_path / 'bericht.json'
+    report = runner.run(tmp_path, report_path)
+
+    assert report['interrupted'] is True
+    assert cancel_event.is_set()
+    assert len(handled) < 20
+    assert report['not_started'] == 20 - len(handled)
+    assert len(report['files']) == 20
+    assert json.loads(report_path.read_text(encoding='utf-8'))['interrupted'] is True
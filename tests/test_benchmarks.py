@@ -0,0 +1,34 @@
+import pytest
+import requests
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.pipeline import generate_files, percentile, run_scenario
+
+def test_fake_server_failure_rate():
+    """Testet simulierte Serverfehler"""
+    with FakeOllamaServer(failure_rate=1.0) as server:
+        response = requests.post(f"{server.url}/api/generate",
+                                 json={'model': 'mistral', 'prompt': 'Hallo'})
+
+    assert response.status_code == 500
+    assert len(server.requests) == 1
+
+def test_percentile():
+    """Testet das Nearest-Rank-Perzentil"""
+    values = list(range(1, 101))
+
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile([], 0.5) == 0.0
+
+@pytest.mark.parametrize('scenario', ['processor', 'watcher'])
+def test_pipeline_scenario(tmp_path, scenario):
+    """Testet einen kompletten Benchmark-Lauf mit kleinen Dateien"""
+    generate_files(tmp_path, 'csv', rows=50, count=3)
+
+    with FakeOllamaServer(response_tokens=10) as server:
+        result = run_scenario(scenario, tmp_path, server.url, workers=2)
+
+    assert result['files'] == 3
+    assert result['failed'] == 0
+    assert result['files_per_second'] > 0
+    assert result['latency_seconds']['p50'] <= result['latency_seconds']['p95']
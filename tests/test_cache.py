@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from src.cache import ResponseCache
+from src.ollama_agent import OllamaAgent
+
+def test_key_depends_on_model_options_and_prompt():
+    """Testet die inhaltsbasierte Schlüsselbildung"""
+    key = ResponseCache.make_key('mistral', 'Hallo', {'temperature': 0.1})
+
+    assert key == ResponseCache.make_key('mistral', 'Hallo', {'temperature': 0.1})
+    assert key != ResponseCache.make_key('llama2', 'Hallo', {'temperature': 0.1})
+    assert key != ResponseCache.make_key('mistral', 'Hallo', {'temperature': 0.2})
+    assert key != ResponseCache.make_key('mistral', 'Hallo!', {'temperature': 0.1})
+
+def test_memory_lru_eviction():
+    """Testet die LRU-Verdrängung im Speicher"""
+    cache = ResponseCache(max_memory_entries=2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    cache.get('a')
+    cache.set('c', '3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == '1'
+    assert cache.get('c') == '3'
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Testet, dass Antworten nach einem Neustart von der Platte kommen"""
+    path = tmp_path / 'cache.sqlite'
+    cache = ResponseCache(path=path)
+    cache.set('schluessel', 'antwort')
+    cache.close()
+
+    cache = ResponseCache(path=path)
+    assert cache.get('schluessel') == 'antwort'
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.get('schluessel') == 'antwort'
+    assert cache.stats()['memory_hits'] == 1
+
+def test_disk_size_and_ttl_eviction(tmp_path):
+    """Testet die Verdrängung nach Anzahl und Alter"""
+    cache = ResponseCache(path=tmp_path / 'cache.sqlite', max_memory_entries=1,
+                          max_disk_entries=2, ttl_seconds=60)
+    for key in ['a', 'b', 'c']:
+        cache.set(key, key)
+
+    assert cache.stats()['disk_entries'] == 2
+    assert cache.get('a') is None
+
+    cache.ttl_seconds = 0.01
+    time.sleep(0.05)
+    assert cache.get('c') is None
+
+def test_agent_uses_cache(fake_ollama):
+    """Testet, dass wiederholte Prompts den Server nicht erneut erreichen"""
+    host, port = fake_ollama.server_address
+    agent = OllamaAgent(base_url=f"http://{host}:{port}", cache=ResponseCache())
+
+    first = agent._generate_response("Gleicher Prompt")
+    second = agent._generate_response("Gleicher Prompt")
+
+    assert first == second
+    assert len(fake_ollama.requests) == 1
+    assert agent.cache.stats()['memory_hits'] == 1
+
+def test_async_agent_keeps_cache_off_event_loop(fake_ollama):
+    """Testet, dass agenerate den Cache nicht im Thread des Event-Loops anspricht"""
+    cache = ResponseCache()
+    agent = OllamaAgent(base_url=fake_ollama.url, cache=cache)
+    threads = []
+    for name in ('get', 'set'):
+        original = getattr(cache, name)
+
+        def recording(*args, _original=original):
+            threads.append(threading.current_thread())
+            return _original(*args)
+
+        setattr(cache, name, recording)
+
+    async def run():
+        first = await agent.agenerate("Gleicher Prompt")
+        second = await agent.agenerate("Gleicher Prompt")
+        await agent.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert len(fake_ollama.requests) == 1
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
@@ -0,0 +1,80 @@
+import threading
+import time
+import pytest
+from src import chunking
+from src.chunking import count_tokens, split_into_chunks, pack_texts, get_encoding, map_reduce_summaries
+
+@pytest.fixture
+def encoding():
+    """Überspringt die Tests, wenn das tiktoken-Encoding nicht geladen werden kann"""
+    pytest.importorskip('tiktoken')
+    try:
+        return get_encoding()
+    except Exception as e:
+        pytest.skip(f"tiktoken-Encoding nicht verfügbar: {e}")
+
+@pytest.mark.usefixtures('encoding')
+def test_short_text_is_single_chunk():
+    """Testet, dass kurze Texte nicht aufgeteilt werden"""
+    assert split_into_chunks("Ein kurzer Satz.", max_tokens=50, overlap=5) == ["Ein kurzer Satz."]
+
+@pytest.mark.usefixtures('encoding')
+def test_chunks_respect_budget_and_overlap():
+    """Testet Token-Budget und Überlappung der Chunks"""
+    text = " ".join(f"Satz {i} über maschinelles Lernen." for i in range(300))
+    chunks = split_into_chunks(text, max_tokens=100, overlap=20)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 100 for chunk in chunks)
+    # Der Anfang des zweiten Chunks wiederholt das Ende des ersten
+    assert chunks[1][:30] in chunks[0]
+
+@pytest.mark.usefixtures('encoding')
+def test_pack_texts_groups_within_budget():
+    """Testet das Zusammenfassen kurzer Texte zu Gruppen"""
+    texts = ["Zusammenfassung eins.", "Zusammenfassung zwei.", "Zusammenfassung drei."]
+    groups = pack_texts(texts, max_tokens=12)
+
+    assert 1 < len(groups) < len(texts) + 1
+    assert all(count_tokens(group) <= 12 for group in groups)
+    assert "\n\n".join(groups).count("Zusammenfassung") == 3
+
+def test_fallback_without_encoding(monkeypatch):
+    """Testet Zählen, Teilen und Packen, wenn das Encoding nicht geladen werden kann"""
+    def unavailable(name=chunking.DEFAULT_ENCODING):
+        raise OSError("offline")
+
+    monkeypatch.setattr(chunking, 'get_encoding', unavailable)
+    monkeypatch.setattr(chunking, '_unavailable', {})
+    monkeypatch.setattr(chunking, '_counters', {})
+    text = " ".join(f"Satz {i} über maschinelles Lernen." for i in range(300))
+
+    with pytest.warns(UserWarning, match="offline"):
+        assert count_tokens("abcdefgh") == 2
+    chunks = split_into_chunks(text, max_tokens=100, overlap=20)
+    groups = pack_texts(["a" * 20, "b" * 20, "c" * 20], max_tokens=10)
+
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 100 for chunk in chunks)
+    assert chunks[1][:30] in chunks[0]
+    assert len(groups) == 3
+
+def test_map_reduce_summaries_is_parallel_and_ordered():
+    """Testet die parallele Zusammenfassung unter Beibehaltung der Reihenfolge"""
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def summarize(text):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return text.upper()
+
+    result = map_reduce_summaries([f"teil {i}" for i in range(6)], summarize,
+                                  max_tokens=1000, max_parallel=3)
+
+    assert result == "\n\n".join(f"TEIL {i}" for i in range(6))
+    assert 1 < peak[0] <= 3
@@ -0,0 +1,73 @@
+import time
+from src.coalescer import EventCoalescer
+
+def _coalescer(stability_seconds=0.2, **kwargs):
+    released = []
+    coalescer = EventCoalescer(lambda path, event: released.append((path.name, event)),
+                               stability_seconds=stability_seconds, poll_interval=0.02, **kwargs)
+    return coalescer, released
+
+def _poll_for(coalescer, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        coalescer.poll()
+        time.sleep(0.02)
+
+def test_burst_is_released_once_after_writes_stop(tmp_path):
+    """Testet, dass eine noch wachsende Datei erst nach dem Schreiben einmal freigegeben wird"""
+    coalescer, released = _coalescer()
+    path = tmp_path / 'gross.csv'
+    path.write_text("a,b\n")
+    coalescer.touch(path, 'created')
+
+    for i in range(5):
+        # Kopiervorgang: Datei wächst, jedes Schreiben erzeugt ein Event
+        with open(path, 'a') as f:
+            f.write(f"{i},{i}\n")
+        coalescer.touch(path, 'modified')
+        _poll_for(coalescer, 0.1)
+        assert released == []
+
+    _poll_for(coalescer, 0.4)
+    assert released == [('gross.csv', 'created')]
+    assert coalescer.pending_count() == 0
+
+def test_lock_file_holds_and_sentinel_releases(tmp_path):
+    """Testet Lock-Datei (warten) und Sentinel-Datei (sofort freigeben)"""
+    coalescer, released = _coalescer(stability_seconds=0.1, sentinel_suffix='.done')
+    locked = tmp_path / 'gesperrt.csv'
+    locked.write_text("a\n1\n")
+    lock_file = tmp_path / 'gesperrt.csv.lock'
+    lock_file.touch()
+    coalescer.touch(locked, 'created')
+    _poll_for(coalescer, 0.3)
+    assert released == []
+
+    lock_file.unlink()
+    coalescer.discard(lock_file)
+    _poll_for(coalescer, 0.3)
+    assert released == [('gesperrt.csv', 'created')]
+
+    coalescer.stability_seconds = 60
+    ready = tmp_path / 'fertig.csv'
+    ready.write_text("a\n1\n")
+    coalescer.touch(ready, 'created')
+    (tmp_path / 'fertig.csv.done').touch()
+    coalescer.touch(tmp_path / 'fertig.csv.done', 'created')
+    coalescer.poll()
+    assert released[-1] == ('fertig.csv', 'created')
+    assert len(released) == 2
+
+def test_temporary_and_deleted_files_are_dropped(tmp_path):
+    """Testet, dass temporäre und wieder gelöschte Dateien nicht freigegeben werden"""
+    coalescer, released = _coalescer(stability_seconds=0.0)
+    partial = tmp_path / 'daten.csv.part'
+    partial.write_text("a\n")
+    coalescer.touch(partial, 'created')
+    gone = tmp_path / 'weg.csv'
+    coalescer.touch(gone, 'created')
+
+    coalescer.poll()
+    coalescer.poll()
+    assert released == []
+    assert coalescer.pending_count() == 0
@@ -0,0 +1,113 @@
+import threading
+from src.code_review import RepositoryReviewer, ReviewIndex, extract_units
+
+SOURCE = '''"""Modul-Docstring"""
+import os
+
+LIMIT = 10
+
+def helper(x):
+    return x + 1
+
+class Store:
+    """Speicher"""
+    size = 3
+
+    @property
+    def path(self):
+        return os.getcwd()
+
+    @path.setter
+    def path(self, value):
+        pass
+
+    def load(self):
+        return helper(LIMIT)
+'''
+
+def _reviewer(index):
+    calls = []
+    lock = threading.Lock()
+
+    def review_unit(file_path, unit):
+        with lock:
+            calls.append((file_path, unit['name']))
+        return f"Review von {unit['name']}"
+
+    return RepositoryReviewer(review_unit, index, model='test', max_parallel=4), calls
+
+def test_extract_units():
+    """Testet die Zerlegung in Funktionen, Methoden, Klassenrumpf und Modulebene"""
+    units = {unit['name']: unit for unit in extract_units(SOURCE)}
+
+    assert set(units) == {'<modul>', 'helper', 'Store', 'Store.path', 'Store.path#2', 'Store.load'}
+    assert units['Store.path']['code'].lstrip().startswith('@property')
+    assert 'def load' not in units['Store']['code']
+    assert 'LIMIT = 10' in units['<modul>']['code']
+
+    # Kommentare und Formatierung ändern den Fingerprint nicht, Code schon
+    reformatted = {u['name']: u['fingerprint'] for u in extract_units(
+        SOURCE.replace('return x + 1', 'return (x+1)  # plus eins'))}
+    changed = {u['name']: u['fingerprint'] for u in extract_units(
+        SOURCE.replace('return x + 1', 'return x + 2'))}
+    assert reformatted['helper'] == units['helper']['fingerprint']
+    assert changed['helper'] != units['helper']['fingerprint']
+    assert changed['Store.load'] == units['Store.load']['fingerprint']
+
+def test_incremental_repository_review(tmp_path):
+    """Testet, dass nur neue und geänderte Einheiten erneut reviewt werden"""
+    repo = tmp_path / 'repo'
+    (repo / 'pkg').mkdir(parents=True)
+    (repo / 'pkg' / 'store.py').write_text(SOURCE)
+    (repo / 'pkg' / 'kaputt.py').write_text("def broken(:\n")
+    (repo / '.venv').mkdir()
+    (repo / '.venv' / 'ignored.py').write_text("x = 1\n")
+    index = ReviewIndex(tmp_path / 'reviews.sqlite')
+
+    reviewer, calls = _reviewer(index)
+    first = reviewer.review(repo, output_dir=tmp_path / 'reports')
+    assert set(first['files']) == {'pkg/store.py', 'pkg/kaputt.py'}
+    assert first['reviewed_units'] == len(calls) == 7
+    report = (tmp_path / 'reports' / 'pkg' / 'store.py.review.md').read_text(encoding='utf-8')
+    assert "## Store.load (method" in report
+    assert "Review von helper" in report
+
+    (repo / 'pkg' / 'store.py').write_text(SOURCE.replace('return x + 1', 'return x + 2'))
+    reviewer, calls = _reviewer(index)
+    second = reviewer.review(repo)
+    assert calls == [('pkg/store.py', 'helper')]
+    assert second['reused_units'] == 6
+    assert second['files']['pkg/store.py']['changed']
+    assert not second['files']['pkg/kaputt.py']['changed']
+
+    # Verschobener Code behält sein Review
+    (repo / 'pkg' / 'store.py').rename(repo / 'pkg' / 'speicher.py')
+    reviewer, calls = _reviewer(index)
+    third = reviewer.review(repo)
+    assert calls == []
+    assert third['removed_files'] == ['pkg/store.py']
+    index.close()
+
+def test_index_shared_by_two_roots(tmp_path):
+    """Testet, dass sich zwei Repositories im selben Index nicht gegenseitig löschen"""
+    first, second = tmp_path / 'eins', tmp_path / 'zwei'
+    first.mkdir()
+    second.mkdir()
+    (first / 'common.py').write_text("def run():\n    return 1\n")
+    (first / 'nur_eins.py').write_text("def eins():\n    return 'eins'\n")
+    (second / 'common.py').write_text("def run():\n    return 2\n")
+    index = ReviewIndex(tmp_path / 'reviews.sqlite')
+
+    reviewer, calls = _reviewer(index)
+    reviewer.review(first)
+    reviewed_second = reviewer.review(second)
+    assert reviewed_second['removed_files'] == []
+    assert len(calls) == 3
+
+    reviewer, calls = _reviewer(index)
+    again = reviewer.review(first)
+    assert calls == []
+    assert again['removed_files'] == []
+    assert again['reused_units'] == 2
+    assert index.files(second.resolve().as_posix()) == ['common.py']
+    index.close()
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+from src.dedup import DataFingerprint, DuplicateIndex
+from src.file_processor import FileProcessor
+from src.ollama_agent import OllamaAgent
+
+def _frame(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'wert': rng.normal(size=rows),
+        'kategorie': rng.choice(['a', 'b', 'c'], size=rows)
+    })
+
+def _fingerprint(df, index):
+    return index.new_fingerprint().update(df)
+
+def test_fingerprint_matches():
+    """Testet umsortierte, leicht geänderte und verschiedene Daten"""
+    index = DuplicateIndex()
+    df = _frame()
+    index.add('original.csv', 'h1', _fingerprint(df, index),
+              {'basic_stats': {}, 'textanalyse': 'Text', 'empfehlungen': {}})
+
+    reordered = df.sample(frac=1, random_state=1)[['kategorie', 'id', 'wert']]
+    assert index.find_similar(_fingerprint(reordered, index))['match'] == 'reordered'
+
+    near = index.find_similar(_fingerprint(df.iloc[20:], index))
+    assert near['match'] == 'near'
+    assert near['file_name'] == 'original.csv'
+    assert 0.8 <= near['similarity'] < 1.0
+
+    assert index.find_similar(_fingerprint(_frame(seed=1), index)) is None
+    assert index.find_similar(_fingerprint(df.iloc[:150], index)) is None
+    index.close()
+
+def test_chunked_fingerprint_equals_whole():
+    """Testet, dass der Fingerprint unabhängig von der Chunk-Aufteilung ist"""
+    df = _frame()
+    whole = DataFingerprint().update(df)
+    chunked = DataFingerprint()
+    for start in range(0, len(df), 128):
+        chunked.update(df.iloc[start:start + 128])
+    assert chunked.content_digest() == whole.content_digest()
+    assert chunked.similarity(whole.signature) == 1.0
+
+def test_processor_reuses_duplicates(fake_ollama, tmp_path):
+    """Testet, dass Duplikate keine weiteren LLM-Anfragen auslösen"""
+    agent = OllamaAgent(base_url=fake_ollama.url, request_timeout=5)
+    processor = FileProcessor(agent, output_dir=tmp_path, write_report=False,
+                              dedup=DuplicateIndex(tmp_path / 'dedup.sqlite'))
+    df = _frame()
+    df.to_csv(tmp_path / 'original.csv', index=False)
+    df.to_csv(tmp_path / 'kopie.csv', index=False)
+    df.sample(frac=1, random_state=2).to_csv(tmp_path / 'umsortiert.csv', index=False)
+    df.iloc[10:].to_csv(tmp_path / 'gekuerzt.csv', index=False)
+
+    first = processor.process_file(tmp_path / 'original.csv')
+    requests_after_first = len(fake_ollama.requests)
+    assert first['status'] == 'success'
+    assert 'duplicate_of' not in first
+
+    copy = processor.process_file(tmp_path / 'kopie.csv')
+    assert copy['duplicate_of']['match'] == 'exact'
+    assert copy['textanalyse'] == first['textanalyse']
+
+    reordered = processor.process_file(tmp_path / 'umsortiert.csv')
+    assert reordered['duplicate_of'] == {'file_name': 'original.csv', 'match': 'reordered',
+                                         'similarity': 1.0}
+
+    shortened = processor.process_file(tmp_path / 'gekuerzt.csv')
+    assert shortened['duplicate_of']['match'] == 'near'
+    assert shortened['stats_diff']['row_count'] == {'vorher': 500, 'jetzt': 490}
+    assert len(fake_ollama.requests) == requests_after_first
+
+    processor.near_duplicates = 'analyze'
+    df.iloc[5:].to_csv(tmp_path / 'analysiert.csv', index=False)
+    analyzed = processor.process_file(tmp_path / 'analysiert.csv')
+    assert analyzed['duplicate_of']['match'] == 'near'
+    assert len(fake_ollama.requests) > requests_after_first
+
+def test_fingerprint_is_taken_before_dtype_optimization(tmp_path):
+    """Testet, dass komplettes Einlesen mit optimize_dtypes denselben Fingerprint wie Streaming liefert"""
+    from src.metrics import StageTimer
+
+    df = _frame(rows=300)
+    df['datum'] = pd.date_range('2024-01-01', periods=len(df), freq='D').strftime('%m/%d/%Y')
+    df.to_csv(tmp_path / 'daten.csv', index=False)
+    agent = OllamaAgent()
+    digests = []
+    for processor in (FileProcessor(agent, optimize_dtypes=True, write_report=False),
+                      FileProcessor(agent, streaming_threshold_mb=0, write_report=False)):
+        fingerprint = DataFingerprint()
+        processor._read_stats(tmp_path / 'daten.csv', StageTimer(), fingerprint)
+        digests.append(fingerprint.content_digest())
+
+    assert digests[0] == digests[1]
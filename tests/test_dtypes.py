@@ -0,0 +1,52 @@
+import math
+import numpy as np
+import pandas as pd
+from src.dtypes import optimize_dtypes
+from src.ollama_agent import OllamaAgent
+
+def _astronauts(rows=1000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Name': [f"Astronaut {i}" for i in range(rows)],
+        'Status': pd.Series(rng.choice(['Active', 'Retired', 'Deceased'], size=rows), dtype=object),
+        'Birth Date': [f"{rng.integers(1, 13)}/{rng.integers(1, 29)}/19{rng.integers(30, 80)}"
+                       for _ in range(rows)],
+        'Year': np.where(rng.random(rows) < 0.1, np.nan, rng.integers(1959, 2010, size=rows)),
+        'Space Flights': rng.integers(0, 8, size=rows),
+        'Space Walks (hr)': rng.random(rows) * 50
+    })
+
+def test_optimize_dtypes_converts_and_reports():
+    """Testet die Umwandlungen und den Speicherbericht"""
+    df, report = optimize_dtypes(_astronauts())
+
+    assert str(df['Status'].dtype) == 'category'
+    assert pd.api.types.is_datetime64_any_dtype(df['Birth Date'])
+    assert df['Space Flights'].dtype == np.uint8
+    assert df['Year'].dtype == np.float32
+    # Nicht exakt als float32 darstellbar: bleibt float64
+    assert df['Space Walks (hr)'].dtype == np.float64
+    assert report['bytes_after'] < report['bytes_before']
+    assert report['reduction_pct'] > 0
+    assert report['conversions']['Space Flights'] == 'int64 -> uint8'
+
+def test_statistics_unchanged_after_optimization():
+    """Testet, dass die Basis-Statistiken durch die Umwandlung gleich bleiben"""
+    agent = OllamaAgent()
+    original = _astronauts()
+    expected = agent.compute_basic_stats(original.copy())
+    actual = agent.compute_basic_stats(optimize_dtypes(original)[0])
+
+    assert actual['missing_values'] == expected['missing_values']
+    assert set(actual['numeric_summary']) == set(expected['numeric_summary'])
+    for col, summary in actual['numeric_summary'].items():
+        for key, value in summary.items():
+            assert math.isclose(value, expected['numeric_summary'][col][key], rel_tol=1e-9)
+
+def test_mixed_date_formats_are_kept():
+    """Testet, dass Spalten mit nicht lesbaren Datumswerten nicht umgewandelt werden"""
+    df = pd.DataFrame({'Death Date': ['2/1/2003', '8/25/2012', '04/23/01', None] * 5})
+    df, report = optimize_dtypes(df, category_threshold=0.1)
+
+    assert not pd.api.types.is_datetime64_any_dtype(df['Death Date'])
+    assert df['Death Date'].isna().sum() == 5
@@ -0,0 +1,94 @@
+import pandas as pd
+from src.file_processor import FileProcessor
+from src.ollama_agent import OllamaAgent
+
+def _processor_for(server, **kwargs) -> FileProcessor:
+    agent = OllamaAgent(base_url=server.url, request_timeout=5)
+    return FileProcessor(agent, **kwargs)
+
+def _write_csv(tmp_path):
+    csv_path = tmp_path / 'verkauf.csv'
+    pd.DataFrame({'menge': [1, 2, 3], 'preis': [9.99, 19.99, 4.99]}).to_csv(csv_path, index=False)
+    return csv_path
+
+def test_stream_output_writes_report(fake_ollama, tmp_path):
+    """Testet das Schreiben der Textanalyse während der Generierung"""
+    (tmp_path / 'output').mkdir()
+    processor = _processor_for(fake_ollama, stream_output=True, output_dir=tmp_path / 'output')
+
+    results = processor.process_file(_write_csv(tmp_path))
+
+    assert results['status'] == 'success'
+    assert 'ttft_seconds' in results['llm_metrics']['analysis']
+    assert {'read', 'stats', 'prompt_build', 'llm_wait'} <= set(results['stage_seconds'])
+    report = (tmp_path / 'output' / 'analyse_verkauf.txt').read_text(encoding='utf-8')
+    assert "DATENANALYSE" in report
+    assert "Antwort auf" in report
+
+def test_cancelled_analysis(fake_ollama, tmp_path):
+    """Testet den Abbruch über das Cancel-Event des Prozessors"""
+    processor = _processor_for(fake_ollama, stream_output=True, output_dir=tmp_path)
+    processor.cancel_event.set()
+
+    results = processor.process_file(_write_csv(tmp_path))
+
+    assert results['status'] == 'cancelled'
+
+def test_without_report_file(fake_ollama, tmp_path):
+    """Testet, dass ohne Textbericht keine Dateien geschrieben werden"""
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    processor = _processor_for(fake_ollama, stream_output=True, output_dir=output_dir,
+                               write_report=False)
+
+    results = processor.process_file(_write_csv(tmp_path))
+
+    assert results['status'] == 'success'
+    assert results['textanalyse'].startswith("Antwort auf")
+    assert list(output_dir.iterdir()) == []
+
+def test_small_parquet_is_read_completely(fake_ollama, tmp_path):
+    """Testet, dass kleine Parquet-Dateien exakte Quantile statt des Metadaten-Profils bekommen"""
+    parquet_path = tmp_path / 'verkauf.parquet'
+    pd.DataFrame({'menge': [1, 2, 3, 4], 'preis': [9.99, 19.99, 4.99, 1.0]}).to_parquet(parquet_path)
+    processor = _processor_for(fake_ollama, write_report=False)
+
+    results = processor.process_file(parquet_path)
+
+    assert results['status'] == 'success'
+    assert results['basic_stats']['numeric_summary']['menge']['50%'] == 2.5
+
+def test_prose_txt_is_analyzed_as_document(fake_ollama, tmp_path):
+    """Testet, dass Fließtext in .txt als Dokument und nicht als Tabelle analysiert wird"""
+    prose_path = tmp_path / 'notiz.txt'
+    prose_path.write_text("Das Treffen wurde verschoben, weil der Raum belegt war.\n"
+                          "Neuer Termin ist Donnerstag; bitte Unterlagen mitbringen.\n", encoding='utf-8')
+    table_path = tmp_path / 'werte.txt'
+    table_path.write_text("menge;preis\n1;9.99\n2;19.99\n", encoding='utf-8')
+    processor = _processor_for(fake_ollama, write_report=False)
+
+    prose = processor.process_file(prose_path)
+    table = processor.process_file(table_path)
+
+    assert prose['status'] == 'success'
+    assert prose['basic_stats']['document']['chunk_count'] == 1
+    assert "Das Treffen wurde verschoben" in fake_ollama.requests[0]['prompt']
+    assert table['basic_stats']['columns'] == ['menge', 'preis']
+
+def test_long_document_is_summarized_with_configured_chunks(fake_ollama, tmp_path):
+    """Testet, dass lange Dokumente mit den Parametern aus `document_analysis` zerlegt werden"""
+    prose_path = tmp_path / 'protokoll.txt'
+    prose_path.write_text(" ".join(f"Punkt {i} wurde ausführlich besprochen." for i in range(60)),
+                          encoding='utf-8')
+    processor = _processor_for(fake_ollama, write_report=False, document_settings={
+        'chunk_tokens': 100, 'chunk_overlap': 10, 'max_parallel': 2
+    })
+
+    result = processor.process_file(prose_path)
+
+    chunk_count = result['basic_stats']['document']['chunk_count']
+    prompts = [request['prompt'] for request in fake_ollama.requests]
+    assert result['status'] == 'success'
+    assert chunk_count > 1
+    assert sum("Fasse den folgenden Text" in prompt for prompt in prompts) >= chunk_count
+    assert "Fasse den folgenden Text" not in prompts[-1]
@@ -0,0 +1,74 @@
+import queue
+import threading
+import pytest
+from src.job_queue import JobQueue, QueueClosed
+
+def test_jobs_processed_in_parallel():
+    """Testet, dass mehrere Worker gleichzeitig arbeiten"""
+    barrier = threading.Barrier(3, timeout=5)
+    seen = []
+
+    def handler(job):
+        barrier.wait()
+        seen.append(job)
+
+    jobs = JobQueue(handler, num_workers=3, max_queue_size=10)
+    jobs.start()
+    for i in range(3):
+        jobs.submit(i)
+    jobs.shutdown(wait=True)
+
+    assert sorted(seen) == [0, 1, 2]
+    assert sum(s['jobs_done'] for s in jobs.stats()) == 3
+
+def test_backpressure_when_full():
+    """Testet, dass submit bei voller Queue blockiert"""
+    release = threading.Event()
+    jobs = JobQueue(lambda job: release.wait(5), num_workers=1, max_queue_size=1)
+    jobs.start()
+    jobs.submit('laufend')
+    jobs.submit('wartend')
+
+    with pytest.raises(queue.Full):
+        jobs.submit('zu viel', timeout=0.1)
+
+    release.set()
+    jobs.shutdown(wait=True)
+
+def test_failed_jobs_are_counted():
+    """Testet die Fehlerzählung pro Worker"""
+    def handler(job):
+        raise ValueError("kaputt")
+
+    jobs = JobQueue(handler, num_workers=1)
+    jobs.start()
+    jobs.submit('datei.csv')
+    jobs.shutdown(wait=True)
+
+    assert jobs.stats()[0]['jobs_failed'] == 1
+
+def test_shutdown_releases_blocked_submit():
+    """Testet, dass ein bei voller Queue blockiertes submit beim Beenden aufgibt"""
+    release = threading.Event()
+    jobs = JobQueue(lambda job: release.wait(5), num_workers=1, max_queue_size=1)
+    jobs.start()
+    jobs.submit('laufend')
+    jobs.submit('wartend')
+    errors = []
+
+    def submit_blocked():
+        try:
+            jobs.submit('blockiert')
+        except QueueClosed as e:
+            errors.append(e)
+
+    submitter = threading.Thread(target=submit_blocked)
+    submitter.start()
+    jobs.shutdown(wait=False, cancel_pending=True)
+    submitter.join(timeout=1)
+
+    assert not submitter.is_alive()
+    assert len(errors) == 1
+    release.set()
+    jobs.shutdown(wait=True)
+    assert jobs.stats()[0]['jobs_done'] == 1
@@ -0,0 +1,46 @@
+import os
+from src.manifest import FileManifest
+
+def test_unchanged_file_is_skipped_after_restart(tmp_path):
+    """Testet, dass erledigte Dateien über Neustarts hinweg übersprungen werden"""
+    data = tmp_path / 'daten.csv'
+    data.write_text('a,b\n1,2\n')
+    db_path = tmp_path / 'manifest.sqlite'
+
+    manifest = FileManifest(db_path)
+    fingerprint = manifest.check(data)
+    assert fingerprint is not None
+    manifest.record(data, fingerprint, 'done')
+    manifest.close()
+
+    manifest = FileManifest(db_path)
+    assert manifest.check(data) is None
+    assert data in manifest
+
+def test_touched_file_with_same_content_is_skipped(tmp_path):
+    """Testet, dass nur eine neue mtime keine erneute Analyse auslöst"""
+    data = tmp_path / 'daten.csv'
+    data.write_text('a,b\n1,2\n')
+    manifest = FileManifest()
+    manifest.record(data, manifest.check(data), 'done')
+
+    stat = data.stat()
+    os.utime(data, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+    assert manifest.check(data) is None
+
+def test_modified_and_failed_files_are_reprocessed(tmp_path):
+    """Testet die erneute Analyse geänderter und fehlgeschlagener Dateien"""
+    changed = tmp_path / 'geaendert.csv'
+    failed = tmp_path / 'fehler.csv'
+    changed.write_text('a\n1\n')
+    failed.write_text('a\n1\n')
+    manifest = FileManifest()
+    manifest.record(changed, manifest.check(changed), 'done')
+    manifest.record(failed, manifest.check(failed), 'failed', 'Parserfehler')
+
+    changed.write_text('a\n1\n2\n')
+
+    assert manifest.check(changed) is not None
+    assert manifest.check(failed) is not None
+    assert manifest.stats() == {'done': 1, 'failed': 1}
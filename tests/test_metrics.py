@@ -0,0 +1,65 @@
+import json
+import requests
+from src.metrics import MetricsExporter, MetricsRegistry, StageTimer
+from src.ollama_agent import OllamaAgent
+
+def test_prometheus_format():
+    """Testet Counter, Gauge und Histogramm im Prometheus-Textformat"""
+    registry = MetricsRegistry()
+    registry.inc('files_total', labels={'status': 'success'})
+    registry.inc('files_total', labels={'status': 'success'})
+    registry.register_gauge('job_queue_depth', lambda: 3)
+    registry.observe('stage_seconds', 0.2, {'stage': 'read'})
+    registry.observe('stage_seconds', 7.0, {'stage': 'read'})
+
+    text = registry.to_prometheus()
+
+    assert '# TYPE file_analyzer_files_total counter' in text
+    assert 'file_analyzer_files_total{status="success"} 2.0' in text
+    assert 'file_analyzer_job_queue_depth 3.0' in text
+    assert 'file_analyzer_stage_seconds_bucket{stage="read",le="0.25"} 1' in text
+    assert 'file_analyzer_stage_seconds_bucket{stage="read",le="+Inf"} 2' in text
+    assert 'file_analyzer_stage_seconds_count{stage="read"} 2' in text
+
+def test_stage_timer_reports_to_registry():
+    """Testet, dass Stufen pro Datei und global erfasst werden"""
+    registry = MetricsRegistry()
+    timer = StageTimer(registry)
+    with timer.stage('read'):
+        pass
+    timer.add('llm_wait', 1.5)
+
+    assert set(timer.to_dict()) == {'read', 'llm_wait'}
+    samples = registry.snapshot()['metrics']['stage_seconds']['samples']
+    assert {tuple(sample['labels'].values()) for sample in samples} == {('read',), ('llm_wait',)}
+
+def test_exporter_http_and_json(tmp_path):
+    """Testet den /metrics-Endpunkt und den abschließenden JSON-Export"""
+    registry = MetricsRegistry()
+    registry.inc('llm_requests_total', labels={'status': 'success'})
+    exporter = MetricsExporter(registry, json_path=tmp_path / 'metrics.json',
+                               interval_seconds=60, http_port=0).start()
+    try:
+        response = requests.get(exporter.url, timeout=5)
+    finally:
+        exporter.stop()
+
+    assert response.status_code == 200
+    assert 'file_analyzer_llm_requests_total{status="success"} 1.0' in response.text
+    snapshot = json.loads((tmp_path / 'metrics.json').read_text())
+    assert snapshot['metrics']['llm_requests_total']['samples'][0]['value'] == 1.0
+
+def test_agent_records_token_counts(fake_ollama):
+    """Testet Stufen-Timer und Token-Zähler der Analyse"""
+    import pandas as pd
+
+    registry = MetricsRegistry()
+    agent = OllamaAgent(base_url=fake_ollama.url, request_timeout=5, metrics=registry)
+    result = agent.analyze_data(pd.DataFrame({'menge': [1, 2, 3]}))
+    agent.close()
+
+    assert set(result['stage_seconds']) == {'stats', 'prompt_build', 'llm_wait'}
+    assert result['llm_metrics']['analysis']['prompt_eval_count'] > 0
+    metrics = registry.snapshot()['metrics']
+    assert metrics['llm_requests_total']['samples'][0]['value'] == 2
+    assert metrics['llm_completion_tokens_total']['samples'][0]['value'] > 0
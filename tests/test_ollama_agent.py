@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import pytest
+import pandas as pd
+from src.ollama_agent import OllamaAgent
+
+@pytest.fixture
+def sample_dataframe():
+    """Erstellt einen Test-DataFrame"""
+    return pd.DataFrame({
+        'menge': [1, 2, 3],
+        'preis': [9.99, 19.99, 4.99],
+        'produkt': ['Laptop', 'Maus', 'Tastatur']
+    })
+
+def _agent_for(server) -> OllamaAgent:
+    host, port = server.server_address
+    return OllamaAgent(base_url=f"http://{host}:{port}", request_timeout=5)
+
+def test_generate_response_uses_session(fake_ollama):
+    """Testet die synchrone Anfrage über die gepoolte Session"""
+    agent = _agent_for(fake_ollama)
+
+    assert agent._generate_response("Hallo Welt").startswith("Antwort auf")
+    assert agent._generate_response("Noch einmal").startswith("Antwort auf")
+    assert len(fake_ollama.requests) == 2
+    assert fake_ollama.requests[0]['stream'] is False
+    agent.close()
+
+def test_from_config():
+    """Testet das Einlesen von Timeouts und Verbindungslimits"""
+    agent = OllamaAgent.from_config({
+        'model_settings': {
+            'model_name': 'llama2',
+            'base_url': 'http://example:11434',
+            'request_timeout': 42,
+            'max_connections': 3
+        }
+    })
+
+    assert agent.model == 'llama2'
+    assert agent.request_timeout == 42
+    assert agent.max_connections == 3
+
+def test_aanalyze_data(fake_ollama, sample_dataframe):
+    """Testet die asynchrone Datenanalyse"""
+    pytest.importorskip('aiohttp')
+    agent = _agent_for(fake_ollama)
+
+    async def run():
+        try:
+            return await agent.aanalyze_data(sample_dataframe)
+        finally:
+            await agent.aclose()
+
+    result = asyncio.run(run())
+
+    assert result['basic_stats']['row_count'] == 3
+    assert result['textanalyse'].startswith("Antwort auf")
+    assert 'datenverarbeitung' in result['empfehlungen']
+    assert len(fake_ollama.requests) == 2
+
+def test_generate_response_streams_tokens(fake_ollama):
+    """Testet Streaming mit Callback und Time-to-first-Token"""
+    agent = _agent_for(fake_ollama)
+    tokens, metrics = [], {}
+
+    result = agent._generate_response("Hallo Welt", on_token=tokens.append, metrics=metrics)
+
+    assert fake_ollama.requests[0]['stream'] is True
+    assert len(tokens) > 1
+    assert ''.join(tokens) == result
+    assert result.startswith("Antwort auf")
+    assert metrics['ttft_seconds'] <= metrics['total_seconds']
+    assert metrics['tokens_per_second'] > 0
+    agent.close()
+
+def test_generate_response_cancelled(fake_ollama):
+    """Testet den Abbruch eines laufenden Streams"""
+    from src.ollama_agent import GenerationCancelled
+
+    agent = _agent_for(fake_ollama)
+    cancel_event = threading.Event()
+    tokens = []
+
+    def on_token(token):
+        tokens.append(token)
+        cancel_event.set()
+
+    with pytest.raises(GenerationCancelled):
+        agent._generate_response("Hallo Welt", on_token=on_token, cancel_event=cancel_event)
+    assert len(tokens) == 1
+    agent.close()
+
+def test_options_keep_alive_and_warm_up(fake_ollama):
+    """Testet Temperatur, keep_alive und das Vorladen des Modells mit festem Prompt-Anfang"""
+    from src.prompts import DATA_ANALYSIS_PREFIX
+
+    agent = OllamaAgent(base_url=fake_ollama.url, request_timeout=5, temperature=0.1,
+                        options={'num_ctx': 4096}, keep_alive='30m')
+    warm = agent.warm_up()
+    agent._generate_response("Hallo Welt")
+
+    assert warm == [{'url': fake_ollama.url, 'ok': True, 'seconds': warm[0]['seconds'],
+                     'load_seconds': 0.0}]
+    assert fake_ollama.requests[0]['prompt'] == DATA_ANALYSIS_PREFIX
+    assert fake_ollama.requests[0]['options']['num_predict'] == 1
+    assert fake_ollama.requests[1]['options'] == {'num_ctx': 4096, 'temperature': 0.1}
+    assert all(request['keep_alive'] == '30m' for request in fake_ollama.requests)
+
+def test_shared_prompt_prefix_reports_saved_prompt_eval(sample_dataframe):
+    """Testet, dass Analyse- und Empfehlungs-Prompt einen Anfang teilen und die Ersparnis gemeldet wird"""
+    from benchmarks.fake_ollama import FakeOllamaServer
+
+    with FakeOllamaServer(prefix_cache=True) as server:
+        agent = OllamaAgent(base_url=server.url, request_timeout=5)
+        result = agent.analyze_data(sample_dataframe)
+
+    prompts = [request['prompt'] for request in server.requests]
+    assert '"row_count": 3' in prompts[1]
+    assert prompts[0].split('Bitte führe')[0] == prompts[1].split('Erstelle auf Basis')[0]
+    recommendations = result['llm_metrics']['recommendations']
+    assert recommendations['prompt_cached_tokens'] > 0
+    assert recommendations['prompt_eval_seconds_saved'] > 0
+    assert agent.prompt_cache_stats()['cached_tokens'] == recommendations['prompt_cached_tokens']
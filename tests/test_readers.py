@@ -0,0 +1,144 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from src.ollama_agent import OllamaAgent
+from src.readers import get_reader, supported_suffixes
+
+@pytest.fixture
+def table():
+    """Erstellt eine Tabelle mit Lücken in numerischen und Textspalten"""
+    return pd.DataFrame({
+        'menge': [1, 2, None, 4, 5, 6],
+        'preis': [9.5, 1.0, 3.25, None, 7.0, 2.0],
+        'produkt': ['Laptop', None, 'Maus', 'Maus', 'Monitor', 'Laptop']
+    })
+
+def test_unknown_suffix_raises():
+    """Testet die Fehlermeldung für unbekannte Formate"""
+    with pytest.raises(ValueError, match="Nicht unterstütztes Dateiformat"):
+        get_reader('bild.png')
+    assert {'.csv', '.json', '.parquet', '.txt'} <= set(supported_suffixes())
+
+def test_ndjson_is_streamed_in_chunks(tmp_path, table):
+    """Testet das chunkweise Lesen von NDJSON"""
+    path = tmp_path / 'daten.json'
+    table.to_json(path, orient='records', lines=True)
+
+    chunks = list(get_reader(path).iter_chunks(path, chunk_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    assert list(chunks[0].columns) == ['menge', 'preis', 'produkt']
+
+def test_parquet_profile_matches_full_read(tmp_path, table):
+    """Testet die Parquet-Statistik aus Metadaten und projizierten Spalten"""
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'daten.parquet'
+    table.to_parquet(path, row_group_size=4)
+
+    reader = get_reader(path)
+    expected = OllamaAgent().compute_basic_stats(reader.read(path))
+    actual = reader.profile(path, chunk_size=3)
+    with_moments = reader.profile(path, chunk_size=3, moments=True)
+
+    for profile in (actual, with_moments):
+        assert profile['row_count'] == expected['row_count']
+        assert profile['dtypes'] == expected['dtypes']
+        assert profile['missing_values'] == expected['missing_values']
+    for col in ['menge', 'preis']:
+        assert set(actual['numeric_summary'][col]) == {'count', 'min', 'max'}
+        for key in ['count', 'min', 'max']:
+            assert math.isclose(actual['numeric_summary'][col][key],
+                                expected['numeric_summary'][col][key])
+        for key in ['count', 'mean', 'std', 'min', 'max']:
+            assert math.isclose(with_moments['numeric_summary'][col][key],
+                                expected['numeric_summary'][col][key])
+    assert reader.read(path, columns=['produkt']).columns.tolist() == ['produkt']
+
+def test_parquet_profile_reads_no_column_data(tmp_path, table, monkeypatch):
+    """Testet, dass bei vollständigen Statistiken keine Spalte dekodiert wird"""
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    path = tmp_path / 'daten.parquet'
+    table.to_parquet(path, row_group_size=4)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Spaltendaten gelesen")
+
+    monkeypatch.setattr(pq.ParquetFile, 'iter_batches', fail)
+    monkeypatch.setattr(pq.ParquetFile, 'read', fail)
+    actual = get_reader(path).profile(path, chunk_size=3)
+
+    assert actual['missing_values'] == {'menge': 1, 'preis': 1, 'produkt': 1}
+    assert actual['numeric_summary']['menge'] == {'count': 5.0, 'min': 1.0, 'max': 6.0}
+
+def test_parquet_profile_with_nested_column(tmp_path):
+    """Testet, dass verschachtelte Spalten die Nullwerte der folgenden nicht verschieben"""
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    path = tmp_path / 'verschachtelt.parquet'
+    pq.write_table(pa.table({
+        's': [{'a': 1, 'b': 'x'}, None, {'a': 3, 'b': None}, {'a': 4, 'b': 'y'}],
+        'name': ['eins', 'zwei', 'drei', 'vier'],
+        'tag': ['a', None, None, 'b']
+    }), path, row_group_size=3)
+
+    actual = get_reader(path).profile(path, chunk_size=2)
+
+    assert actual['missing_values'] == {'s': 1, 'name': 0, 'tag': 2}
+
+def test_excel_sheets_are_profiled_and_cached(tmp_path, table, monkeypatch):
+    """Testet die Statistik je Blatt und das Lesen aus dem Parquet-Sidecar"""
+    pytest.importorskip('openpyxl')
+    pytest.importorskip('pyarrow')
+    from src.readers import ExcelReader, configure_excel
+
+    for attribute in ('engine', 'cache_dir', 'max_workers'):
+        monkeypatch.setattr(ExcelReader, attribute, getattr(ExcelReader, attribute))
+    configure_excel(cache_dir=tmp_path / 'cache')
+    path = tmp_path / 'mappe.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        table.to_excel(writer, sheet_name='Verkauf', index=False)
+        table.head(2).to_excel(writer, sheet_name='Rest', index=False)
+
+    reader = get_reader(path)
+    stats = reader.profile(path, chunk_size=100)
+    assert stats['sheet_count'] == 2
+    assert stats['row_count'] == 8
+    assert stats['sheets']['Rest']['row_count'] == 2
+    assert stats['sheets']['Verkauf']['missing_values'] == {'menge': 1, 'preis': 1, 'produkt': 1}
+
+    # Zweiter Zugriff liest nur noch Parquet
+    def fail(*args, **kwargs):
+        raise AssertionError("Mappe erneut geparst")
+    monkeypatch.setattr(pd, 'read_excel', fail)
+    assert reader.profile(path, chunk_size=100)['sheets'] == stats['sheets']
+    assert list(reader.read(path).columns) == ['menge', 'preis', 'produkt']
+
+def test_excel_workbook_feeds_fingerprint_and_sample(fake_ollama, tmp_path, table):
+    """Testet Fingerprint und Stichprobe für Mappen mit mehreren Blättern"""
+    pytest.importorskip('openpyxl')
+    from src.dedup import DuplicateIndex
+    from src.file_processor import FileProcessor
+
+    def write(path, frame):
+        with pd.ExcelWriter(path) as writer:
+            frame.to_excel(writer, sheet_name='Verkauf', index=False)
+            table.head(2).to_excel(writer, sheet_name='Rest', index=False)
+            pd.DataFrame({'kunde': ['A', 'B', 'C']}).to_excel(writer, sheet_name='Kunden', index=False)
+
+    write(tmp_path / 'mappe.xlsx', table)
+    write(tmp_path / 'umsortiert.xlsx', table.iloc[::-1].reset_index(drop=True))
+    agent = OllamaAgent(base_url=fake_ollama.url, request_timeout=5)
+    processor = FileProcessor(agent, write_report=False, max_rows_preview=10,
+                              dedup=DuplicateIndex(tmp_path / 'dedup.sqlite'))
+
+    first = processor.process_file(tmp_path / 'mappe.xlsx')
+    reordered = processor.process_file(tmp_path / 'umsortiert.xlsx')
+
+    assert first['basic_stats']['sheet_count'] == 3
+    assert first['basic_stats']['columns'] == ['menge', 'preis', 'produkt', 'kunde']
+    # Nur die Blätter mit den Spalten des ersten landen in der Stichprobe
+    assert first['sample']['rows_seen'] == 8
+    assert "Beispielzeilen:" in fake_ollama.requests[0]['prompt']
+    assert reordered['duplicate_of']['match'] == 'reordered'
@@ -0,0 +1,83 @@
+import sqlite3
+import time
+import pytest
+from src.results_store import ResultStore
+
+def _result(name, status='success'):
+    return {'file_name': name, 'status': status, 'empfehlungen': {'datenverarbeitung': []}}
+
+def test_batched_writes():
+    """Testet, dass erst bei vollem Puffer oder flush geschrieben wird"""
+    store = ResultStore(batch_size=3, flush_interval=None)
+    store.append(_result('a.csv'), sha256='h1')
+    store.append(_result('b.csv'), sha256='h2')
+    assert store._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+
+    store.append(_result('c.csv'), sha256='h3')
+    assert store._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 3
+
+    store.append(_result('d.csv'))
+    store.flush()
+    assert store.count() == 4
+    store.close()
+
+def test_commit_callback_runs_after_write():
+    """Testet, dass der Callback erst nach dem Festschreiben des Batches läuft"""
+    store = ResultStore(batch_size=2, flush_interval=None)
+    committed = []
+    store.append(_result('a.csv'), on_committed=lambda: committed.append(
+        store._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]))
+    assert committed == []
+
+    store.append(_result('b.csv'))
+    assert committed == [2]
+    store.close()
+
+def test_failed_write_keeps_buffer():
+    """Testet, dass bei einem Schreibfehler weder Zeilen noch Callbacks verloren gehen"""
+    store = ResultStore(batch_size=10, flush_interval=None)
+    committed = []
+    store._db.execute("CREATE TEMP TRIGGER blockieren BEFORE INSERT ON results "
+                      "BEGIN SELECT RAISE(ABORT, 'Datenträger voll'); END")
+    store.append(_result('a.csv'), on_committed=lambda: committed.append('a'))
+    store.append(_result('b.csv'))
+
+    with pytest.raises(sqlite3.Error, match="Datenträger voll"):
+        store.flush()
+    assert committed == []
+
+    store._db.execute("DROP TRIGGER blockieren")
+    store.flush()
+    assert store.count() == 2
+    assert committed == ['a']
+    store.close()
+
+def test_query_api(tmp_path):
+    """Testet Abfragen nach Name, Hash, Status und Zeit über Neustarts hinweg"""
+    path = tmp_path / 'results.sqlite'
+    store = ResultStore(path, flush_interval=None)
+    store.append(_result('a.csv', 'error'), tmp_path / 'a.csv', sha256='alt')
+    middle = time.time()
+    store.append(_result('a.csv'), tmp_path / 'a.csv', sha256='neu')
+    store.append(_result('b.csv'), tmp_path / 'b.csv', sha256='neu')
+    store.close()
+
+    store = ResultStore(path, flush_interval=None)
+    assert store.count() == 3
+    assert store.latest('a.csv')['_stored']['sha256'] == 'neu'
+    assert len(store.query(file_name='a.csv')) == 2
+    assert [r['file_name'] for r in store.query(status='error')] == ['a.csv']
+    assert store.find_by_hash('neu')['file_name'] == 'b.csv'
+    assert store.find_by_hash('alt') is None
+    assert len(store.query(since=middle)) == 2
+    assert store.latest('fehlt.csv') is None
+    store.close()
+
+def test_background_flush():
+    """Testet das zeitgesteuerte Schreiben des Puffers"""
+    store = ResultStore(batch_size=100, flush_interval=0.05)
+    store.append(_result('a.csv'))
+    time.sleep(0.3)
+
+    assert store._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 1
+    store.close()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from src.file_processor import FileProcessor
+from src.ollama_agent import OllamaAgent
+from src.sampling import RowSampler
+
+def _count_tokens(text):
+    """Grobe Zählung ohne tiktoken-Download: 4 Zeichen pro Token"""
+    return (len(text) + 3) // 4
+
+def _orders(rows=20_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'bestellung': np.arange(rows),
+        'region': rng.choice(['Nord', 'Süd', 'West', 'Ost'], size=rows, p=[0.6, 0.3, 0.0995, 0.0005]),
+        'betrag': rng.normal(100, 10, size=rows).round(2)
+    })
+    df.loc[12_345, 'betrag'] = 50_000.0
+    return df
+
+def test_sample_is_independent_of_chunking():
+    """Testet, dass die Stichprobe nicht von der Chunk-Größe abhängt und begrenzt ist"""
+    df = _orders()
+    samples = []
+    for chunk_size in (len(df), 1000, 333):
+        sampler = RowSampler(max_rows=50, count_tokens=_count_tokens)
+        for start in range(0, len(df), chunk_size):
+            sampler.update(df.iloc[start:start + chunk_size])
+        samples.append(sorted(sampler._row_ids.tolist()))
+
+    assert len(samples[0]) == 50
+    assert samples[0] == samples[1] == samples[2]
+    assert sampler.rows_seen == len(df)
+
+def test_stratified_sample_with_outliers_fits_budget():
+    """Testet seltene Schichten, Ausreißer und das Token-Budget"""
+    df = _orders()
+    sampler = RowSampler(max_rows=200, max_tokens=600, stratify_by='region', count_tokens=_count_tokens)
+    for start in range(0, len(df), 5000):
+        sampler.update(df.iloc[start:start + 5000])
+
+    text, info = sampler.to_prompt()
+
+    assert info['tokens'] <= 600
+    assert info['stratified_by'] == 'region'
+    assert info['outliers'] == 1
+    assert "12346," in text and "betrag z=" in text
+    # Reihum aus allen Schichten: die seltene Region ist trotz Kürzung dabei
+    assert ",Ost," in text
+    assert 0 < info['rows'] < 200
+
+def test_file_processor_sends_sample(fake_ollama, tmp_path):
+    """Testet, dass Beispielzeilen im Prompt landen und die Größe begrenzt ist"""
+    csv_path = tmp_path / 'bestellungen.csv'
+    _orders().to_csv(csv_path, index=False)
+    agent = OllamaAgent(base_url=fake_ollama.url, request_timeout=5)
+    processor = FileProcessor(agent, write_report=False, max_rows_preview=100,
+                              sample_max_tokens=400, sample_stratify_by='auto')
+
+    results = processor.process_file(csv_path)
+
+    assert results['status'] == 'success'
+    assert results['sample']['stratified_by'] == 'region'
+    assert results['sample']['rows'] > 0
+    prompt = fake_ollama.requests[0]['prompt']
+    assert "Beispielzeilen:" in prompt
+    assert "#,bestellung,region,betrag" in prompt
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from src.sketches import KLLSketch, HyperLogLog
+from src.streaming_stats import StreamingStats
+
+def test_kll_quantiles_within_error_bound():
+    """Testet die Quantil-Genauigkeit des KLL-Sketches"""
+    values = np.random.default_rng(1).normal(0, 1, 200_000)
+    sketch = KLLSketch(k=200, seed=0)
+    for chunk in np.array_split(values, 20):
+        sketch.update(chunk)
+
+    ordered = np.sort(values)
+    for q, estimate in zip([0.25, 0.5, 0.75], sketch.quantiles([0.25, 0.5, 0.75])):
+        rank = np.searchsorted(ordered, estimate) / len(values)
+        assert abs(rank - q) <= sketch.rank_error()
+    assert sketch.count == len(values)
+    assert sum(len(level) for level in sketch._levels) < 4 * sketch.k
+
+def test_kll_merge_equals_single_pass():
+    """Testet, dass zusammengeführte Sketches dieselbe Genauigkeit haben"""
+    values = np.arange(100_000, dtype=float)
+    left, right = KLLSketch(seed=0), KLLSketch(seed=1)
+    left.update(values[:30_000])
+    right.update(values[30_000:])
+    median = left.merge(right).quantile(0.5)
+
+    assert abs(median / len(values) - 0.5) <= left.rank_error()
+    assert left.min == 0 and left.max == 99_999
+
+def test_hyperloglog_estimate_and_merge():
+    """Testet Schätzung und Zusammenführung des HyperLogLog-Sketches"""
+    first, second = HyperLogLog(), HyperLogLog()
+    first.update(pd.Series(np.arange(0, 60_000)))
+    second.update(pd.Series(np.arange(40_000, 100_000, dtype=float)))
+    estimate = first.merge(second).estimate()
+
+    assert abs(estimate - 100_000) / 100_000 < 4 * first.relative_error()
+
+def test_hyperloglog_small_cardinality():
+    """Testet das Linear Counting bei wenigen Werten"""
+    sketch = HyperLogLog()
+    sketch.update(pd.Series(['A', 'B', 'A', 'C', None]))
+
+    assert sketch.estimate() == 3
+
+def test_streaming_stats_with_sketches():
+    """Testet die approximativen Felder in basic_stats"""
+    df = pd.DataFrame({'wert': np.arange(1000), 'gruppe': ['x', 'y'] * 500})
+    stats = StreamingStats.from_chunks([df.iloc[:400], df.iloc[400:]], sketches=True).to_basic_stats()
+
+    summary = stats['numeric_summary']['wert']
+    assert list(summary) == ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+    assert abs(summary['50%'] - 500) <= 20
+    assert abs(stats['distinct_counts']['wert'] - 1000) <= 10
+    assert stats['distinct_counts']['gruppe'] == 2
+    assert 'quantiles' in stats['approximation']
+
+def test_hyperloglog_rank_is_exact_for_low_precision():
+    """Testet die Rangberechnung bei Präzisionen, deren Resthash über 2**53 liegt"""
+    for precision in (4, 10, 14):
+        remaining_bits = 64 - precision
+        # Resthash 2**k - 1 hat Rang remaining_bits - k + 1; float64 würde ab k > 53 aufrunden
+        for k in (remaining_bits, remaining_bits - 1, 20):
+            sketch = HyperLogLog(precision)
+            sketch.update_hashes(np.array([(1 << k) - 1], dtype=np.uint64))
+            assert sketch.registers[0] == remaining_bits - k + 1
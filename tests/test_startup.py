@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def test_no_heavy_imports_at_startup():
+    """Testet, dass Watcher und CLI beim Start weder pandas noch spaCy oder langchain laden"""
+    result = subprocess.run(
+        [sys.executable, 'benchmarks/import_time.py', '--skip-timing'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+
+def test_lazy_package_exports():
+    """Testet, dass die Paket-Exporte erst beim Zugriff geladen werden"""
+    code = (
+        "import sys, src; "
+        "assert 'pandas' not in sys.modules; "
+        "assert src.FileProcessor.__name__ == 'FileProcessor'; "
+        "assert 'pandas' not in sys.modules"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,58 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from src.ollama_agent import OllamaAgent
+from src.streaming_stats import StreamingStats
+
+@pytest.fixture
+def mixed_dataframe():
+    """Erstellt einen DataFrame mit Lücken und gemischten Typen"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'menge': rng.integers(0, 100, 250),
+        'preis': rng.normal(50, 10, 250),
+        'produkt': rng.choice(['Laptop', 'Maus', 'Tastatur'], 250)
+    })
+    df.loc[10:20, 'preis'] = np.nan
+    df.loc[200:, 'produkt'] = None
+    return df
+
+def test_streaming_matches_full_read(tmp_path, mixed_dataframe):
+    """Testet, dass chunkweise Statistik der Komplett-Statistik entspricht"""
+    csv_path = tmp_path / 'daten.csv'
+    mixed_dataframe.to_csv(csv_path, index=False)
+
+    expected = OllamaAgent().compute_basic_stats(pd.read_csv(csv_path))
+    actual = StreamingStats.from_csv(csv_path, chunk_size=40).to_basic_stats()
+
+    assert actual['row_count'] == expected['row_count']
+    assert actual['columns'] == expected['columns']
+    assert actual['dtypes'] == expected['dtypes']
+    assert actual['missing_values'] == expected['missing_values']
+    assert set(actual['numeric_summary']) == set(expected['numeric_summary'])
+    for col, summary in actual['numeric_summary'].items():
+        for key in ['count', 'mean', 'std', 'min', 'max']:
+            assert math.isclose(summary[key], expected['numeric_summary'][col][key], rel_tol=1e-9)
+
+def test_int_column_with_nulls_in_one_chunk_becomes_float():
+    """Testet die Dtype-Vereinigung über Chunks hinweg"""
+    stats = StreamingStats.from_chunks([
+        pd.DataFrame({'a': [1, 2, 3]}),
+        pd.DataFrame({'a': [4.0, np.nan]})
+    ])
+
+    result = stats.to_basic_stats()
+    assert result['dtypes']['a'] == 'float64'
+    assert result['missing_values']['a'] == 1
+    assert result['numeric_summary']['a']['mean'] == 2.5
+
+def test_merge_of_partial_results(mixed_dataframe):
+    """Testet das Zusammenführen zweier Teil-Statistiken"""
+    left = StreamingStats.from_chunks([mixed_dataframe.iloc[:100]])
+    right = StreamingStats.from_chunks([mixed_dataframe.iloc[100:]])
+    merged = left.merge(right).to_basic_stats()
+
+    assert merged['row_count'] == 250
+    assert math.isclose(merged['numeric_summary']['preis']['std'],
+                        mixed_dataframe['preis'].std(), rel_tol=1e-9)
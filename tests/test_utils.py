@@ -48,6 +48,44 @@ def test_text_preprocessing(text_preprocessor):
     assert "!" not in processed_text
     assert "." not in processed_text
 
+def test_batch_processing_matches_single_text(text_preprocessor):
+    """Testet, dass die Batch-Verarbeitung dieselben Ergebnisse liefert"""
+    texts = ["Das ist ein Test.", "Hello World! This is a Test."]
+    config = {"lowercase": True, "remove_special_chars": True}
+
+    batch = text_preprocessor.process_batch(texts, config, batch_size=2)
+
+    assert [item["text"] for item in batch] == [
+        text_preprocessor.preprocess_text(text, config) for text in texts
+    ]
+    assert batch[0] == text_preprocessor.analyze_text(texts[0], config)
+    assert TextPreprocessor().nlp is text_preprocessor.nlp
+
+def test_nlp_can_be_replaced_per_instance(monkeypatch):
+    """Testet, dass eine eigene Pipeline nur die eine Instanz betrifft"""
+    class Token:
+        def __init__(self, text):
+            self.lemma_ = text
+
+    class Doc(list):
+        pass
+
+    def pipeline(text):
+        doc = Doc(Token(word) for word in text.split())
+        doc._ = type('Extensions', (), {'language': {'language': 'de', 'score': 1.0}})()
+        return doc
+
+    shared = object()
+    monkeypatch.setattr(TextPreprocessor, '_shared_nlp', shared)
+    preprocessor = TextPreprocessor()
+    preprocessor.nlp = pipeline
+
+    assert preprocessor.nlp is pipeline
+    assert preprocessor.analyze_text("Hallo Welt!", {}) == {"text": "hallo welt", "language": "de"}
+    assert TextPreprocessor().nlp is shared
+    preprocessor.nlp = None
+    assert preprocessor.nlp is shared
+
 def test_outlier_detection(sample_dataframe):
     """Testet die Ausreißererkennung"""
     outliers = DataFrameAnalyzer.detect_outliers(
@@ -58,6 +96,42 @@ def test_outlier_detection(sample_dataframe):
     assert 'numeric' in outliers
     assert len(outliers['numeric']) > 0  # Sollte den Ausreißer (100) finden
 
+def test_outlier_detection_matches_per_column_loop(sample_dataframe):
+    """Testet die vektorisierte Erkennung gegen die spaltenweise Berechnung"""
+    df = sample_dataframe.assign(second=[10.0, -50.0, 11.0, 12.0, np.nan, 13.0])
+
+    for method in ['iqr', 'zscore']:
+        outliers = DataFrameAnalyzer.detect_outliers(df, method=method)
+        for col in ['numeric', 'second']:
+            if method == 'iqr':
+                q1, q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+                expected = df[(df[col] < q1 - 1.5 * (q3 - q1)) | (df[col] > q3 + 1.5 * (q3 - q1))]
+            else:
+                expected = df[abs((df[col] - df[col].mean()) / df[col].std()) > 3]
+            assert outliers[col] == expected.index.tolist()
+
+def test_outlier_output_formats(sample_dataframe):
+    """Testet die kompakten Ausgabeformate"""
+    df = sample_dataframe.set_index(pd.Index(list('abcdef')))
+
+    assert DataFrameAnalyzer.detect_outliers(df, output='indices')['numeric'] == ['d']
+    positions = DataFrameAnalyzer.detect_outliers(df, output='positions')['numeric']
+    assert positions.dtype == np.int64 and positions.tolist() == [3]
+    assert DataFrameAnalyzer.detect_outliers(df, output='mask')['numeric'].sum() == 1
+    assert DataFrameAnalyzer.detect_outliers(df, output='count') == {'numeric': 1}
+
+def test_outlier_detection_chunked():
+    """Testet die chunkweise Erkennung mit globalen Grenzen"""
+    values = np.concatenate([np.random.default_rng(2).normal(0, 1, 5000), [25.0, -30.0]])
+    df = pd.DataFrame({'wert': values})
+    chunks = lambda: (df.iloc[i:i + 1000] for i in range(0, len(df), 1000))
+
+    for method in ['iqr', 'zscore']:
+        positions = DataFrameAnalyzer.detect_outliers_chunked(chunks, method=method)['wert']
+        assert {5000, 5001} <= set(positions.tolist())
+    zscore = DataFrameAnalyzer.detect_outliers_chunked(chunks, method='zscore', output='count')
+    assert zscore == DataFrameAnalyzer.detect_outliers(df, method='zscore', output='count')
+
 def test_correlation_analysis(sample_dataframe):
     """Testet die Korrelationsanalyse"""
     # Füge eine korrelierte Spalte hinzu
@@ -71,5 +145,25 @@ def test_correlation_analysis(sample_dataframe):
     assert isinstance(correlations, pd.DataFrame)
     assert correlations.loc['numeric', 'correlated'] > 0.9  # Sollte stark korreliert sein
 
+def test_correlation_pairs_match_dense_matrix():
+    """Testet die blockweise Kantenliste gegen die dichte Matrix"""
+    rng = np.random.default_rng(3)
+    base = rng.normal(size=(500, 4))
+    df = pd.DataFrame(np.hstack([base, base[:, :2] * 3 + rng.normal(0, 0.2, (500, 2))]),
+                      columns=[f"c{i}" for i in range(6)])
+    df['konstant'] = 1.0
+
+    for method in ['pearson', 'spearman']:
+        dense = df.corr(method=method)
+        pairs = DataFrameAnalyzer.analyze_correlations(df, method=method, threshold=0.5,
+                                                       output='pairs', block_size=2)
+        assert set(zip(pairs['column_1'], pairs['column_2'])) == {('c0', 'c4'), ('c1', 'c5')}
+        for _, row in pairs.iterrows():
+            assert abs(row['correlation'] - dense.loc[row['column_1'], row['column_2']]) < 1e-4
+
+    top = DataFrameAnalyzer.analyze_correlations(df, threshold=0.0, output='pairs', top_k=3)
+    assert len(top) == 3
+    assert top['correlation'].abs().is_monotonic_decreasing
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file